@@ -2,6 +2,8 @@ import json
 import os
 from typing import Any, Dict, Optional
 from logs.logger import Logger
+from logs.metrics import metrics
+from scraper.productUrl import product_name_from_url
 class JSONProductConverter:
     def __init__(self, data: Dict[str, Any], log_file: str = "log.txt"):
         """
@@ -20,7 +22,7 @@ class JSONProductConverter:
         :param indent: Отступ для форматирования JSON. Если None, JSON будет компактным.
         :return: JSON-строка.
         """
-        self.logger.log("Преобразование данных в JSON-строку.")
+        self.logger.debug("Преобразование данных в JSON-строку.")
         return json.dumps(self.data, indent=indent, ensure_ascii=False)
 
     def to_json_file(self, folder_path: str = "jsondata", indent: Optional[int] = 4):
@@ -32,27 +34,27 @@ class JSONProductConverter:
         """
         try:
             # Извлекаем product_name из данных
-            product_name = self.data.get("URL товара", "").split("/")[-2]  # Берем часть URL
+            product_name = product_name_from_url(self.data.get("URL товара", ""))
             if not product_name:
                 error_msg = "Не удалось извлечь product_name из данных."
-                self.logger.log(error_msg)
+                self.logger.error(error_msg)
                 raise ValueError(error_msg)
 
             # Создаем папку, если она не существует
             os.makedirs(folder_path, exist_ok=True)
-            self.logger.log(f"Папка '{folder_path}' создана или уже существует.")
+            self.logger.debug(f"Папка '{folder_path}' создана или уже существует.")
 
             # Формируем путь к файлу
             file_path = os.path.join(folder_path, f"{product_name}.json")
-            self.logger.log(f"Формирование пути к файлу: {file_path}")
+            self.logger.debug(f"Формирование пути к файлу: {file_path}")
 
             # Записываем данные в файл
-            with open(file_path, "w", encoding="utf-8") as file:
+            with metrics.timer("json_write"), open(file_path, "w", encoding="utf-8") as file:
                 json.dump(self.data, file, indent=indent, ensure_ascii=False)
 
-            self.logger.log(f"Файл успешно сохранен: {file_path}")
+            self.logger.debug(f"Файл успешно сохранен: {file_path}", stage="json_write")
 
         except Exception as e:
             error_msg = f"Ошибка при сохранении JSON-файла: {e}"
-            self.logger.log(error_msg)
+            self.logger.error(error_msg, stage="json_write")
             raise
\ No newline at end of file
@@ -0,0 +1,415 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict
+from htmlParser.productRecord import ProductRecord, dumps, dumps_json
+from JSONConverter.jsonProductConverter import JSONProductConverter
+from scraper.productUrl import product_id_from_url
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+
+def product_sku(product: Dict[str, Any]) -> str:
+    """
+    Артикул товара из URL — тот же ключ, что в журнале обхода и индексе дубликатов.
+    ("Артикул" в характеристиках — артикул продавца, он может совпадать у разных товаров.)
+
+    :param product: Данные о товаре (результат get_product_data).
+    :return: Артикул или название продукта, если артикула в URL нет.
+    """
+    return product_id_from_url(product.get("URL товара", ""))
+
+
+def product_dict(product) -> Dict[str, Any]:
+    """
+    Словарь в формате get_product_data для товара, переданного словарём или ProductRecord.
+    """
+    return product.to_dict() if isinstance(product, ProductRecord) else product
+
+
+class ProductSink:
+    # Сохраняет ли flush записанные товары так, что они переживут аварийное завершение
+    flush_persists = True
+
+    def __init__(self, batch_size: int = 100):
+        """
+        Базовый класс приёмника товаров. Записи копятся в буфере и сбрасываются пачками.
+
+        :param batch_size: Сколько товаров накапливать перед записью.
+        """
+        self.batch_size = batch_size
+        self._buffer = []
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def write(self, product):
+        """
+        Добавляет товар в буфер; при заполнении буфера записывает пачку.
+
+        :param product: Данные о товаре: словарь get_product_data или ProductRecord
+                        (в буфере хранится как есть и преобразуется только при записи).
+        """
+        with self._lock:
+            self._buffer.append(product)
+            if len(self._buffer) >= self.batch_size:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if self._buffer:
+            batch, self._buffer = self._buffer, []
+            self._write_batch(batch)
+
+    def _write_batch(self, batch: list):
+        raise NotImplementedError
+
+    def write_reviews(self, product_url: str, reviews: list):
+        """
+        Записывает отзывы, собранные отдельно от страницы товара (ReviewHarvester).
+        Они хранятся отдельно от отзывов в записи товара, чтобы повторная загрузка товара их не затирала.
+
+        :param product_url: Ссылка на товар.
+        :param reviews: Отзывы (словари как в get_reviews с полем "key" — ключом отзыва).
+        """
+        raise NotImplementedError
+
+    def close(self):
+        self.flush()
+
+
+class JSONFileSink(ProductSink):
+    def __init__(self, folder_path: str = "jsondata", indent: int = 4):
+        """
+        Прежний формат: отдельный JSON-файл на каждый товар.
+
+        :param folder_path: Папка для JSON-файлов.
+        :param indent: Отступ JSON.
+        """
+        super().__init__(batch_size=1)
+        self.folder_path = folder_path
+        self.indent = indent
+
+    def _write_batch(self, batch: list):
+        for product in batch:
+            JSONProductConverter(product_dict(product)).to_json_file(self.folder_path, self.indent)
+
+    def write_reviews(self, product_url: str, reviews: list):
+        # Отзывы дописываются в reviews/<артикул>.jsonl
+        reviews_folder = os.path.join(self.folder_path, "reviews")
+        os.makedirs(reviews_folder, exist_ok=True)
+        with self._lock, open(os.path.join(reviews_folder, f"{product_id_from_url(product_url)}.jsonl"), "a",
+                              encoding="utf-8") as file:
+            file.write("".join(dumps_json(review) + "\n" for review in reviews))
+
+
+class JSONLinesSink(ProductSink):
+    def __init__(self, path: str = "jsondata/products.jsonl", batch_size: int = 100, fsync_interval: float = 5.0):
+        """
+        Один файл JSON Lines в режиме дозаписи: одна строка — один товар.
+
+        :param path: Путь к файлу.
+        :param batch_size: Сколько товаров накапливать перед записью.
+        :param fsync_interval: Как часто (в секундах) принудительно сбрасывать файл на диск.
+        """
+        super().__init__(batch_size)
+        self.path = path
+        self.fsync_interval = fsync_interval
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._reviews_file = None
+        self._last_fsync = time.monotonic()
+
+    def _write_batch(self, batch: list):
+        self._file.write("".join(dumps_json(product_dict(product)) + "\n" for product in batch))
+        self._file.flush()
+        if time.monotonic() - self._last_fsync >= self.fsync_interval:
+            os.fsync(self._file.fileno())
+            self._last_fsync = time.monotonic()
+
+    def write_reviews(self, product_url: str, reviews: list):
+        # Отдельный файл products.harvested_reviews.jsonl: строка — отзыв с артикулом товара
+        sku = product_id_from_url(product_url)
+        with self._lock:
+            if self._reviews_file is None:
+                self._reviews_file = open(os.path.splitext(self.path)[0] + ".harvested_reviews.jsonl", "a",
+                                          encoding="utf-8")
+            self._reviews_file.write("".join(dumps_json({"sku": sku, **review}) + "\n" for review in reviews))
+            self._reviews_file.flush()
+
+    def close(self):
+        super().close()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        if self._reviews_file:
+            os.fsync(self._reviews_file.fileno())
+            self._reviews_file.close()
+
+
+class ParquetSink(ProductSink):
+    # Часть набора становится видна только после close
+    flush_persists = False
+
+    def __init__(self, path: str = "jsondata/products.parquet", batch_size: int = 1000):
+        """
+        Колоночный формат Parquet. Товары пишутся в набор данных path, отзывы — в дочернюю
+        таблицу рядом (products.reviews.parquet) со ссылкой на товар по sku.
+        Набор — папка, в которую каждый запуск добавляет свой файл part-<время>-<id>.parquet:
+        журнал обхода и манифест перепарсинга пропускают уже обработанные товары, поэтому
+        перезапись файла потеряла бы результаты прошлых запусков. Читается целиком через
+        pq.read_table(path); товар, загруженный повторно, есть в нескольких частях, актуальна
+        запись из последней (имена частей упорядочены по времени).
+        Каждая пачка становится отдельной группой строк. Часть создаётся при первой записи,
+        поэтому запуск без товаров или отзывов не оставляет в наборах пустых файлов.
+
+        :param path: Путь к папке набора товаров. Файл прежнего формата по этому пути
+                     становится первой частью набора.
+        :param batch_size: Сколько товаров в одной группе строк.
+        """
+        if pa is None:
+            raise ImportError("Для записи в Parquet нужен пакет pyarrow")
+        super().__init__(batch_size)
+        self.path = path
+        self.reviews_path = os.path.splitext(path)[0] + ".reviews.parquet"
+        self.harvested_reviews_path = os.path.splitext(path)[0] + ".harvested_reviews.parquet"
+        self.part_name = f"part-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}.parquet"
+        self._writers = {}
+
+        self.product_schema = pa.schema([
+            ("sku", pa.string()), ("title", pa.string()), ("price", pa.string()),
+            ("description", pa.string()), ("overall_rating", pa.string()),
+            ("characteristics", pa.map_(pa.string(), pa.string())), ("url", pa.string()),
+        ])
+        self.review_schema = pa.schema([
+            ("sku", pa.string()), ("position", pa.int32()), ("reviewer", pa.string()),
+            ("date", pa.string()), ("comment", pa.string()), ("rating", pa.int8()),
+            ("product_color", pa.string()), ("media", pa.list_(pa.string())),
+        ])
+        self.harvested_reviews_schema = pa.schema([
+            ("sku", pa.string()), ("key", pa.string()), ("reviewer", pa.string()),
+            ("date", pa.string()), ("comment", pa.string()), ("rating", pa.int8()),
+            ("product_color", pa.string()), ("media", pa.list_(pa.string())),
+        ])
+
+    def _write_part(self, dataset_path: str, table):
+        """
+        Дописывает таблицу в часть набора dataset_path, открывая часть при первой записи.
+        """
+        writer = self._writers.get(dataset_path)
+        if writer is None:
+            writer = self._writers[dataset_path] = self._open_part(dataset_path, table.schema)
+        writer.write_table(table)
+
+    def _open_part(self, dataset_path: str, schema):
+        """
+        Открывает новую часть набора. Пока запуск не завершён, часть пишется во временный
+        файл с точкой в начале имени: pyarrow такие файлы при чтении набора пропускает.
+        """
+        if os.path.isfile(dataset_path):
+            legacy_path = dataset_path + ".legacy"
+            os.replace(dataset_path, legacy_path)
+            os.makedirs(dataset_path)
+            os.replace(legacy_path, os.path.join(dataset_path, "part-00000000-000000-legacy.parquet"))
+        os.makedirs(dataset_path, exist_ok=True)
+        return pq.ParquetWriter(os.path.join(dataset_path, "." + self.part_name), schema, compression="zstd")
+
+    def _write_batch(self, batch: list):
+        products = []
+        reviews = []
+        for product in map(product_dict, batch):
+            sku = product_sku(product)
+            products.append({
+                "sku": sku,
+                "title": product.get("Название"),
+                "price": product.get("Цена"),
+                "description": product.get("Описание"),
+                "overall_rating": product.get("Оценка", {}).get("overall_rating"),
+                "characteristics": list(product.get("Характеристики", {}).items()),
+                "url": product.get("URL товара"),
+            })
+            for position, review in enumerate(product.get("Отзывы", [])):
+                reviews.append({"sku": sku, "position": position, **review})
+
+        self._write_part(self.path, pa.Table.from_pylist(products, schema=self.product_schema))
+        if reviews:
+            self._write_part(self.reviews_path, pa.Table.from_pylist(reviews, schema=self.review_schema))
+
+    def write_reviews(self, product_url: str, reviews: list):
+        if not reviews:
+            return
+        sku = product_id_from_url(product_url)
+        table = pa.Table.from_pylist([{"sku": sku, **review} for review in reviews],
+                                     schema=self.harvested_reviews_schema)
+        with self._lock:
+            self._write_part(self.harvested_reviews_path, table)
+
+    def close(self):
+        super().close()
+        # Части появляются в наборах только после успешной записи
+        for dataset_path, writer in self._writers.items():
+            writer.close()
+            os.replace(os.path.join(dataset_path, "." + self.part_name), os.path.join(dataset_path, self.part_name))
+
+
+class SQLiteSink(ProductSink):
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS products (
+        sku TEXT PRIMARY KEY,
+        title TEXT,
+        price TEXT,
+        description TEXT,
+        overall_rating TEXT,
+        characteristics TEXT,
+        url TEXT,
+        updated_at REAL
+    );
+    CREATE TABLE IF NOT EXISTS reviews (
+        sku TEXT NOT NULL REFERENCES products(sku),
+        position INTEGER NOT NULL,
+        reviewer TEXT,
+        date TEXT,
+        comment TEXT,
+        rating INTEGER,
+        product_color TEXT,
+        media TEXT,
+        PRIMARY KEY (sku, position)
+    );
+    CREATE TABLE IF NOT EXISTS harvested_reviews (
+        sku TEXT NOT NULL,
+        key TEXT NOT NULL,
+        reviewer TEXT,
+        date TEXT,
+        comment TEXT,
+        rating INTEGER,
+        product_color TEXT,
+        media TEXT,
+        harvested_at REAL,
+        PRIMARY KEY (sku, key)
+    );
+    """
+
+    def __init__(self, path: str = "jsondata/products.sqlite", batch_size: int = 100):
+        """
+        SQLite с обновлением записей по артикулу: повторная загрузка товара
+        заменяет его данные и отзывы, а не добавляет дубликат.
+
+        :param path: Путь к файлу базы.
+        :param batch_size: Сколько товаров записывать в одной транзакции.
+        """
+        super().__init__(batch_size)
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(self.SCHEMA)
+
+    def _write_batch(self, batch: list):
+        now = time.time()
+        with self._connection:
+            for product in map(product_dict, batch):
+                sku = product_sku(product)
+                self._connection.execute(
+                    """
+                    INSERT INTO products (sku, title, price, description, overall_rating, characteristics, url, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(sku) DO UPDATE SET
+                        title = excluded.title, price = excluded.price, description = excluded.description,
+                        overall_rating = excluded.overall_rating, characteristics = excluded.characteristics,
+                        url = excluded.url, updated_at = excluded.updated_at
+                    """,
+                    (sku, product.get("Название"), product.get("Цена"), product.get("Описание"),
+                     product.get("Оценка", {}).get("overall_rating"),
+                     json.dumps(product.get("Характеристики", {}), ensure_ascii=False),
+                     product.get("URL товара"), now))
+                self._connection.execute("DELETE FROM reviews WHERE sku = ?", (sku,))
+                self._connection.executemany(
+                    "INSERT INTO reviews (sku, position, reviewer, date, comment, rating, product_color, media) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(sku, position, review.get("reviewer"), review.get("date"), review.get("comment"),
+                      review.get("rating"), review.get("product_color"),
+                      json.dumps(review.get("media", []), ensure_ascii=False))
+                     for position, review in enumerate(product.get("Отзывы", []))])
+
+    def write_reviews(self, product_url: str, reviews: list):
+        # Ключ отзыва — первичный ключ, поэтому повторно собранные отзывы не дублируются
+        sku = product_id_from_url(product_url)
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO harvested_reviews "
+                "(sku, key, reviewer, date, comment, rating, product_color, media, harvested_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(sku, review.get("key"), review.get("reviewer"), review.get("date"), review.get("comment"),
+                  review.get("rating"), review.get("product_color"),
+                  json.dumps(review.get("media", []), ensure_ascii=False), now)
+                 for review in reviews])
+
+    def close(self):
+        super().close()
+        self._connection.close()
+
+
+class RecordLinesSink(JSONLinesSink):
+    def __init__(self, path: str = "jsondata/products.records.jsonl", batch_size: int = 100,
+                 fsync_interval: float = 5.0):
+        """
+        JSON Lines с типизированными записями (ProductRecord.to_json_dict): цена в минимальных
+        единицах и код валюты, оценка числом, даты ISO 8601, None вместо заглушек.
+        С orjson записи сериализуются без промежуточных словарей.
+        Прочитать строку обратно в запись можно функцией productRecord.loads.
+
+        :param path: Путь к файлу.
+        :param batch_size: Сколько товаров накапливать перед записью.
+        :param fsync_interval: Как часто (в секундах) принудительно сбрасывать файл на диск.
+        """
+        super().__init__(path, batch_size, fsync_interval)
+
+    def _write_batch(self, batch: list):
+        records = [product if isinstance(product, ProductRecord) else ProductRecord.from_product_data(product)
+                   for product in batch]
+        self._file.write(b"".join(dumps(record) + b"\n" for record in records).decode("utf-8"))
+        self._file.flush()
+        if time.monotonic() - self._last_fsync >= self.fsync_interval:
+            os.fsync(self._file.fileno())
+            self._last_fsync = time.monotonic()
+
+
+SINKS = {
+    "json": JSONFileSink,
+    "jsonl": JSONLinesSink,
+    "records": RecordLinesSink,
+    "parquet": ParquetSink,
+    "sqlite": SQLiteSink,
+}
+
+
+def create_sink(kind: str = "json", path: str = None, **kwargs) -> ProductSink:
+    """
+    Создаёт приёмник товаров по названию.
+
+    :param kind: "json", "jsonl", "records", "parquet" или "sqlite".
+    :param path: Путь к файлу (для "json" — к папке, для "parquet" — к папке набора). None — путь по умолчанию.
+    :return: Экземпляр ProductSink.
+    """
+    sink_class = SINKS[kind]
+    if path is not None:
+        return sink_class(path, **kwargs)
+    return sink_class(**kwargs)
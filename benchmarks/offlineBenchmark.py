@@ -0,0 +1,327 @@
+import argparse
+import atexit
+import glob
+import json
+import math
+import multiprocessing
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from functools import partial
+from lxml import html as lxml_html
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.parserBenchmark import _max_rss_kb
+from htmlParser.configUpdater.htmlConfigUpdater import HTMLConfigUpdater
+from htmlParser.htmlMainPageParser import HTMLMainPageLinksParser
+from htmlParser.htmlProductParser import PARSER_BACKENDS
+from htmlParser.listingPageParser import ListingPageParser
+from htmlParser.productRecord import ProductRecord, dumps
+from JSONConverter.jsonProductConverter import JSONProductConverter
+from logs import logger
+
+DEFAULT_BASELINE = os.path.join(PROJECT_ROOT, "benchmarks", "baseline.json")
+PRODUCT_PAGES = (os.path.join(PROJECT_ROOT, "htmldata", "*.html"),
+                 os.path.join(PROJECT_ROOT, "htmlParser", "configUpdater", "htmldata", "*.html"))
+MAIN_PAGES = os.path.join(PROJECT_ROOT, "htmldata", "main_pages", "*.html")
+CONFIG_UPDATER_DIR = os.path.join(PROJECT_ROOT, "htmlParser", "configUpdater")
+GETTERS = ("get_title", "get_price", "get_description", "get_characteristics", "get_rating", "get_reviews")
+
+
+def _read(path: str) -> str:
+    with open(path, "r", encoding="utf-8") as file:
+        return file.read()
+
+
+def _product_pages() -> list:
+    return sorted(path for pattern in PRODUCT_PAGES for path in glob.glob(pattern))
+
+
+def _product_case(parser_class, getter: str = None):
+    """
+    Сценарий для страниц товара: полный get_product_data, только построение документа
+    (getter="document") или один геттер на уже разобранных документах.
+    """
+    pages = [_read(path) for path in _product_pages()]
+    if getter is None:
+        return lambda: [parser_class(html, "benchmark").get_product_data() for html in pages], len(pages)
+    if getter == "document":
+        return lambda: [parser_class(html, "benchmark") for html in pages], len(pages)
+    parsers = [parser_class(html, "benchmark") for html in pages]
+    return lambda: [getattr(parser, getter)() for parser in parsers], len(parsers)
+
+
+def _main_page_case():
+    pages = [_read(path) for path in sorted(glob.glob(MAIN_PAGES))]
+    return lambda: [HTMLMainPageLinksParser(html).get_product_links() for html in pages], len(pages)
+
+
+def _listing_case():
+    """
+    Извлечение всего, что нужно обходу каталога: товары, разделы и следующая страница.
+    """
+    pages = [_read(path) for path in sorted(glob.glob(MAIN_PAGES))]
+
+    def run():
+        for html in pages:
+            parser = ListingPageParser(html)
+            parser.get_product_links()
+            parser.get_listing_links()
+            parser.get_next_page()
+    return run, len(pages)
+
+
+def _config_updater_case():
+    template_file = os.path.join(CONFIG_UPDATER_DIR, "htmldata", "krossovki-lexsan-1585614406.html")
+    downloaded_html = _read(os.path.join(CONFIG_UPDATER_DIR, "htmldata", "krossovki-lexsan-1585614406 — копия.html"))
+    config_file = os.path.join(CONFIG_UPDATER_DIR, "config.json")
+    return lambda: HTMLConfigUpdater(downloaded_html, template_file, config_file).find_class_changes(), 1
+
+
+def _drift_detection_case():
+    """
+    Проверка уже разобранных страниц на изменение классов (как при проверке каждой скачанной страницы).
+    """
+    template_file = os.path.join(CONFIG_UPDATER_DIR, "htmldata", "krossovki-lexsan-1585614406.html")
+    detector = HTMLConfigUpdater("", template_file, os.path.join(CONFIG_UPDATER_DIR, "config.json")).detector
+    trees = [lxml_html.fromstring(_read(path)) for path in _product_pages()]
+    return lambda: [detector.detect(tree) for tree in trees], len(trees)
+
+
+def _json_case(to_file: bool):
+    products = [PARSER_BACKENDS["lxml"](_read(path), "benchmark").get_product_data() for path in _product_pages()]
+    if not to_file:
+        return lambda: [JSONProductConverter(product).to_json_string() for product in products], len(products)
+    output_folder = tempfile.mkdtemp(prefix="benchmark-json-")
+    atexit.register(shutil.rmtree, output_folder, ignore_errors=True)
+    return lambda: [JSONProductConverter(product).to_json_file(output_folder) for product in products], len(products)
+
+
+def _record_case(serialize: bool):
+    """
+    Преобразование результата парсинга в ProductRecord или сериализация готовых записей.
+    """
+    products = [PARSER_BACKENDS["lxml"](_read(path), "benchmark").get_product_data() for path in _product_pages()]
+    if not serialize:
+        return lambda: [ProductRecord.from_product_data(product) for product in products], len(products)
+    records = [ProductRecord.from_product_data(product) for product in products]
+    return lambda: [dumps(record) for record in records], len(records)
+
+
+def reference_workload():
+    """
+    Эталонная нагрузка, похожая на сценарии (разбор HTML в lxml, обход строк в Python,
+    сериализация в JSON), но не зависящая от кода проекта. Её время в том же запуске
+    показывает, насколько текущая машина быстрее или медленнее машины, на которой снята база.
+    """
+    rows = "".join(f"<tr><td class='key'>Ключ {i}</td><td class='value'>Значение {i * 7 % 13}</td></tr>"
+                   for i in range(400))
+    document = lxml_html.fromstring(f"<html><body><table>{rows}</table></body></html>")
+    pairs = {}
+    for row in document.iter("tr"):
+        key, value = (cell.text_content().strip() for cell in row)
+        pairs[key] = value.upper()
+    return json.dumps(sorted(pairs.items()), ensure_ascii=False)
+
+
+def build_cases() -> dict:
+    """
+    Сценарии замера. Данные сценария готовятся только при его запуске.
+
+    :return: Словарь {название: фабрика}. Фабрика возвращает пару (функция без аргументов,
+             обрабатывающая все страницы сценария один раз; количество страниц).
+    """
+    cases = {}
+    for backend, parser_class in PARSER_BACKENDS.items():
+        cases[f"product.{backend}"] = partial(_product_case, parser_class)
+        cases[f"product.{backend}.document"] = partial(_product_case, parser_class, "document")
+        for getter in GETTERS:
+            cases[f"product.{backend}.{getter}"] = partial(_product_case, parser_class, getter)
+    cases["main_page.links"] = _main_page_case
+    cases["main_page.listing"] = _listing_case
+    cases["config_updater.find_class_changes"] = _config_updater_case
+    cases["config_updater.detect"] = _drift_detection_case
+    cases["json.to_json_string"] = partial(_json_case, False)
+    cases["json.to_json_file"] = partial(_json_case, True)
+    cases["record.from_product_data"] = partial(_record_case, False)
+    cases["record.dumps"] = partial(_record_case, True)
+    return cases
+
+
+def _calibrate(function, min_duration: float) -> int:
+    """
+    Сколько раз повторять функцию, чтобы один замер длился не меньше min_duration
+    (первый вызов заодно служит прогревом).
+    """
+    start_time = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start_time
+    return max(1, math.ceil(min_duration / elapsed)) if elapsed else 1000
+
+
+def _sample(function, loops: int) -> float:
+    start_time = time.perf_counter()
+    for _ in range(loops):
+        function()
+    return (time.perf_counter() - start_time) / loops
+
+
+def measure_time(function, repeat: int, min_duration: float = 0.05) -> dict:
+    """
+    Замер сценария относительно эталонной нагрузки. Замеры сценария чередуются с замерами
+    эталона, поэтому изменение скорости машины (другая машина, частота процессора, соседние
+    процессы) сказывается на обоих одинаково, и их отношение от запуска к запуску почти
+    не меняется, в отличие от миллисекунд. Берётся минимум из repeat замеров; короткий
+    сценарий в каждом замере повторяется, чтобы замер длился не меньше min_duration.
+
+    :return: {"seconds": время одного прогона, "reference_seconds": время эталона,
+              "relative": отношение времени сценария к эталону,
+              "spread": разброс отношений в замерах — (медиана − минимум) / минимум}
+    """
+    loops = _calibrate(function, min_duration)
+    reference_loops = _calibrate(reference_workload, min_duration)
+    timings = []
+    reference_timings = []
+    for _ in range(repeat):
+        reference_timings.append(_sample(reference_workload, reference_loops))
+        timings.append(_sample(function, loops))
+
+    ratios = [timing / reference for timing, reference in zip(timings, reference_timings)]
+    seconds, reference_seconds = min(timings), min(reference_timings)
+    return {
+        "seconds": seconds,
+        "reference_seconds": reference_seconds,
+        "relative": seconds / reference_seconds,
+        "spread": (statistics.median(ratios) - min(ratios)) / min(ratios),
+    }
+
+
+def _measure_memory(name: str, connection):
+    """
+    Выполняется в отдельном процессе: замер пикового RSS и памяти Python-объектов одного прогона.
+    """
+    logger.configure(console=False, level=logger.WARNING)
+    function, _ = build_cases()[name]()
+    rss_before = _max_rss_kb()
+    tracemalloc.start()
+    function()
+    _, python_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    connection.send((_max_rss_kb() - rss_before, python_peak // 1024))
+    connection.close()
+
+
+def measure_memory(name: str) -> tuple:
+    """
+    :return: (прирост пикового RSS в КБ, пик памяти Python-объектов в КБ)
+    """
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_measure_memory, args=(name, sender))
+    process.start()
+    result = receiver.recv()
+    process.join()
+    return result
+
+
+def compare(results: dict, baseline: dict, tolerance: float, floor_ms: float = 1.0) -> list:
+    """
+    Сравнивает результаты с сохранённой базой. Сравниваются отношения времени сценария
+    к эталонной нагрузке, а не миллисекунды: база может быть снята на другой машине или
+    при другой загрузке. Ожидаемое время — отношение из базы, умноженное на время эталона
+    в текущем запуске.
+
+    Время считается регрессией, если отношение больше базового больше чем на tolerance
+    плюс шум (удвоенный наибольший разброс замеров сценария — в базе или сейчас) и при этом
+    время больше ожидаемого хотя бы на floor_ms: у коротких сценариев относительный шум велик.
+
+    :return: Список описаний регрессий (время или пик памяти Python больше базы).
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base or "relative" not in base:
+            continue
+        expected = base["relative"] * result["reference_seconds"]
+        threshold = tolerance + 2 * max(result["spread"], base.get("spread", 0.0))
+        if (result["relative"] > base["relative"] * (1 + threshold)
+                and (result["seconds"] - expected) * 1000 > floor_ms):
+            regressions.append(f"{name}: время {expected * 1000:.2f} → {result['seconds'] * 1000:.2f} мс "
+                               f"(к эталону {base['relative']:.2f} → {result['relative']:.2f}, "
+                               f"порог +{threshold * 100:.0f}%)")
+        if "python_kb" in result and result["python_kb"] > base.get("python_kb", float("inf")) * (1 + tolerance):
+            regressions.append(f"{name}: память Python {base['python_kb']} → {result['python_kb']} КБ")
+    return regressions
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(
+        description="Офлайн-бенчмарк парсинга и записи на сохранённых страницах")
+    argument_parser.add_argument("--repeat", type=int, default=7, help="Количество замеров сценария")
+    argument_parser.add_argument("--min-duration", type=float, default=0.05,
+                                 help="Минимальная длительность одного замера, с")
+    argument_parser.add_argument("--filter", default="", help="Запускать только сценарии, содержащие строку")
+    argument_parser.add_argument("--no-memory", action="store_true", help="Не замерять память (быстрее)")
+    argument_parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Файл с базовыми результатами")
+    argument_parser.add_argument("--save-baseline", action="store_true", help="Сохранить результаты как базу")
+    argument_parser.add_argument("--tolerance", type=float, default=0.25,
+                                 help="Допустимое ухудшение относительно базы сверх шума (0.25 = 25%%)")
+    argument_parser.add_argument("--floor-ms", type=float, default=1.0,
+                                 help="Минимальное ухудшение в миллисекундах, которое считается регрессией")
+    args = argument_parser.parse_args()
+
+    logger.configure(console=False, level=logger.WARNING)
+    cases = {name: case for name, case in build_cases().items() if args.filter in name}
+
+    print(f"{'сценарий':<42}{'время, мс':>11}{'к эталону':>11}{'разброс':>9}{'стр/с':>10}"
+          f"{'RSS, КБ':>10}{'Python, КБ':>12}")
+    results = {}
+    for name, factory in cases.items():
+        function, pages = factory()
+        result = measure_time(function, args.repeat, args.min_duration)
+        result["pages_per_second"] = pages / result["seconds"] if result["seconds"] else 0.0
+        memory = ""
+        if not args.no_memory:
+            result["rss_kb"], result["python_kb"] = measure_memory(name)
+            memory = f"{result['rss_kb']:>10}{result['python_kb']:>12}"
+        results[name] = result
+        print(f"{name:<42}{result['seconds'] * 1000:>11.2f}{result['relative']:>11.2f}{result['spread'] * 100:>8.1f}%"
+              f"{result['pages_per_second']:>10.1f}{memory}")
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, "r", encoding="utf-8") as file:
+                baseline = json.load(file)
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(baseline, file, indent=4, ensure_ascii=False, sort_keys=True)
+        print(f"База сохранена в {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("Базовые результаты не найдены, сравнение пропущено (используйте --save-baseline).")
+        return
+
+    with open(args.baseline, "r", encoding="utf-8") as file:
+        baseline = json.load(file)
+    if not any("relative" in base for base in baseline.values()):
+        print("База снята без эталонной нагрузки, сравнение пропущено (пересохраните базу с --save-baseline).")
+        return
+    regressions = compare(results, baseline, args.tolerance, args.floor_ms)
+    if regressions:
+        print("Регрессии относительно базы:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print("Регрессий относительно базы нет.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import argparse
+import glob
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+from htmlParser.htmlProductParser import PARSER_BACKENDS
+
+# Страница, на которой после карусели рекомендаций внутри отзыва идёт текст: бэкенды,
+# удаляющие карусель вместе с этим текстом, расходятся с BeautifulSoup (decompose)
+CAROUSEL_TAIL_PAGE = """<html><body><h1 class="lz6_28 tsHeadline550Medium">Товар</h1>
+<div class="rt1_31"><div class="r2t_31"><span class="p8u_31">Анна</span>
+<div class="x5p_31">12 мая<div class="jp7_25"><div class="r2t_31"><span class="p8u_31">Реклама</span></div></div> 2024</div>
+<span class="p7x_31">Удобные<div class="jp7_25">Похожие товары</div> и лёгкие</span></div>
+<div class="jp7_25"><div class="r2t_31"><span class="p8u_31">Чужой отзыв</span></div></div>Конец отзывов</div>
+<div data-widget="webReviewTabs"></div></body></html>"""
+
+
+def _max_rss_kb() -> int:
+    # VmHWM сбрасывается при exec, в отличие от ru_maxrss, поэтому на Linux берём его
+    if os.path.exists("/proc/self/status"):
+        with open("/proc/self/status", "r") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+
+    if resource is None:
+        return 0
+
+    # ru_maxrss на Linux в килобайтах, на macOS — в байтах
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def _measure_memory(backend: str, html: str, connection):
+    """
+    Выполняется в отдельном процессе, чтобы пиковый RSS не зависел от предыдущих замеров.
+    """
+    parser_class = PARSER_BACKENDS[backend]
+    rss_before = _max_rss_kb()
+    tracemalloc.start()
+    parser_class(html, "benchmark").get_product_data()
+    _, python_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    connection.send((_max_rss_kb() - rss_before, python_peak // 1024))
+    connection.close()
+
+
+def measure_memory(backend: str, html: str) -> tuple:
+    """
+    Пиковая память парсинга одной страницы.
+
+    :return: (прирост пикового RSS в КБ, пик памяти Python-объектов в КБ)
+    """
+    # spawn вместо fork: дочерний процесс не наследует пиковый RSS родителя
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_measure_memory, args=(backend, html, sender))
+    process.start()
+    result = receiver.recv()
+    process.join()
+    return result
+
+
+def differing_backends(html: str) -> list:
+    """
+    :return: Бэкенды, результат get_product_data которых отличается от первого (bs4).
+    """
+    outputs = {backend: parser_class(html, "benchmark").get_product_data()
+               for backend, parser_class in PARSER_BACKENDS.items()}
+    reference = next(iter(outputs.values()))
+    return [backend for backend, output in outputs.items() if output != reference]
+
+
+def measure_time(backend: str, html: str, repeat: int) -> float:
+    """
+    Медианное время полного get_product_data (включая построение дерева) в секундах.
+    """
+    parser_class = PARSER_BACKENDS[backend]
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        parser_class(html, "benchmark").get_product_data()
+        timings.append(time.perf_counter() - start_time)
+    return statistics.median(timings)
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(description="Сравнение бэкендов парсинга страниц товара")
+    argument_parser.add_argument("pages", nargs="*", help="HTML-файлы (по умолчанию htmldata/*.html)")
+    argument_parser.add_argument("--repeat", type=int, default=5, help="Количество прогонов на страницу")
+    args = argument_parser.parse_args()
+
+    pages = args.pages or sorted(glob.glob(os.path.join(PROJECT_ROOT, "htmldata", "*.html")))
+    backends = list(PARSER_BACKENDS)
+
+    differing = differing_backends(CAROUSEL_TAIL_PAGE)
+    if differing:
+        print(f"ВНИМАНИЕ: текст после карусели рекомендаций разбирается по-разному: {', '.join(differing)}")
+
+    print(f"{'страница':<20}{'бэкенд':<8}{'время, мс':>12}{'RSS, КБ':>12}{'Python, КБ':>12}{'ускорение':>12}")
+    for page in pages:
+        with open(page, "r", encoding="utf-8") as file:
+            html = file.read()
+
+        # Перед замером убеждаемся, что результаты совпадают
+        if differing_backends(html):
+            print(f"ВНИМАНИЕ: результаты бэкендов различаются для {page}")
+
+        base_time = None
+        for backend in backends:
+            elapsed = measure_time(backend, html, args.repeat)
+            rss_kb, python_kb = measure_memory(backend, html)
+            base_time = base_time or elapsed
+            print(f"{os.path.basename(page)[:19]:<20}{backend:<8}{elapsed * 1000:>12.1f}{rss_kb:>12}{python_kb:>12}"
+                  f"{base_time / elapsed:>11.1f}x")
+
+
+if __name__ == "__main__":
+    main()
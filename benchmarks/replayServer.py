@@ -0,0 +1,247 @@
+import argparse
+import glob
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+from htmlStorage.rawPageStore import RawPageStore
+
+DEFAULT_PAGES = os.path.join(PROJECT_ROOT, "htmldata", "*.html")
+# Название товара в URL: /product/<slug>/ или /product/<slug>-<номер>/
+PRODUCT_PATH_PATTERN = re.compile(r"^/product/([^/?#]+)/")
+TRAILING_NUMBER_PATTERN = re.compile(r"-(\d+)$")
+# Страница антибота: HTTPPageFetcher распознаёт её по маркеру и передаёт ссылку браузеру
+BLOCK_PAGE = "<html><head><title>Antibot Challenge</title></head><body>Доступ ограничен</body></html>"
+
+
+class ReplayServer:
+    def __init__(self, pages_pattern: str = DEFAULT_PAGES, archive_path: str = None, host: str = "127.0.0.1",
+                 port: int = 0, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 block_rate: float = 0.0, throttle_rate: float = 0.0, max_requests_per_second: float = None,
+                 seed: int = None):
+        """
+        Локальный HTTP-сервер, который отдаёт сохранённые страницы товаров по адресам вида
+        /product/<slug>/, как ozon.by. Позволяет прогонять весь конвейер (загрузка по HTTP
+        или в браузере, парсинг, запись) без обращения к сайту. Задержки, ошибки, страницы
+        антибота и ограничение частоты запросов добавляются с заданной вероятностью.
+
+        :param pages_pattern: Шаблон пути к сохранённым .html-файлам (имя файла — slug товара).
+        :param archive_path: Архив сырых страниц (RawPageStore), последние версии страниц которого тоже отдаются.
+        :param host: Адрес сервера.
+        :param port: Порт. 0 — любой свободный.
+        :param latency: Задержка ответа в секундах.
+        :param jitter: Случайная добавка к задержке: равномерно от 0 до jitter секунд.
+        :param error_rate: Доля ответов 500.
+        :param block_rate: Доля ответов со страницей антибота (статус 200).
+        :param throttle_rate: Доля ответов 429.
+        :param max_requests_per_second: Ограничение частоты запросов: сверх него отвечает 429. None — без ограничения.
+        :param seed: Начальное значение генератора случайных чисел для воспроизводимых прогонов.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.block_rate = block_rate
+        self.throttle_rate = throttle_rate
+        self.max_requests_per_second = max_requests_per_second
+        self.pages = self._load_pages(pages_pattern, archive_path)
+        if not self.pages:
+            raise ValueError("Нет сохранённых страниц для воспроизведения")
+        self.slugs = sorted(self.pages)
+        # Slug без номера на конце -> сохранённая страница (krossovki-lexsan-1585614406 -> krossovki-lexsan)
+        self._base_slugs = {}
+        for slug in self.slugs:
+            self._base_slugs.setdefault(TRAILING_NUMBER_PATTERN.sub("", slug), slug)
+        self.stats = {"requests": 0, "ok": 0, "not_found": 0, "error": 0, "blocked": 0, "throttled": 0}
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._bucket_size = max(1.0, max_requests_per_second or 0.0)
+        self._tokens = self._bucket_size
+        self._tokens_updated = time.monotonic()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @staticmethod
+    def _load_pages(pages_pattern: str, archive_path: str) -> dict:
+        pages = {}
+        for path in sorted(glob.glob(pages_pattern)):
+            with open(path, "r", encoding="utf-8") as file:
+                pages[os.path.splitext(os.path.basename(path))[0]] = file.read().encode("utf-8")
+        if archive_path:
+            with RawPageStore(archive_path) as archive:
+                for slug, _, _, content_hash in archive.iter_latest():
+                    pages[slug] = archive.get_by_hash(content_hash).encode("utf-8")
+        return pages
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> str:
+        """
+        Запускает сервер в фоновом потоке.
+
+        :return: Базовый адрес сервера.
+        """
+        self._thread = threading.Thread(target=self._server.serve_forever, name="replay-server", daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def product_urls(self, count: int) -> list:
+        """
+        Ссылки на товары для прогона: сохранённые страницы по кругу, у каждой ссылки свой
+        номер (артикул), поэтому журнал обхода и индекс дубликатов считают их разными товарами.
+
+        :param count: Количество ссылок.
+        """
+        urls = []
+        for index in range(count):
+            slug = TRAILING_NUMBER_PATTERN.sub("", self.slugs[index % len(self.slugs)])
+            urls.append(f"{self.base_url}/product/{slug}-{100000000 + index}/")
+        return urls
+
+    def find_page(self, path: str):
+        """
+        Страница для пути запроса: точное совпадение slug, затем slug без номера, затем страница по номеру.
+
+        :return: HTML-код в байтах или None, если путь не похож на страницу товара.
+        """
+        match = PRODUCT_PATH_PATTERN.match(path)
+        if not match:
+            return None
+        slug = match.group(1)
+        if slug in self.pages:
+            return self.pages[slug]
+        candidate = self._base_slugs.get(TRAILING_NUMBER_PATTERN.sub("", slug))
+        if candidate:
+            return self.pages[candidate]
+        number = TRAILING_NUMBER_PATTERN.search(slug)
+        return self.pages[self.slugs[int(number.group(1)) % len(self.slugs)]] if number else None
+
+    def _take_token(self) -> bool:
+        # Корзина токенов: не больше max_requests_per_second запросов в секунду, запас — не больше секунды
+        now = time.monotonic()
+        self._tokens = min(self._bucket_size,
+                           self._tokens + (now - self._tokens_updated) * self.max_requests_per_second)
+        self._tokens_updated = now
+        if self._tokens < 1.0:
+            return False
+        self._tokens -= 1.0
+        return True
+
+    def _choose_response(self, path: str):
+        """
+        :return: Пара (код ответа, тело).
+        """
+        with self._lock:
+            self.stats["requests"] += 1
+            roll = self._random.random()
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            if self.max_requests_per_second and not self._take_token():
+                outcome = "throttled"
+            elif roll < self.error_rate:
+                outcome = "error"
+            elif roll < self.error_rate + self.block_rate:
+                outcome = "blocked"
+            elif roll < self.error_rate + self.block_rate + self.throttle_rate:
+                outcome = "throttled"
+            else:
+                outcome = "ok"
+
+        if outcome == "ok":
+            page = self.find_page(path)
+            if page is None:
+                outcome = "not_found"
+        with self._lock:
+            self.stats[outcome] += 1
+
+        if delay:
+            time.sleep(delay)
+        if outcome == "throttled":
+            return 429, b"Too Many Requests"
+        if outcome == "error":
+            return 500, b"Internal Server Error"
+        if outcome == "blocked":
+            return 200, BLOCK_PAGE.encode("utf-8")
+        if outcome == "not_found":
+            return 404, b"Not Found"
+        return 200, page
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                status, body = server._choose_response(self.path)
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                if status == 429:
+                    self.send_header("Retry-After", "1")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(
+        description="Локальный сервер, отдающий сохранённые страницы товаров вместо ozon.by")
+    argument_parser.add_argument("--pages", default=DEFAULT_PAGES, help="Шаблон пути к сохранённым страницам")
+    argument_parser.add_argument("--archive", default=None, help="Архив страниц (.sqlite)")
+    argument_parser.add_argument("--host", default="127.0.0.1")
+    argument_parser.add_argument("--port", type=int, default=8800)
+    argument_parser.add_argument("--latency", type=float, default=0.0, help="Задержка ответа, с")
+    argument_parser.add_argument("--jitter", type=float, default=0.0, help="Случайная добавка к задержке, с")
+    argument_parser.add_argument("--error-rate", type=float, default=0.0, help="Доля ответов 500")
+    argument_parser.add_argument("--block-rate", type=float, default=0.0, help="Доля страниц антибота")
+    argument_parser.add_argument("--throttle-rate", type=float, default=0.0, help="Доля ответов 429")
+    argument_parser.add_argument("--max-rps", type=float, default=None, help="Ограничение запросов в секунду")
+    argument_parser.add_argument("--seed", type=int, default=None)
+    argument_parser.add_argument("--links", type=int, default=0,
+                                 help="Вывести столько ссылок на товары (для файла ссылок)")
+    args = argument_parser.parse_args()
+
+    server = ReplayServer(args.pages, args.archive, args.host, args.port, args.latency, args.jitter,
+                          args.error_rate, args.block_rate, args.throttle_rate, args.max_rps, args.seed)
+    server.start()
+    for url in server.product_urls(args.links):
+        print(url)
+    print(f"Страниц: {len(server.pages)}, адрес: {server.base_url}", file=sys.stderr)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        print(f"Статистика: {server.stats}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.parserBenchmark import _max_rss_kb
+from benchmarks.replayServer import DEFAULT_PAGES, ReplayServer
+
+DEFAULT_BASELINE = os.path.join(PROJECT_ROOT, "benchmarks", "throughput_baseline.json")
+# Этапы, которые выводятся в отчёте (если встречались в прогоне)
+REPORT_STAGES = ("http_fetch", "get", "wait.ready", "scroll", "wait.settle", "page_source", "driver_start",
+                 "rate_limit_wait", "parse.document", "sink_write", "ledger.claim")
+# Параметры прогона, от которых зависит результат; база сравнивается только при их совпадении
+SETTINGS = ("pages", "latency", "jitter", "error_rate", "block_rate", "throttle_rate", "max_rps",
+            "parse_workers", "backend", "sink")
+
+
+def _cpu_seconds(who) -> float:
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(who)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _run_pipeline(mode: str, workers: int, urls: list, args: dict, connection):
+    """
+    Выполняется в отдельном процессе: один прогон BatchDownloader по ссылкам на сервер воспроизведения.
+    Отдельный процесс нужен, чтобы время CPU, пиковая память и метрики этапов относились только к этому прогону.
+    """
+    from logs import logger
+    from logs.metrics import metrics
+    from scraper.batchDownloader import BatchDownloader
+    from scraper.crawlLedger import CrawlLedger
+
+    work_dir = tempfile.mkdtemp(prefix="throughput-")
+    try:
+        # Логи, журнал обхода и результаты пишутся во временную папку
+        os.chdir(work_dir)
+        logger.configure(console=False, level=logger.WARNING)
+        with open("links.txt", "w", encoding="utf-8") as file:
+            file.write("\n".join(urls))
+
+        downloader = BatchDownloader(
+            "links.txt", "html", used_links_file="used_links.txt", workers=workers,
+            parse_workers=args["parse_workers"], parser_backend=args["backend"], sink=args["sink"],
+            sink_path=None if args["sink"] == "json" else f"products.{args['sink']}",
+            ledger_path="ledger.sqlite", metrics_file=None, http_first=mode == "http",
+            browser_fallback=mode == "browser", lean_fetch=True, jitter_budget=args["jitter_budget"])
+        metrics.drain()
+        cpu_before = _cpu_seconds(resource.RUSAGE_SELF) if resource else 0.0
+        start_time = time.perf_counter()
+        with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+            downloader.download_all()
+        seconds = time.perf_counter() - start_time
+
+        with CrawlLedger("ledger.sqlite") as ledger:
+            counts = ledger.counts()
+        stages = {stage: {"count": stats["count"], "p50_ms": stats["p50"] * 1000, "p95_ms": stats["p95"] * 1000}
+                  for stage, stats in metrics.summary().items() if stage in REPORT_STAGES}
+        connection.send({
+            "seconds": seconds,
+            "done": counts["done"],
+            "failed": counts["failed"],
+            "pages_per_minute": counts["done"] / seconds * 60 if seconds else 0.0,
+            "sources": dict(downloader._fetcher.stats),
+            "cpu_seconds": (_cpu_seconds(resource.RUSAGE_SELF) - cpu_before if resource else 0.0),
+            "children_cpu_seconds": _cpu_seconds(resource.RUSAGE_CHILDREN) if resource else 0.0,
+            "rss_kb": _max_rss_kb(),
+            "children_rss_kb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss if resource else 0,
+            "stages": stages,
+        })
+    except Exception as e:
+        connection.send({"error": f"{type(e).__name__}: {e}"})
+    finally:
+        connection.close()
+        os.chdir(PROJECT_ROOT)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def run_once(server: ReplayServer, mode: str, workers: int, args: dict) -> dict:
+    """
+    Прогоняет конвейер в режиме mode ("http" или "browser") с заданным количеством потоков.
+
+    :return: Результат прогона (см. _run_pipeline) со статистикой сервера; при ошибке — {"error": ...}.
+    """
+    server.stats = dict.fromkeys(server.stats, 0)
+    # spawn: дочерний процесс не наследует память и замеры родителя
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_run_pipeline,
+                              args=(mode, workers, server.product_urls(args["pages"]), args, sender))
+    process.start()
+    sender.close()
+    try:
+        result = receiver.recv()
+    except EOFError:
+        result = {"error": "процесс прогона завершился без результата"}
+    process.join()
+    result["server"] = dict(server.stats)
+    return result
+
+
+def print_result(name: str, result: dict):
+    if "error" in result:
+        print(f"{name:<14}ошибка: {result['error']}")
+        return
+    print(f"{name:<14}{result['done']:>7}{result['failed']:>8}{result['seconds']:>9.1f}"
+          f"{result['pages_per_minute']:>11.1f}{result['cpu_seconds']:>9.1f}{result['children_cpu_seconds']:>10.1f}"
+          f"{result['rss_kb'] // 1024:>9}{result['children_rss_kb'] // 1024:>10}")
+    for stage, stats in result["stages"].items():
+        print(f"{'':<14}{stage:<18}{stats['count']:>7}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}")
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Сравнивает пропускную способность с базой.
+
+    :return: Список описаний регрессий (страниц в минуту меньше базы более чем на tolerance).
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base or "error" in result or "error" in base:
+            continue
+        if result["pages_per_minute"] < base["pages_per_minute"] * (1 - tolerance):
+            regressions.append(f"{name}: {base['pages_per_minute']:.1f} → {result['pages_per_minute']:.1f} стр/мин")
+    return regressions
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(
+        description="Сквозной бенчмарк скачивания на локальном сервере с сохранёнными страницами")
+    argument_parser.add_argument("--pages", type=int, default=100, help="Количество ссылок в прогоне")
+    argument_parser.add_argument("--workers", default="1,2,4,8", help="Количества потоков через запятую")
+    argument_parser.add_argument("--modes", default="http,browser", help="Режимы загрузки: http, browser")
+    argument_parser.add_argument("--pages-pattern", default=DEFAULT_PAGES, help="Шаблон пути к сохранённым страницам")
+    argument_parser.add_argument("--archive", default=None, help="Архив страниц (.sqlite) для сервера")
+    argument_parser.add_argument("--latency", type=float, default=0.05, help="Задержка ответа сервера, с")
+    argument_parser.add_argument("--jitter", type=float, default=0.05, help="Случайная добавка к задержке, с")
+    argument_parser.add_argument("--error-rate", type=float, default=0.0, help="Доля ответов 500")
+    argument_parser.add_argument("--block-rate", type=float, default=0.0, help="Доля страниц антибота")
+    argument_parser.add_argument("--throttle-rate", type=float, default=0.0, help="Доля ответов 429")
+    argument_parser.add_argument("--max-rps", type=float, default=None, help="Ограничение запросов в секунду")
+    argument_parser.add_argument("--parse-workers", type=int, default=None, help="Процессов парсинга")
+    argument_parser.add_argument("--backend", default="lxml", choices=["bs4", "lxml", "stream"])
+    argument_parser.add_argument("--sink", default="jsonl", choices=["json", "jsonl", "records", "parquet", "sqlite"])
+    argument_parser.add_argument("--jitter-budget", type=float, default=0.0,
+                                 help="Бюджет случайных пауз браузера на страницу, с")
+    argument_parser.add_argument("--seed", type=int, default=1)
+    argument_parser.add_argument("--output", default=None, help="Сохранить результаты в JSON-файл")
+    argument_parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Файл с базовыми результатами")
+    argument_parser.add_argument("--save-baseline", action="store_true", help="Сохранить результаты как базу")
+    argument_parser.add_argument("--tolerance", type=float, default=0.2,
+                                 help="Допустимое падение страниц в минуту относительно базы (0.2 = 20%%)")
+    args = argument_parser.parse_args()
+    run_args = {"pages": args.pages, "parse_workers": args.parse_workers, "backend": args.backend,
+                "sink": args.sink, "jitter_budget": args.jitter_budget}
+    settings = {name: getattr(args, name) for name in SETTINGS}
+
+    server = ReplayServer(args.pages_pattern, args.archive, latency=args.latency, jitter=args.jitter,
+                          error_rate=args.error_rate, block_rate=args.block_rate, throttle_rate=args.throttle_rate,
+                          max_requests_per_second=args.max_rps, seed=args.seed)
+    print(f"Сервер {server.start()}: {len(server.pages)} страниц, задержка {args.latency}+{args.jitter} с")
+    print(f"{'прогон':<14}{'готово':>7}{'ошибок':>8}{'время,с':>9}{'стр/мин':>11}{'CPU,с':>9}"
+          f"{'CPU доч.':>10}{'RSS,МБ':>9}{'RSS доч.':>10}")
+    print(f"{'':<14}{'этап':<18}{'кол-во':>7}{'p50, мс':>10}{'p95, мс':>10}")
+
+    results = {}
+    try:
+        for mode in args.modes.split(","):
+            for workers in (int(value) for value in args.workers.split(",")):
+                name = f"{mode}.w{workers}"
+                results[name] = run_once(server, mode, workers, run_args)
+                print_result(name, results[name])
+    finally:
+        server.stop()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({"settings": settings, "results": results}, file, indent=4, ensure_ascii=False)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump({"settings": settings, "results": results}, file, indent=4, ensure_ascii=False, sort_keys=True)
+        print(f"База сохранена в {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("Базовые результаты не найдены, сравнение пропущено (используйте --save-baseline).")
+        return
+    with open(args.baseline, "r", encoding="utf-8") as file:
+        baseline = json.load(file)
+    if baseline.get("settings") != settings:
+        print("Параметры прогона отличаются от базы, сравнение пропущено.")
+        return
+    regressions = compare(results, baseline["results"], args.tolerance)
+    if regressions:
+        print("Регрессии относительно базы:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print("Регрессий относительно базы нет.")
+
+
+if __name__ == "__main__":
+    main()
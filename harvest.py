@@ -0,0 +1,28 @@
+import argparse
+from JSONConverter.productSinks import create_sink
+from scraper.dedupIndex import ProductDedupIndex
+from scraper.reviewHarvester import ReviewHarvester
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description="Сбор отзывов товаров по страницам отзывов без браузера")
+    argument_parser.add_argument("links_file", nargs="?", default="product_links.txt", help="Файл со ссылками на товары")
+    argument_parser.add_argument("--sink", default="jsonl", choices=["json", "jsonl", "records", "parquet", "sqlite"],
+                                 help="Куда записывать отзывы")
+    argument_parser.add_argument("--sink-path", default=None, help="Путь приёмника (для json — папка)")
+    argument_parser.add_argument("--ledger", default="crawl_ledger.sqlite", help="База с ключами собранных отзывов")
+    argument_parser.add_argument("--workers", type=int, default=4, help="Сколько товаров обрабатывать одновременно")
+    argument_parser.add_argument("--max-pages", type=int, default=100, help="Максимум страниц отзывов на товар")
+    argument_parser.add_argument("--delay", type=float, default=0.0, help="Пауза между запросами к хосту, с")
+    args = argument_parser.parse_args()
+
+    with open(args.links_file, "r", encoding="utf-8") as file:
+        links = ProductDedupIndex().filter(link for link in file.read().splitlines() if link.strip())
+
+    with create_sink(args.sink, args.sink_path) as sink, \
+            ReviewHarvester(sink, args.ledger, workers=args.workers, max_pages=args.max_pages,
+                            per_host_delay=args.delay) as harvester:
+        results = harvester.harvest_all(links)
+
+    failed = sum(1 for count in results.values() if count is None)
+    new_reviews = sum(count for count in results.values() if count)
+    print(f"Готово: товаров {len(results)}, новых отзывов {new_reviews}, ошибок {failed}")
@@ -0,0 +1,158 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from htmlParser.htmlProductParser import PARSER_VERSION, parse_product_html
+from htmlParser.selectorConfig import DEFAULT_CONFIG_FILE, load_selector_config
+from htmlStorage.rawPageStore import RawPageStore
+from JSONConverter.productSinks import create_sink
+
+MANIFEST_FILE = ".reparse_manifest.json"
+MANIFEST_SAVE_INTERVAL = 200
+
+
+def _parse_file(file_path: str, product_name: str, backend: str, config_file: str) -> dict:
+    """
+    Парсинг сохранённого HTML-файла в дочернем процессе (файл читается там же,
+    чтобы не передавать HTML между процессами).
+    """
+    with open(file_path, "r", encoding="utf-8") as file:
+        return parse_product_html(file.read(), product_name, backend, config_file)
+
+
+_archives = {}
+
+
+def _parse_archived(db_path: str, content_hash: str, product_name: str, backend: str, config_file: str) -> dict:
+    """
+    Парсинг страницы из архива RawPageStore в дочернем процессе.
+    Соединение с архивом открывается один раз на процесс.
+    """
+    archive = _archives.get(db_path)
+    if archive is None:
+        archive = _archives[db_path] = RawPageStore(db_path)
+    return parse_product_html(archive.get_by_hash(content_hash), product_name, backend, config_file)
+
+
+class BatchReparser:
+    def __init__(self, source: str, output_folder: str = "jsondata", backend: str = "lxml",
+                 workers: int = None, incremental: bool = True, config_file: str = DEFAULT_CONFIG_FILE,
+                 sink: str = "json", manifest_interval: int = MANIFEST_SAVE_INTERVAL):
+        """
+        Повторный парсинг уже скачанных страниц без обращения к сети.
+
+        :param source: Папка с файлами <slug>.html или файл архива RawPageStore (.sqlite).
+        :param output_folder: Папка для результатов (JSON-файлов или файла приёмника).
+        :param backend: Реализация парсера: "bs4", "lxml" или "stream".
+        :param workers: Количество процессов. None — по числу ядер.
+        :param incremental: Пропускать страницы, результат которых новее HTML
+                            и получен той же версией парсера и конфига.
+        :param config_file: Конфиг селекторов.
+        :param sink: Формат результата: "json" (файл на товар), "jsonl", "records" (типизированные записи), "parquet" или "sqlite".
+        :param manifest_interval: Через сколько обработанных страниц сохранять манифест,
+                                  чтобы прерванный запуск продолжился с места остановки.
+        """
+        self.source = source
+        self.output_folder = output_folder
+        self.backend = backend
+        self.workers = workers or os.cpu_count() or 1
+        self.incremental = incremental
+        self.config_file = config_file
+        self.sink = sink
+        self.manifest_path = os.path.join(output_folder, MANIFEST_FILE)
+        self.manifest_interval = manifest_interval
+
+    @property
+    def version(self) -> str:
+        """
+        Версия результата: меняется при изменении логики парсера или селекторов в конфиге.
+        """
+        return f"{PARSER_VERSION}-{load_selector_config(self.config_file).version}"
+
+    def _load_manifest(self) -> dict:
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path, "r", encoding="utf-8") as file:
+            return json.load(file)
+
+    def _save_manifest(self, manifest: dict):
+        os.makedirs(self.output_folder, exist_ok=True)
+        temp_path = self.manifest_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(manifest, file, ensure_ascii=False)
+        os.replace(temp_path, self.manifest_path)
+
+    def _is_archive(self) -> bool:
+        return os.path.isfile(self.source)
+
+    def _iter_pages(self):
+        """
+        Обходит источник страниц.
+
+        :return: Генератор кортежей (slug, время изменения источника, функция, аргументы функции).
+        """
+        if self._is_archive():
+            with RawPageStore(self.source) as archive:
+                pages = list(archive.iter_latest())
+            db_path = os.path.abspath(self.source)
+            for slug, url, fetched_at, content_hash in pages:
+                yield slug, fetched_at, _parse_archived, (db_path, content_hash)
+            return
+
+        for entry in sorted(os.scandir(self.source), key=lambda entry: entry.name):
+            if entry.is_file() and entry.name.endswith(".html"):
+                slug = entry.name[:-len(".html")]
+                yield slug, entry.stat().st_mtime, _parse_file, (entry.path,)
+
+    def _is_up_to_date(self, slug: str, source_mtime: float, manifest: dict, version: str) -> bool:
+        entry = manifest.get(slug)
+        if entry is None or entry.get("version") != version or entry.get("source_mtime", 0) < source_mtime:
+            return False
+        # Отдельный JSON-файл могли удалить вручную
+        return self.sink != "json" or os.path.exists(os.path.join(self.output_folder, f"{slug}.json"))
+
+    def run(self) -> dict:
+        """
+        Перепарсивает все страницы источника и передаёт товары в приёмник.
+
+        :return: Статистика: сколько страниц обработано, пропущено и с ошибками.
+        """
+        version = self.version
+        manifest = self._load_manifest() if self.incremental else {}
+        stats = {"parsed": 0, "skipped": 0, "failed": 0}
+
+        file_name = "products.records.jsonl" if self.sink == "records" else f"products.{self.sink}"
+        sink_path = self.output_folder if self.sink == "json" else os.path.join(self.output_folder, file_name)
+        # В манифест попадают только страницы, уже сохранённые приёмником,
+        # иначе после сбоя они считались бы актуальными без записанного результата
+        done = {}
+        try:
+            with create_sink(self.sink, sink_path) as sink, \
+                    ProcessPoolExecutor(max_workers=self.workers) as executor:
+                futures = {}
+                for slug, source_mtime, function, args in self._iter_pages():
+                    if self.incremental and self._is_up_to_date(slug, source_mtime, manifest, version):
+                        stats["skipped"] += 1
+                        continue
+                    future = executor.submit(function, *args, slug, self.backend, self.config_file)
+                    futures[future] = (slug, source_mtime)
+
+                for future, (slug, source_mtime) in futures.items():
+                    try:
+                        product_data = future.result()
+                        sink.write(product_data)
+                        done[slug] = {"version": version, "source_mtime": source_mtime}
+                        stats["parsed"] += 1
+                    except Exception as e:
+                        print(f"Ошибка при парсинге {slug}: {e}")
+                        stats["failed"] += 1
+
+                    if sink.flush_persists and len(done) >= self.manifest_interval:
+                        sink.flush()
+                        manifest.update(done)
+                        done.clear()
+                        self._save_manifest(manifest)
+            # Выход из with закрыл приёмник — оставшиеся страницы записаны
+            manifest.update(done)
+        finally:
+            self._save_manifest(manifest)
+        return stats
@@ -0,0 +1,156 @@
+from collections import Counter, defaultdict
+from lxml import html
+from htmlParser.selectorConfig import Selector
+
+# Сколько элементов шаблона на один класс конфига участвует в сопоставлении
+MAX_SAMPLES = 20
+# Длина текстового якоря (начало первой непустой строки элемента)
+ANCHOR_LENGTH = 40
+
+
+def iter_config_classes(config: dict):
+    """
+    Обходит селекторы конфига, у которых задан class.
+
+    :return: Генератор словарей селекторов ({"tag": ..., "class": ..., "style": ...}).
+    """
+    if isinstance(config, dict):
+        if isinstance(config.get("class"), str):
+            yield config
+        for value in config.values():
+            yield from iter_config_classes(value)
+
+
+def _widget_of(element):
+    """
+    Ближайший предок с атрибутом data-widget.
+
+    :return: Пара (имя виджета, элемент виджета); для элементов вне виджетов — ("", корень).
+    """
+    for ancestor in element.iterancestors():
+        widget = ancestor.get("data-widget")
+        if widget:
+            return widget, ancestor
+    return "", element.getroottree().getroot()
+
+
+def _relative_path(element, root) -> int:
+    """
+    Хеш пути из имён тегов от root до элемента. Позиции среди соседей не учитываются,
+    поэтому вставка соседнего узла не меняет подпись.
+    """
+    tags = []
+    while element is not None and element is not root:
+        tags.append(element.tag)
+        element = element.getparent()
+    return hash(tuple(reversed(tags)))
+
+
+def _anchor(element) -> str:
+    for text in element.itertext():
+        text = text.strip()
+        if text:
+            return text[:ANCHOR_LENGTH]
+    return ""
+
+
+class ClassDriftDetector:
+    def __init__(self, template_html: str, config: dict):
+        """
+        Поиск изменившихся классов из конфига. Шаблонная страница индексируется один раз:
+        для каждого класса конфига запоминаются подписи его элементов — виджет (data-widget),
+        путь тегов внутри виджета и текстовый якорь. На новой странице сначала проверяется,
+        находятся ли селекторы как есть; подписи сопоставляются только для пропавших
+        классов и только внутри их виджетов.
+
+        :param template_html: HTML-код страницы, на которой конфиг работает.
+        :param config: Содержимое config.json.
+        """
+        template_tree = html.fromstring(template_html)
+
+        # Инвертированный индекс: класс из конфига -> подписи элементов шаблона
+        self.index = {}
+        for entry in iter_config_classes(config):
+            class_value = entry["class"]
+            if class_value in self.index:
+                continue
+            signatures = []
+            for element in Selector.from_config(entry).all(template_tree)[:MAX_SAMPLES]:
+                widget, widget_root = _widget_of(element)
+                signatures.append((widget, _relative_path(element, widget_root), _anchor(element),
+                                   element.get("class", "").split()))
+            if signatures:
+                self.index[class_value] = signatures
+
+    def _index_widget(self, tree, widget: str) -> dict:
+        """
+        Подписи элементов с классом внутри всех экземпляров виджета на новой странице.
+
+        :return: Словарь {хеш пути: [элементы]}.
+        """
+        roots = tree.xpath("//*[@data-widget=$widget]", widget=widget) if widget else [tree]
+        by_path = defaultdict(list)
+
+        def walk(element, path):
+            for child in element:
+                if not isinstance(child.tag, str):
+                    continue
+                child_path = path + (child.tag,)
+                if child.get("class") is not None:
+                    by_path[hash(child_path)].append(child)
+                walk(child, child_path)
+
+        for root in roots:
+            walk(root, ())
+        return by_path
+
+    @staticmethod
+    def _new_class_value(class_value: str, old_classes: list, new_classes: list) -> str:
+        """
+        Новое значение class для конфига: вся строка классов, если в конфиге записана строка
+        из нескольких классов, иначе класс на той же позиции, что и старый.
+        """
+        if " " in class_value.strip():
+            return " ".join(new_classes)
+        if class_value in old_classes and len(old_classes) == len(new_classes):
+            return new_classes[old_classes.index(class_value)]
+        return " ".join(new_classes)
+
+    def detect(self, page) -> dict:
+        """
+        Находит классы конфига, которые на новой странице изменились.
+
+        :param page: HTML-код новой страницы или уже разобранное lxml-дерево.
+        :return: Словарь {старое значение class: (старые классы, новые классы)}.
+        """
+        tree = html.fromstring(page) if isinstance(page, str) else page
+
+        # Классы, которые по-прежнему встречаются на странице, не сопоставляются.
+        # Один проход по атрибутам class вместо отдельного XPath-поиска на каждый селектор
+        class_strings = {" ".join(value.split()) for value in set(tree.xpath("//@class"))}
+        class_tokens = set(" ".join(class_strings).split())
+        missing = [class_value for class_value in self.index
+                   if (" ".join(class_value.split()) not in class_strings if " " in class_value.strip()
+                       else class_value not in class_tokens)]
+        if not missing:
+            return {}
+
+        widget_indexes = {}
+        changes = {}
+        for class_value in missing:
+            signatures = self.index[class_value]
+            votes = Counter()
+            for widget, path, anchor, old_classes in signatures:
+                if widget not in widget_indexes:
+                    widget_indexes[widget] = self._index_widget(tree, widget)
+                candidates = widget_indexes[widget].get(path, [])
+                # Совпадение текста — самое надёжное; без него голосуют все элементы с тем же путём
+                anchored = [candidate for candidate in candidates if anchor and _anchor(candidate) == anchor]
+                for candidate in anchored or candidates:
+                    votes[self._new_class_value(class_value, old_classes, candidate.get("class").split())] += 1
+
+            if votes:
+                new_value = votes.most_common(1)[0][0]
+                if new_value and new_value != class_value:
+                    changes[class_value] = (class_value.split(), new_value.split())
+        return changes
@@ -1,6 +1,8 @@
 import json
+import os
 import re
 from lxml import html
+from htmlParser.configUpdater.classDriftDetector import ClassDriftDetector
 
 class HTMLConfigUpdater:
     def __init__(self, downloaded_html: str, template_html_file: str, config_file: str = "config.json"):
@@ -21,6 +23,17 @@ class HTMLConfigUpdater:
         with open(config_file, "r", encoding="utf-8") as f:
             self.config = json.load(f)
 
+        self._detector = None
+
+    @property
+    def detector(self) -> ClassDriftDetector:
+        """
+        Индекс шаблона строится один раз и переиспользуется для всех проверяемых страниц.
+        """
+        if self._detector is None:
+            self._detector = ClassDriftDetector(self.template_html, self.config)
+        return self._detector
+
     def extract_xpath_to_class(self, html_content):
         """
         Извлекает соответствие {XPath: [список классов]} из HTML-кода
@@ -35,55 +48,65 @@ class HTMLConfigUpdater:
 
         return mapping
 
-    def find_class_changes(self):
-        """
-        Находит изменения классов в новой версии страницы
-        :return: словарь {XPath: (старые классы, новые классы)}
+    def find_class_changes(self, page=None):
         """
-        old_tree = self.extract_xpath_to_class(self.template_html)
-        new_tree = self.extract_xpath_to_class(self.downloaded_html)
+        Находит изменения классов из конфига в новой версии страницы.
+        Сравниваются только элементы, на которые ссылается конфиг (см. ClassDriftDetector),
+        поэтому вставка или удаление посторонних узлов не даёт ложных изменений.
 
-        changed_classes = {}
-
-        for xpath, old_classes in old_tree.items():
-            new_classes = new_tree.get(xpath, None)
-
-            # Если класс изменился, сохраняем
-            if new_classes is not None and old_classes != new_classes:
-                changed_classes[xpath] = (old_classes, new_classes)
-
-        return changed_classes
+        :param page: HTML-код или lxml-дерево страницы. None — downloaded_html.
+        :return: словарь {старое значение class: (старые классы, новые классы)}
+        """
+        return self.detector.detect(self.downloaded_html if page is None else page)
 
     def update_config(self):
         """
         Обновляет конфигурационный JSON, заменяя изменённые классы
         """
-        changes = self.find_class_changes()
-        updated = False  # Флаг, чтобы понять, были ли обновления
-
-        def update_class(obj):
-            """ Рекурсивно ищет class и обновляет его """
-            if isinstance(obj, dict):
-                for key, value in obj.items():
-                    if key == "class" and isinstance(value, str):
-                        for xpath, (old_classes, new_classes) in changes.items():
-                            old_class_str = " ".join(old_classes)
-                            if value == old_class_str:  # Если нашли совпадение
-                                obj[key] = " ".join(new_classes)
-                                print(f"Обновлено: {value} → {obj[key]}")
-                                nonlocal updated
-                                updated = True
-                    else:
-                        update_class(value)
-
-        # Обходим JSON и обновляем классы
-        update_class(self.config)
+        updated = apply_class_changes(self.config, self.find_class_changes())
+        for old_value, new_value in updated:
+            print(f"Обновлено: {old_value} → {new_value}")
 
         if updated:
             # Записываем обновленный конфиг
-            with open(self.config_file, "w", encoding="utf-8") as f:
-                json.dump(self.config, f, indent=4, ensure_ascii=False)
+            write_config(self.config, self.config_file)
             print(f"Конфиг {self.config_file} успешно обновлён!")
         else:
             print("Изменений не найдено.")
 
+
+def apply_class_changes(config: dict, changes: dict) -> list:
+    """
+    Заменяет в конфиге изменившиеся классы.
+
+    :param config: Содержимое config.json (изменяется на месте).
+    :param changes: Результат find_class_changes: {старое значение class: (старые классы, новые классы)}.
+    :return: Список пар (старое значение, новое значение) для каждого обновлённого селектора.
+    """
+    updated = []
+
+    def update_class(obj):
+        """ Рекурсивно ищет class и обновляет его """
+        if isinstance(obj, dict):
+            for key, value in obj.items():
+                if key == "class" and isinstance(value, str):
+                    if value in changes:  # Если нашли совпадение
+                        obj[key] = " ".join(changes[value][1])
+                        updated.append((value, obj[key]))
+                else:
+                    update_class(value)
+
+    # Обходим JSON и обновляем классы
+    update_class(config)
+    return updated
+
+
+def write_config(config: dict, config_file: str):
+    """
+    Атомарно записывает конфиг: процессы, читающие его через load_selector_config,
+    видят либо старую, либо новую версию целиком.
+    """
+    temp_path = config_file + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=4, ensure_ascii=False)
+    os.replace(temp_path, config_file)
@@ -1,24 +1,42 @@
 from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
+from htmlParser.listingPageParser import ListingPageParser
+from scraper.dedupIndex import ProductDedupIndex
 
 class HTMLMainPageLinksParser:
     def __init__(self, html_code: str, base_url: str = 'https://ozon.by'):
         self.html = html_code
-        self.soup = BeautifulSoup(html_code, "html.parser")
         self.base_url = base_url
+        self._soup = None
+
+    @property
+    def soup(self) -> BeautifulSoup:
+        # Дерево строится только по запросу: для поиска ссылок оно не нужно
+        if self._soup is None:
+            self._soup = BeautifulSoup(self.html, "html.parser")
+        return self._soup
 
     def get_product_links(self) -> list[str]:
-        product_links = set()
-        for a_tag in self.soup.find_all('a', href=True):
-            href = a_tag['href']
-            if '/product/' in href:
-                full_url = urljoin(self.base_url, href)
-                parsed_url = urlparse(full_url)
-                if 'ozon.by' in parsed_url.netloc:
-                    product_links.add(full_url)
-        return list(product_links)
+        # Канонические ссылки без параметров запроса, по одной на артикул, в порядке появления на странице
+        return ListingPageParser(self.html, self.base_url).get_product_links()
+
+    def save_links_to_txt(self, links: list[str], filename: str = 'product_links.txt',
+                          dedup_index: ProductDedupIndex = None) -> None:
+        """
+        Дописывает в файл ссылки на товары, которых ещё нет в файле (сравнение по артикулу).
+
+        :param links: Ссылки на товары.
+        :param filename: Файл со ссылками.
+        :param dedup_index: Общий индекс встреченных товаров (например, на весь обход).
+                            None — индекс строится по содержимому файла.
+        """
+        if dedup_index is None:
+            dedup_index = ProductDedupIndex()
+            try:
+                with open(filename, 'r', encoding='utf-8') as f:
+                    dedup_index.filter(f.read().splitlines())
+            except FileNotFoundError:
+                pass
 
-    def save_links_to_txt(self, links: list[str], filename: str = 'product_links.txt') -> None:
         with open(filename, 'a', encoding='utf-8') as f:
-            for link in links:
-                f.write(f"{link}\n")
\ No newline at end of file
+            for link in dedup_index.filter(links):
+                f.write(f"{link}\n")
@@ -1,34 +1,45 @@
 from bs4 import BeautifulSoup
+from htmlParser.lxmlProductParser import LXMLProductParser
+from htmlParser.productRecord import ProductRecord
+from htmlParser.streamingProductParser import StreamingProductParser
+from htmlParser.selectorConfig import DEFAULT_CONFIG_FILE, SelectorConfig, load_selector_config
+from logs.metrics import metrics
 
 class HTMLProductParser:
-    def __init__(self, html_code: str, product_name: str):
+    def __init__(self, html_code: str, product_name: str, selectors: SelectorConfig = None):
         self.html = html_code
         self.product_name = product_name
+        # Селекторы берутся из config.json и компилируются один раз на процесс
+        self.selectors = selectors or load_selector_config()
         self.soup = BeautifulSoup(html_code, "html.parser")
 
+    @metrics.timed("parse.title")
     def get_title(self) -> str:
-        title = self.soup.find("h1", class_="lz6_28 tsHeadline550Medium")
+        title = self.selectors.title.find(self.soup)
         return title.text.strip() if title else "Нет заголовка"
 
+    @metrics.timed("parse.price")
     def get_price(self) -> str:
-        price = self.soup.find("span", class_="lz_28 zl_28 lz4_28")
+        price = self.selectors.price.find(self.soup)
         return price.text.strip() if price else "Цена не найдена"
 
+    @metrics.timed("parse.description")
     def get_description(self) -> str:
-        desc = self.soup.find("div", class_="RA-a1")
+        desc = self.selectors.description.find(self.soup)
         return desc.text.strip() if desc else "Описание отсутствует"
 
+    @metrics.timed("parse.characteristics")
     def get_characteristics(self) -> dict:
         characteristics = {}
-        char_blocks = self.soup.select(".r4k_28")
+        char_blocks = self.selectors.characteristics_container.find_all(self.soup)
         for block in char_blocks:
             # Ищем все пары ключ-значение внутри блока
-            key_value_pairs = block.find_all("dl",class_="rk8_28")
+            key_value_pairs = self.selectors.characteristics_pair.find_all(block)
 
             for pair in key_value_pairs:
-                key_elem = pair.find("dt", class_="rk7_28")
+                key_elem = self.selectors.characteristics_key.find(pair)
 
-                value_elem = pair.find("dd", class_="r7k_28")
+                value_elem = self.selectors.characteristics_value.find(pair)
 
                 if key_elem and value_elem:
                     key = key_elem.text.strip()
@@ -36,30 +47,32 @@ class HTMLProductParser:
                     characteristics[key] = value
         return characteristics
 
+    @metrics.timed("parse.rating")
     def get_rating(self) -> dict:
-        rating_container = self.soup.select_one('div.sx7_31')
+        rating_container = self.selectors.rating_container.find(self.soup)
         if not rating_container:
             return {"error": "Рейтинг не найден"}
 
-        overall_rating = rating_container.find("span")
+        overall_rating = self.selectors.rating_value.find(rating_container)
         overall_rating = overall_rating.text.strip() if overall_rating else "Нет данных"
 
         return {
             "overall_rating": overall_rating,
         }
 
+    @metrics.timed("parse.reviews")
     def get_reviews(self) -> list:
         reviews = []
 
         # Находим все контейнеры с отзывами
-        reviews_containers = self.soup.find_all("div", class_="rt1_31")
+        reviews_containers = self.selectors.reviews_container.find_all(self.soup)
         for container in reviews_containers:
             # Убираем рекомендации
-            for recommendations in container.find_all("div", class_="jp7_25"):
+            for recommendations in self.selectors.recommendations.find_all(container):
                 recommendations.decompose()
 
             # Проверяем, есть ли в контейнере отзывы после удаления рекомендаций
-            review_blocks = container.find_all("div", class_="r2t_31")
+            review_blocks = self.selectors.review_block.find_all(container)
             if not review_blocks:
                 continue  # Пропускаем пустые контейнеры
 
@@ -67,26 +80,26 @@ class HTMLProductParser:
                 review = {}
 
                 # Имя пользователя
-                reviewer_tag = block.find("span", class_="p8u_31")
+                reviewer_tag = self.selectors.reviewer.find(block)
                 review["reviewer"] = reviewer_tag.get_text(strip=True) if reviewer_tag else "Неизвестный"
 
                 # Дата отзыва
-                date_tag = block.find("div", class_="x5p_31")
+                date_tag = self.selectors.review_date.find(block)
                 review["date"] = date_tag.get_text(strip=True) if date_tag else "Нет даты"
 
                 # Текст отзыва
-                comment_tag = block.find("span", class_="p7x_31")
+                comment_tag = self.selectors.review_comment.find(block)
                 review["comment"] = comment_tag.get_text(strip=True) if comment_tag else "Нет данных"
 
                 # Рейтинг (количество звезд)
                 review["rating"] = self.extract_rating(block)
 
                 # Дополнительные данные (например, цвет товара)
-                product_color_tag = block.find("a", class_="y3p_31")
+                product_color_tag = self.selectors.review_product_color.find(block)
                 review["product_color"] = product_color_tag.get_text(strip=True) if product_color_tag else "Нет данных"
 
                 # Изображения или видео (если есть)
-                media_links = [media.get("src", "") for media in block.find_all("img", class_="pw4_31 b933-a")]
+                media_links = [media.get("src", "") for media in self.selectors.review_media.find_all(block)]
 
                 review["media"] = media_links
 
@@ -95,11 +108,11 @@ class HTMLProductParser:
         return reviews
 
     def extract_rating(self, block) -> int:
-        rating_block = block.find("div", class_="a5d25-a a5d25-a0")
+        rating_block = self.selectors.review_rating.find(block)
         if not rating_block:
             return 0
 
-        active_stars = rating_block.find_all("svg", style=lambda s: s and "rgb(255, 165, 0)" in s)
+        active_stars = self.selectors.review_active_star.find_all(rating_block)
         return len(active_stars)
 
     def get_product_data(self) -> dict:
@@ -123,4 +136,38 @@ class HTMLProductParser:
         return self.soup.get_text(separator=" ", strip=True)
 
     def find_by_selector(self, selector: str):
-        return self.soup.select(selector)
\ No newline at end of file
+        return self.soup.select(selector)
+
+
+# Версия логики извлечения полей. Увеличивается при изменениях, после которых
+# сохранённые страницы нужно перепарсить (см. BatchReparser)
+PARSER_VERSION = 1
+
+# Доступные реализации парсера страницы товара; результат get_product_data у них одинаковый
+PARSER_BACKENDS = {
+    "bs4": HTMLProductParser,
+    "lxml": LXMLProductParser,
+    "stream": StreamingProductParser,
+}
+
+
+def parse_product_html(html_code: str, product_name: str, backend: str = "lxml", config_file: str = None,
+                       as_record: bool = False):
+    """
+    Парсит HTML-код страницы товара. Функция вынесена на уровень модуля,
+    чтобы её можно было выполнять в ProcessPoolExecutor.
+
+    :param html_code: HTML-код страницы товара.
+    :param product_name: Название товара из URL.
+    :param backend: Реализация парсера: "bs4", "lxml" или "stream".
+    :param config_file: Путь к конфигу селекторов. None — конфиг по умолчанию.
+    :param as_record: Вернуть ProductRecord вместо словаря (компактнее в памяти, поля типизированы).
+    :return: Словарь с данными о товаре или ProductRecord; для пустой страницы — {} или None.
+    """
+    if not html_code:
+        return None if as_record else {}
+    selectors = load_selector_config(config_file or DEFAULT_CONFIG_FILE)
+    with metrics.timer("parse.document"):
+        parser = PARSER_BACKENDS[backend](html_code, product_name, selectors)
+    product_data = parser.get_product_data()
+    return ProductRecord.from_product_data(product_data) if as_record else product_data
@@ -0,0 +1,113 @@
+import html as html_lib
+import re
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse
+from scraper.productUrl import BASE_URL, parse_product_url
+
+# Значение href у тегов <a>. Регулярное выражение вместо построения дерева: на странице
+# каталога (~1 МБ) нужны только ссылки, а полный разбор BeautifulSoup занимает сотни миллисекунд
+ANCHOR_HREF_PATTERN = re.compile(r"""<a\s[^>]*?\bhref\s*=\s*(?:"([^"]*)"|'([^']*)')""", re.IGNORECASE)
+# Токен следующей страницы бесконечной прокрутки в состоянии страницы: "nextPage":"/category/...?page=2..."
+NEXT_PAGE_PATTERN = re.compile(r'nextPage(?:&quot;|"):(?:&quot;|")(.*?)(?:&quot;|")')
+UNICODE_ESCAPE_PATTERN = re.compile(r"\\u([0-9a-fA-F]{4})")
+
+# Разделы сайта со списками товаров
+LISTING_SEGMENTS = ("category", "search", "highlight", "brand", "seller")
+# Параметры запроса, от которых зависит содержимое списка; остальные (__rr, at, layout_* и т.д.) отбрасываются
+LISTING_PARAMS = ("text", "category", "sorting", "page")
+
+
+def listing_key(url: str, base_url: str = BASE_URL):
+    """
+    Ключ страницы списка для исключения дубликатов: путь и значимые параметры запроса.
+
+    :return: Строка вида "ozon.by/category/elektronika-15500/?page=2" или None, если это не страница списка.
+    """
+    parsed = urlparse(urljoin(base_url, url))
+    segments = [segment for segment in parsed.path.split("/") if segment]
+    if not segments or segments[0] not in LISTING_SEGMENTS:
+        return None
+    params = {name: value for name, value in parse_qsl(parsed.query) if name in LISTING_PARAMS}
+    if params.get("page") == "1":
+        del params["page"]
+    query = urlencode(sorted(params.items()))
+    return f"{parsed.netloc.lower()}{parsed.path}" + (f"?{query}" if query else "")
+
+
+def page_number(url: str) -> int:
+    """
+    Номер страницы списка из параметра page (1, если параметра нет).
+    """
+    value = dict(parse_qsl(urlparse(url).query)).get("page", "1")
+    return int(value) if value.isdigit() else 1
+
+
+class ListingPageParser:
+    def __init__(self, html_code: str, base_url: str = BASE_URL):
+        """
+        Быстрое извлечение ссылок со страницы каталога, поиска или главной страницы без построения дерева.
+
+        :param html_code: HTML-код страницы.
+        :param base_url: Адрес страницы или сайта для относительных ссылок.
+        """
+        self.html = html_code
+        self.base_url = base_url
+        # Ссылки на другие сайты (am.ozon.com и т.д.) отбрасываются
+        self.host = urlparse(urljoin(BASE_URL, base_url)).netloc
+        self._hrefs = None
+
+    def hrefs(self) -> list:
+        """
+        Значения href всех тегов <a> в порядке появления (с раскодированными HTML-сущностями).
+        """
+        if self._hrefs is None:
+            self._hrefs = [html_lib.unescape(double if double is not None else single)
+                           for double, single in ANCHOR_HREF_PATTERN.findall(self.html)]
+        return self._hrefs
+
+    def get_product_links(self) -> list:
+        """
+        Канонические ссылки на товары сайта, по одной на артикул, в порядке появления на странице.
+        """
+        product_links = {}
+        for href in self.hrefs():
+            if "/product/" not in href:
+                continue
+            product_url = parse_product_url(href, self.base_url)
+            if product_url and self.host in urlparse(product_url.url).netloc:
+                product_links.setdefault(product_url.sku, product_url.url)
+        return list(product_links.values())
+
+    def get_listing_links(self) -> list:
+        """
+        Ссылки на другие страницы списков сайта (категории, поиск, подборки, бренды), без дубликатов.
+        """
+        listing_links = {}
+        for href in self.hrefs():
+            url = urljoin(self.base_url, href)
+            if self.host not in urlparse(url).netloc:
+                continue
+            key = listing_key(url)
+            if key:
+                listing_links.setdefault(key, url)
+        return list(listing_links.values())
+
+    def get_next_page(self):
+        """
+        Ссылка на следующую страницу списка: токен бесконечной прокрутки (nextPage),
+        а если его нет — ссылка пагинатора на страницу с номером на единицу больше.
+
+        :return: Абсолютная ссылка или None.
+        """
+        match = NEXT_PAGE_PATTERN.search(self.html)
+        if match:
+            token = UNICODE_ESCAPE_PATTERN.sub(lambda escape: chr(int(escape.group(1), 16)),
+                                               html_lib.unescape(match.group(1)))
+            return urljoin(self.base_url, token)
+
+        current_path = urlparse(urljoin(BASE_URL, self.base_url)).path
+        next_number = page_number(self.base_url) + 1
+        for href in self.hrefs():
+            url = urljoin(self.base_url, href)
+            if urlparse(url).path == current_path and page_number(url) == next_number:
+                return url
+        return None
@@ -0,0 +1,157 @@
+from lxml import html as lxml_html
+from htmlParser.selectorConfig import SelectorConfig, load_selector_config
+from logs.metrics import metrics
+
+
+# Строки внутри этих тегов BeautifulSoup не включает в Tag.text
+NON_TEXT_TAGS = {"script", "style", "template", "rt", "rp"}
+
+
+def _strings(element, skip_special: bool = True):
+    """
+    Обходит строки элемента в порядке документа, как BeautifulSoup.
+
+    :param element: Элемент lxml.
+    :param skip_special: Пропускать комментарии и содержимое script/style/template
+                         (как Tag.text). Если False — отдаются все строки (как find_all(string=True)).
+    """
+    if not isinstance(element.tag, str):
+        # Комментарий или инструкция обработки
+        if not skip_special:
+            yield element.text or ""
+        return
+
+    if skip_special and element.tag in NON_TEXT_TAGS:
+        return
+    if element.text:
+        yield element.text
+    for child in element:
+        yield from _strings(child, skip_special)
+        if child.tail:
+            yield child.tail
+
+
+def _text(element) -> str:
+    """
+    Аналог Tag.text из BeautifulSoup.
+    """
+    return "".join(_strings(element))
+
+
+def _stripped_text(element) -> str:
+    """
+    Аналог Tag.get_text(strip=True) из BeautifulSoup.
+    """
+    return "".join(text.strip() for text in _strings(element) if text.strip())
+
+
+def _decompose(element):
+    """
+    Аналог Tag.decompose из BeautifulSoup: убирает содержимое и атрибуты элемента, а текст
+    после него (tail) оставляет отдельной строкой, как у соседней NavigableString
+    (get_text(strip=True) обрезает пробелы у каждой строки по отдельности).
+    """
+    element.clear(keep_tail=True)
+
+
+class LXMLProductParser:
+    def __init__(self, html_code: str, product_name: str, selectors: SelectorConfig = None):
+        """
+        Парсер страницы товара на lxml: документ разбирается один раз,
+        поля извлекаются заранее скомпилированными XPath-выражениями.
+        Результат get_product_data совпадает с HTMLProductParser.
+
+        :param html_code: HTML-код страницы товара.
+        :param product_name: Название товара из URL.
+        :param selectors: Скомпилированные селекторы. None — из config.json по умолчанию.
+        """
+        self.html = html_code
+        self.product_name = product_name
+        self.selectors = selectors or load_selector_config()
+        self.tree = lxml_html.fromstring(html_code)
+
+    @metrics.timed("parse.title")
+    def get_title(self) -> str:
+        title = self.selectors.title.first(self.tree)
+        return _text(title).strip() if title is not None else "Нет заголовка"
+
+    @metrics.timed("parse.price")
+    def get_price(self) -> str:
+        price = self.selectors.price.first(self.tree)
+        return _text(price).strip() if price is not None else "Цена не найдена"
+
+    @metrics.timed("parse.description")
+    def get_description(self) -> str:
+        desc = self.selectors.description.first(self.tree)
+        return _text(desc).strip() if desc is not None else "Описание отсутствует"
+
+    @metrics.timed("parse.characteristics")
+    def get_characteristics(self) -> dict:
+        characteristics = {}
+        for block in self.selectors.characteristics_container.all(self.tree):
+            for pair in self.selectors.characteristics_pair.all(block):
+                key_elem = self.selectors.characteristics_key.first(pair)
+                value_elem = self.selectors.characteristics_value.first(pair)
+
+                if key_elem is not None and value_elem is not None:
+                    key = _text(key_elem).strip()
+                    value = " ".join([text.strip() for text in _strings(value_elem, skip_special=False)])
+                    characteristics[key] = value
+        return characteristics
+
+    @metrics.timed("parse.rating")
+    def get_rating(self) -> dict:
+        rating_container = self.selectors.rating_container.first(self.tree)
+        if rating_container is None:
+            return {"error": "Рейтинг не найден"}
+
+        overall_rating = self.selectors.rating_value.first(rating_container)
+        overall_rating = _text(overall_rating).strip() if overall_rating is not None else "Нет данных"
+
+        return {
+            "overall_rating": overall_rating,
+        }
+
+    @metrics.timed("parse.reviews")
+    def get_reviews(self) -> list:
+        reviews = []
+
+        for container in self.selectors.reviews_container.all(self.tree):
+            # Убираем рекомендации так же, как HTMLProductParser: вместе с отзывами внутри,
+            # но без текста, который идёт после карусели
+            for recommendations in self.selectors.recommendations.all(container):
+                _decompose(recommendations)
+
+            for block in self.selectors.review_block.all(container):
+                reviewer_tag = self.selectors.reviewer.first(block)
+                date_tag = self.selectors.review_date.first(block)
+                comment_tag = self.selectors.review_comment.first(block)
+                product_color_tag = self.selectors.review_product_color.first(block)
+
+                reviews.append({
+                    "reviewer": _stripped_text(reviewer_tag) if reviewer_tag is not None else "Неизвестный",
+                    "date": _stripped_text(date_tag) if date_tag is not None else "Нет даты",
+                    "comment": _stripped_text(comment_tag) if comment_tag is not None else "Нет данных",
+                    "rating": self.extract_rating(block),
+                    "product_color": _stripped_text(product_color_tag) if product_color_tag is not None else "Нет данных",
+                    "media": [media.get("src", "") for media in self.selectors.review_media.all(block)],
+                })
+
+        return reviews
+
+    def extract_rating(self, block) -> int:
+        rating_block = self.selectors.review_rating.first(block)
+        if rating_block is None:
+            return 0
+        return len(self.selectors.review_active_star.all(rating_block))
+
+    def get_product_data(self) -> dict:
+        return {
+            "Название": self.get_title(),
+            "Цена": self.get_price().replace('\u2009', ' '),
+            "Описание": self.get_description(),
+            "Характеристики": self.get_characteristics(),
+            "Оценка": self.get_rating(),
+            "Отзывы": self.get_reviews(),
+            "URL товара": "https://ozon.by/product/" + self.product_name + "/"
+        }
@@ -0,0 +1,307 @@
+import json
+import re
+import sys
+from dataclasses import dataclass, field
+from typing import Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Заглушки, которые парсеры подставляют вместо ненайденных значений; в записях вместо них None
+NO_TITLE = "Нет заголовка"
+NO_PRICE = "Цена не найдена"
+NO_DESCRIPTION = "Описание отсутствует"
+NO_RATING = "Рейтинг не найден"
+NO_DATA = "Нет данных"
+NO_REVIEWER = "Неизвестный"
+NO_DATE = "Нет даты"
+
+# Валюта в тексте цены -> (код ISO 4217, знаков в дробной части)
+CURRENCIES = {
+    "BYN": ("BYN", 2),
+    "₽": ("RUB", 0),
+    "руб.": ("RUB", 0),
+    "₸": ("KZT", 0),
+    "сум": ("UZS", 0),
+    "$": ("USD", 2),
+    "€": ("EUR", 2),
+}
+# Код валюты -> (обозначение в тексте цены, знаков в дробной части)
+CURRENCY_DISPLAY = {code: (symbol, exponent) for symbol, (code, exponent) in reversed(list(CURRENCIES.items()))}
+
+# "1 299,50 BYN": целая часть с разделителями разрядов, необязательная дробная часть, валюта
+PRICE_PATTERN = re.compile(r"^(\d[\d \u00a0\u2009]*)(?:[,.](\d{1,2}))?\s*(\S.*)?$")
+RATING_PATTERN = re.compile(r"\d+(?:[.,]\d+)?")
+# Дата отзыва: "21 марта 2025"
+DATE_PATTERN = re.compile(r"^(\d{1,2}) ([а-я]+) (\d{4})$")
+MONTHS = ("января", "февраля", "марта", "апреля", "мая", "июня",
+          "июля", "августа", "сентября", "октября", "ноября", "декабря")
+MONTH_NUMBERS = {name: number for number, name in enumerate(MONTHS, start=1)}
+ISO_DATE_PATTERN = re.compile(r"^(\d{4})-(\d{2})-(\d{2})$")
+
+
+def _value(text, sentinel: str):
+    return None if text is None or text == sentinel else text
+
+
+def parse_price(text):
+    """
+    Разбирает цену из текста страницы.
+
+    :param text: Текст цены, например "1 299,50 BYN".
+    :return: Пара (сумма в минимальных единицах валюты, код валюты) или None, если цену не удалось разобрать.
+    """
+    match = PRICE_PATTERN.match(text.strip()) if text else None
+    if not match:
+        return None
+    integer, fraction, symbol = match.groups()
+    currency, exponent = CURRENCIES.get(symbol, (symbol, len(fraction) if fraction else 0))
+    fraction = (fraction or "").ljust(exponent, "0")[:exponent]
+    return int(re.sub(r"\D", "", integer) + fraction), currency
+
+
+def format_price(amount: int, currency: str) -> str:
+    """
+    Текст цены в том виде, в каком его возвращает парсер: "1 299,50 BYN".
+    """
+    symbol, exponent = CURRENCY_DISPLAY.get(currency, (currency, 2))
+    integer, fraction = divmod(amount, 10 ** exponent)
+    text = f"{integer:,}".replace(",", " ")
+    if exponent:
+        text += f",{fraction:0{exponent}d}"
+    return f"{text} {symbol}" if symbol else text
+
+
+def parse_rating(text):
+    """
+    Оценка товара из текста "4.5 / 5" или None.
+    """
+    match = RATING_PATTERN.search(text) if text else None
+    return float(match.group().replace(",", ".")) if match else None
+
+
+def parse_review_date(text):
+    """
+    Дата отзыва в формате ISO 8601 ("2025-03-21"). Даты в другом виде ("вчера", без года)
+    возвращаются как есть, чтобы не терять данные.
+    """
+    text = _value(_value(text, NO_DATE), "")
+    match = DATE_PATTERN.match(text) if text else None
+    if not match or match.group(2) not in MONTH_NUMBERS:
+        return text
+    day, month, year = match.groups()
+    return f"{year}-{MONTH_NUMBERS[month]:02d}-{int(day):02d}"
+
+
+def format_review_date(date) -> str:
+    """
+    Дата отзыва в виде, как на странице: "21 марта 2025".
+    """
+    match = ISO_DATE_PATTERN.match(date) if date else None
+    if not match:
+        return date or NO_DATE
+    year, month, day = match.groups()
+    return f"{int(day)} {MONTHS[int(month) - 1]} {year}"
+
+
+@dataclass(slots=True)
+class ReviewRecord:
+    """
+    Отзыв на странице товара. Ненайденные значения — None. raw_date — исходный текст даты,
+    если его нельзя точно восстановить из date (например, "05 марта 2025"), иначе None.
+    """
+    reviewer: Optional[str] = None
+    date: Optional[str] = None
+    comment: Optional[str] = None
+    rating: Optional[int] = None
+    product_color: Optional[str] = None
+    media: tuple = ()
+    raw_date: Optional[str] = None
+
+    def __reduce__(self):
+        return self.__class__, (self.reviewer, self.date, self.comment, self.rating, self.product_color, self.media,
+                                self.raw_date)
+
+    @classmethod
+    def from_dict(cls, review: dict) -> "ReviewRecord":
+        """
+        Запись из словаря в формате get_reviews.
+        """
+        date_text = review.get("date")
+        date = parse_review_date(date_text)
+        return cls(
+            reviewer=_value(review.get("reviewer"), NO_REVIEWER),
+            date=date,
+            comment=_value(review.get("comment"), NO_DATA),
+            rating=review.get("rating") or None,
+            product_color=_value(review.get("product_color"), NO_DATA),
+            media=tuple(review.get("media", ())),
+            raw_date=date_text if date_text is not None and format_review_date(date) != date_text else None,
+        )
+
+    def to_dict(self) -> dict:
+        """
+        Словарь в прежнем формате get_reviews (с заглушками).
+        """
+        return {
+            "reviewer": NO_REVIEWER if self.reviewer is None else self.reviewer,
+            "date": format_review_date(self.date) if self.raw_date is None else self.raw_date,
+            "comment": NO_DATA if self.comment is None else self.comment,
+            "rating": self.rating or 0,
+            "product_color": NO_DATA if self.product_color is None else self.product_color,
+            "media": list(self.media),
+        }
+
+
+@dataclass(slots=True)
+class ProductRecord:
+    """
+    Компактная запись о товаре с типизированными полями: цена в минимальных единицах валюты
+    (копейках) и код валюты, оценка — число, даты отзывов — ISO 8601, ненайденные значения — None.
+    Названия характеристик интернируются: одинаковые ключи у тысяч товаров хранятся в одном экземпляре.
+    to_dict() возвращает прежний словарь get_product_data для существующих потребителей без потерь:
+    если текст цены или оценки не восстанавливается из типизированных полей в точности (цена
+    без распознаваемого формата, неразрывные пробелы, "5.0 / 5", "Нет данных"), он хранится
+    в raw_price или raw_rating; в остальных случаях эти поля — None и память не занимают.
+    """
+    url: str
+    title: Optional[str] = None
+    price: Optional[int] = None
+    currency: Optional[str] = None
+    description: Optional[str] = None
+    characteristics: dict = field(default_factory=dict)
+    rating: Optional[float] = None
+    reviews: list = field(default_factory=list)
+    raw_price: Optional[str] = None
+    raw_rating: Optional[str] = None
+
+    def __post_init__(self):
+        self.characteristics = {sys.intern(key): value for key, value in self.characteristics.items()}
+
+    def __reduce__(self):
+        # При передаче из процесса парсинга ключи характеристик интернируются заново (через __post_init__)
+        return self.__class__, (self.url, self.title, self.price, self.currency, self.description,
+                                self.characteristics, self.rating, self.reviews, self.raw_price, self.raw_rating)
+
+    @classmethod
+    def from_product_data(cls, product_data: dict) -> "ProductRecord":
+        """
+        Запись из словаря get_product_data.
+        """
+        price_text = product_data.get("Цена")
+        price = parse_price(_value(price_text, NO_PRICE))
+        rating = product_data.get("Оценка", {})
+        record = cls(
+            url=product_data.get("URL товара", ""),
+            title=_value(product_data.get("Название"), NO_TITLE),
+            price=price[0] if price else None,
+            currency=price[1] if price else None,
+            description=_value(product_data.get("Описание"), NO_DESCRIPTION),
+            characteristics=product_data.get("Характеристики", {}),
+            rating=parse_rating(rating.get("overall_rating")),
+            reviews=[ReviewRecord.from_dict(review) for review in product_data.get("Отзывы", [])],
+        )
+        # Исходный текст сохраняется, только если to_dict не вернул бы его в точности
+        if price_text is not None and record.price_text != price_text:
+            record.raw_price = price_text
+        if "overall_rating" in rating and record._rating_dict() != rating:
+            record.raw_rating = rating["overall_rating"]
+        return record
+
+    @classmethod
+    def from_json_dict(cls, data: dict) -> "ProductRecord":
+        """
+        Запись из словаря to_json_dict (например, прочитанного из файла).
+        """
+        reviews = [ReviewRecord(**{**review, "media": tuple(review.get("media", ()))})
+                   for review in data.get("reviews", [])]
+        return cls(**{**data, "reviews": reviews})
+
+    @property
+    def price_text(self) -> str:
+        """
+        Цена в виде, как на странице ("98,71 BYN"), или заглушка, если цены нет.
+        """
+        if self.raw_price is not None:
+            return self.raw_price
+        return NO_PRICE if self.price is None else format_price(self.price, self.currency)
+
+    def _rating_dict(self) -> dict:
+        if self.raw_rating is not None:
+            return {"overall_rating": self.raw_rating}
+        return {"error": NO_RATING} if self.rating is None else {"overall_rating": f"{self.rating:g} / 5"}
+
+    def to_dict(self) -> dict:
+        """
+        Словарь в прежнем формате get_product_data (русские ключи, цена строкой, заглушки).
+        """
+        return {
+            "Название": NO_TITLE if self.title is None else self.title,
+            "Цена": self.price_text,
+            "Описание": NO_DESCRIPTION if self.description is None else self.description,
+            "Характеристики": dict(self.characteristics),
+            "Оценка": self._rating_dict(),
+            "Отзывы": [review.to_dict() for review in self.reviews],
+            "URL товара": self.url,
+        }
+
+    def to_json_dict(self) -> dict:
+        """
+        Типизированный словарь для сериализации (английские ключи, числа вместо строк).
+        """
+        return {
+            "url": self.url,
+            "title": self.title,
+            "price": self.price,
+            "currency": self.currency,
+            "description": self.description,
+            "characteristics": self.characteristics,
+            "rating": self.rating,
+            "reviews": [{"reviewer": review.reviewer, "date": review.date, "comment": review.comment,
+                         "rating": review.rating, "product_color": review.product_color,
+                         "media": list(review.media), "raw_date": review.raw_date}
+                        for review in self.reviews],
+            "raw_price": self.raw_price,
+            "raw_rating": self.raw_rating,
+        }
+
+
+def dumps(record: ProductRecord) -> bytes:
+    """
+    Компактный JSON записи (to_json_dict) в UTF-8. С orjson запись сериализуется напрямую, без промежуточного словаря.
+    """
+    if orjson is not None:
+        return orjson.dumps(record)
+    return json.dumps(record.to_json_dict(), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data) -> ProductRecord:
+    """
+    Запись из JSON, полученного dumps.
+    """
+    return ProductRecord.from_json_dict(orjson.loads(data) if orjson is not None else json.loads(data))
+
+
+def packb(record: ProductRecord) -> bytes:
+    """
+    Запись в формате MessagePack (нужен пакет msgpack).
+    """
+    if msgpack is None:
+        raise ImportError("Для записи в MessagePack нужен пакет msgpack")
+    return msgpack.packb(record.to_json_dict(), use_bin_type=True)
+
+
+def dumps_json(data) -> str:
+    """
+    Компактная JSON-строка произвольных данных: orjson, если он установлен, иначе json.
+    """
+    if orjson is not None:
+        return orjson.dumps(data).decode("utf-8")
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+import threading
+from lxml import etree
+
+# Конфиг, который обновляет HTMLConfigUpdater
+DEFAULT_CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "configUpdater", "config.json")
+
+
+def _class_predicate(class_value: str) -> str:
+    """
+    Условие XPath, повторяющее поиск BeautifulSoup по class_:
+    строка из нескольких классов сравнивается целиком, один класс ищется среди всех классов элемента.
+    """
+    if " " in class_value.strip():
+        return f"normalize-space(@class)='{' '.join(class_value.split())}'"
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_value} ')"
+
+
+class Selector:
+    def __init__(self, tag: str = None, class_value: str = None, style: str = None):
+        """
+        Скомпилированный селектор элемента из конфига.
+
+        :param tag: Имя тега. None — любой тег.
+        :param class_value: Значение атрибута class (как в BeautifulSoup class_).
+        :param style: Подстрока, которая должна встречаться в атрибуте style.
+        """
+        self.tag = tag
+        self.class_value = class_value
+        self.style = style
+
+        expression = f".//{tag or '*'}"
+        if class_value:
+            expression += f"[{_class_predicate(class_value)}]"
+        if style:
+            expression += f"[contains(@style, '{style}')]"
+        self.expression = expression
+
+        # XPath компилируется один раз и переиспользуется для всех страниц
+        self._xpath_all = etree.XPath(expression)
+        self._xpath_first = etree.XPath(f"({expression})[1]")
+        self._bs4_kwargs = {}
+        if class_value:
+            self._bs4_kwargs["class_"] = class_value
+        if style:
+            self._bs4_kwargs["style"] = lambda value: value and style in value
+
+        self._multi_class = bool(class_value) and " " in class_value.strip()
+        self._class_string = " ".join(class_value.split()) if class_value else None
+
+    @property
+    def css(self) -> str:
+        """
+        CSS-селектор для поиска элемента в браузере (например, в WebDriverWait).
+        """
+        css = self.tag or "*"
+        if self.class_value:
+            css += "".join(f".{class_name}" for class_name in self.class_value.split())
+        if self.style:
+            css += f'[style*="{self.style}"]'
+        return css
+
+    @classmethod
+    def from_config(cls, config: dict) -> "Selector":
+        return cls(config.get("tag"), config.get("class"), config.get("style"))
+
+    def matches(self, element) -> bool:
+        """
+        Проверяет сам lxml-элемент (без потомков). Используется при потоковом разборе,
+        где XPath по дереву ещё недоступен.
+        """
+        if self.tag and element.tag != self.tag:
+            return False
+        if self.class_value:
+            classes = element.get("class")
+            if classes is None:
+                return False
+            if self._multi_class:
+                if " ".join(classes.split()) != self._class_string:
+                    return False
+            elif self.class_value not in classes.split():
+                return False
+        if self.style and self.style not in (element.get("style") or ""):
+            return False
+        return True
+
+    def first(self, element):
+        """
+        Первый подходящий потомок lxml-элемента или None.
+        """
+        found = self._xpath_first(element)
+        return found[0] if found else None
+
+    def all(self, element) -> list:
+        """
+        Все подходящие потомки lxml-элемента в порядке документа.
+        """
+        return self._xpath_all(element)
+
+    def find(self, tag):
+        """
+        Первый подходящий потомок тега BeautifulSoup или None.
+        """
+        return tag.find(self.tag, **self._bs4_kwargs)
+
+    def find_all(self, tag) -> list:
+        """
+        Все подходящие потомки тега BeautifulSoup.
+        """
+        return tag.find_all(self.tag, **self._bs4_kwargs)
+
+
+class SelectorConfig:
+    def __init__(self, config: dict):
+        """
+        Набор скомпилированных селекторов страницы товара.
+
+        :param config: Содержимое config.json.
+        """
+        self.version = hashlib.sha1(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+        selectors = config["selectors"]
+
+        self.title = Selector.from_config(selectors["title"])
+        self.price = Selector.from_config(selectors["price"])
+        self.description = Selector.from_config(selectors["description"])
+
+        characteristics = selectors["characteristics"]
+        self.characteristics_container = Selector.from_config(characteristics["container"])
+        self.characteristics_pair = Selector.from_config(characteristics["key_value_pair"])
+        self.characteristics_key = Selector.from_config(characteristics["key"])
+        self.characteristics_value = Selector.from_config(characteristics["value"])
+
+        rating = selectors["rating"]
+        self.rating_container = Selector.from_config(rating["container"])
+        self.rating_value = Selector.from_config(rating["value"])
+
+        reviews = selectors["reviews"]
+        self.reviews_container = Selector.from_config(reviews["container"])
+        self.review_block = Selector.from_config(reviews["review_block"])
+        self.reviewer = Selector.from_config(reviews["reviewer"])
+        self.review_date = Selector.from_config(reviews["date"])
+        self.review_comment = Selector.from_config(reviews["comment"])
+        self.review_rating = Selector.from_config(reviews["rating"])
+        self.review_active_star = Selector.from_config(reviews["active_star"])
+        self.review_product_color = Selector.from_config(reviews["product_color"])
+        self.review_media = Selector.from_config(reviews["media"])
+        self.recommendations = Selector.from_config(reviews["recommendations"])
+
+    @classmethod
+    def from_file(cls, config_file: str) -> "SelectorConfig":
+        with open(config_file, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def load_selector_config(config_file: str = DEFAULT_CONFIG_FILE) -> SelectorConfig:
+    """
+    Возвращает скомпилированные селекторы из конфига. Селекторы компилируются
+    один раз на процесс и перекомпилируются только после изменения файла
+    (например, после HTMLConfigUpdater.update_config).
+
+    :param config_file: Путь к config.json.
+    :return: Объект SelectorConfig.
+    """
+    config_file = os.path.abspath(config_file)
+    stat = os.stat(config_file)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+
+    with _cache_lock:
+        cached = _cache.get(config_file)
+        if cached and cached[0] == stamp:
+            return cached[1]
+
+        selectors = SelectorConfig.from_file(config_file)
+        # Если содержимое не изменилось, оставляем уже скомпилированную версию
+        if cached and cached[1].version == selectors.version:
+            selectors = cached[1]
+        _cache[config_file] = (stamp, selectors)
+        return selectors
@@ -0,0 +1,101 @@
+from lxml import etree, html as lxml_html
+from htmlParser.lxmlProductParser import LXMLProductParser, _decompose
+from htmlParser.selectorConfig import SelectorConfig, load_selector_config
+
+# Размер порции HTML, которая за раз передаётся парсеру
+CHUNK_SIZE = 64 * 1024
+
+
+class StreamingProductParser(LXMLProductParser):
+    def __init__(self, html_code: str, product_name: str, selectors: SelectorConfig = None,
+                 stop_after_widget: str = "webReviewTabs"):
+        """
+        Потоковый парсер страницы товара. HTML разбирается порциями, в памяти остаются
+        только фрагменты, которые нужны селекторам (заголовок, цена, описание,
+        характеристики, рейтинг, отзывы). Остальные элементы, включая script/style
+        и карусели рекомендаций внутри отзывов, очищаются сразу после закрытия.
+        Извлечение полей такое же, как в LXMLProductParser.
+
+        :param html_code: HTML-код страницы товара.
+        :param product_name: Название товара из URL.
+        :param selectors: Скомпилированные селекторы. None — из config.json по умолчанию.
+        :param stop_after_widget: Значение data-widget, после закрытия которого разбор
+                                  прекращается, если все секции уже найдены. None — читать до конца.
+        """
+        self.html = html_code
+        self.product_name = product_name
+        self.selectors = selectors or load_selector_config()
+        self.stop_after_widget = stop_after_widget
+        self.tree = self._parse_sections(html_code)
+
+    def _section_selectors(self) -> dict:
+        return {
+            "title": self.selectors.title,
+            "price": self.selectors.price,
+            "description": self.selectors.description,
+            "characteristics": self.selectors.characteristics_container,
+            "rating": self.selectors.rating_container,
+            "reviews": self.selectors.reviews_container,
+        }
+
+    def _parse_sections(self, html_code: str):
+        """
+        Разбирает HTML и возвращает элемент, в который перенесены найденные секции
+        в порядке документа.
+        """
+        sections = self._section_selectors()
+        found = set()
+        fragments = lxml_html.Element("div")
+
+        parser = etree.HTMLPullParser(events=("start", "end"))
+        # Для каждого открытого элемента: имя секции, если это её корень, "inside" внутри секции или None
+        stack = []
+        # Секция, внутри которой сейчас находится парсер
+        current_section = None
+
+        for offset in range(0, len(html_code), CHUNK_SIZE):
+            parser.feed(html_code[offset:offset + CHUNK_SIZE])
+
+            for event, element in parser.read_events():
+                if event == "start":
+                    if current_section:
+                        stack.append("inside")
+                        continue
+                    kind = None
+                    for name, selector in sections.items():
+                        if selector.matches(element):
+                            kind = name
+                            break
+                    stack.append(kind)
+                    current_section = kind
+                    continue
+
+                kind = stack.pop()
+                if kind == "inside":
+                    # Карусели рекомендаций внутри отзывов парсер всё равно пропускает; текст после
+                    # карусели (tail) остаётся, как после decompose в BeautifulSoup
+                    if current_section == "reviews" and self.selectors.recommendations.matches(element):
+                        _decompose(element)
+                    continue
+
+                if kind:
+                    # Секция закрыта целиком: переносим её из документа
+                    current_section = None
+                    found.add(kind)
+                    fragments.append(element)
+                    continue
+
+                widget = element.get("data-widget")
+                # Элемент вне секций больше не нужен: освобождаем его и уже закрытых соседей
+                element.clear(keep_tail=True)
+                parent = element.getparent()
+                if parent is not None:
+                    while element.getprevious() is not None:
+                        del parent[0]
+
+                if (self.stop_after_widget and widget == self.stop_after_widget
+                        and len(found) == len(sections)):
+                    return fragments
+
+        parser.close()
+        return fragments
@@ -0,0 +1,228 @@
+import hashlib
+import lzma
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from scraper.productUrl import product_name_from_url
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Кодеки сжатия: zstd, если установлен zstandard, иначе lzma из стандартной библиотеки (~10x на страницах Ozon)
+DEFAULT_CODEC = "zstd" if zstandard else "lzma"
+# Уровни сжатия по умолчанию. Страницы сжимаются в потоках загрузки, поэтому уровни умеренные:
+# максимальные (zstd 19, lzma 6) тратят десятки-сотни мс CPU на страницу ради нескольких процентов размера
+DEFAULT_LEVELS = {"zstd": 3, "lzma": 2, "gzip": 6}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    codec TEXT NOT NULL,
+    raw_size INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    slug TEXT NOT NULL,
+    url TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    hash TEXT NOT NULL REFERENCES blobs(hash)
+);
+CREATE INDEX IF NOT EXISTS pages_slug ON pages (slug, fetched_at);
+CREATE INDEX IF NOT EXISTS pages_fetched_at ON pages (fetched_at);
+"""
+
+
+def _compress(data: bytes, codec: str, level: int = None) -> bytes:
+    level = DEFAULT_LEVELS.get(codec) if level is None else level
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    if codec == "lzma":
+        return lzma.compress(data, preset=level)
+    if codec == "gzip":
+        return zlib.compress(data, level)
+    raise ValueError(f"Неизвестный кодек: {codec}")
+
+
+def _decompressor(codec: str):
+    """
+    Потоковый распаковщик для кодека: объект с методом decompress(chunk).
+    """
+    if codec == "zstd":
+        return zstandard.ZstdDecompressor().decompressobj()
+    if codec == "lzma":
+        return lzma.LZMADecompressor()
+    if codec == "gzip":
+        return zlib.decompressobj()
+    raise ValueError(f"Неизвестный кодек: {codec}")
+
+
+class RawPageStore:
+    def __init__(self, db_path: str = "htmldata/pages.sqlite", codec: str = DEFAULT_CODEC, level: int = None):
+        """
+        Архив скачанных HTML-страниц в SQLite. Одинаковые страницы хранятся один раз
+        (ключ — SHA-256 содержимого), содержимое сжато. Для каждой загрузки
+        сохраняется запись со slug товара, URL и временем загрузки.
+
+        :param db_path: Путь к файлу базы.
+        :param codec: Кодек сжатия новых страниц: "zstd", "lzma" или "gzip".
+        :param level: Уровень сжатия (zstd 1–22, lzma 0–9, gzip 1–9). None — умеренный уровень
+                      из DEFAULT_LEVELS: страницы сжимаются прямо в потоках загрузки.
+        """
+        if codec == "zstd" and zstandard is None:
+            raise ImportError("Для кодека zstd нужен пакет zstandard")
+
+        self.db_path = db_path
+        self.codec = codec
+        self.level = level
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        # Чтение страниц через отображение файла в память
+        self._connection.execute("PRAGMA mmap_size=268435456")
+        self._connection.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def put(self, url: str, html: str, fetched_at: float = None) -> str:
+        """
+        Сохраняет страницу в архив.
+
+        :param url: URL страницы товара.
+        :param html: HTML-код страницы.
+        :param fetched_at: Время загрузки (unix time). None — текущее.
+        :return: Хеш содержимого.
+        """
+        data = html.encode("utf-8")
+        content_hash = hashlib.sha256(data).hexdigest()
+
+        with self._lock:
+            exists = self._connection.execute("SELECT 1 FROM blobs WHERE hash = ?", (content_hash,)).fetchone()
+        # Сжатие выполняется вне блокировки, чтобы потоки не ждали друг друга
+        compressed = None if exists else _compress(data, self.codec, self.level)
+
+        with self._lock, self._connection:
+            if compressed is not None:
+                self._connection.execute(
+                    "INSERT OR IGNORE INTO blobs (hash, codec, raw_size, data) VALUES (?, ?, ?, ?)",
+                    (content_hash, self.codec, len(data), compressed))
+            self._connection.execute(
+                "INSERT INTO pages (slug, url, fetched_at, hash) VALUES (?, ?, ?, ?)",
+                (product_name_from_url(url), url, fetched_at or time.time(), content_hash))
+        return content_hash
+
+    def iter_chunks(self, content_hash: str, chunk_size: int = 256 * 1024):
+        """
+        Потоково читает и распаковывает страницу, не загружая сжатые данные целиком.
+
+        :param content_hash: Хеш содержимого.
+        :return: Генератор байтовых фрагментов HTML.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT rowid, codec FROM blobs WHERE hash = ?", (content_hash,)).fetchone()
+        if row is None:
+            raise KeyError(content_hash)
+
+        rowid, codec = row
+        decompressor = _decompressor(codec)
+        offset = 0
+        while True:
+            with self._lock:
+                if hasattr(self._connection, "blobopen"):
+                    with self._connection.blobopen("blobs", "data", rowid, readonly=True) as blob:
+                        blob.seek(offset)
+                        chunk = blob.read(chunk_size)
+                else:
+                    chunk = self._connection.execute(
+                        "SELECT substr(data, ?, ?) FROM blobs WHERE rowid = ?",
+                        (offset + 1, chunk_size, rowid)).fetchone()[0]
+            if not chunk:
+                return
+            offset += len(chunk)
+            yield decompressor.decompress(chunk)
+
+    def get_by_hash(self, content_hash: str) -> str:
+        """
+        Возвращает HTML-код страницы по хешу содержимого.
+        """
+        return b"".join(self.iter_chunks(content_hash)).decode("utf-8")
+
+    def get(self, slug: str, before: float = None):
+        """
+        Возвращает последнюю сохранённую версию страницы товара.
+
+        :param slug: Название товара из URL (например, krossovki-lexsan-1585614406).
+        :param before: Взять последнюю версию, загруженную не позже этого времени.
+        :return: HTML-код страницы или None, если товара нет в архиве.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT hash FROM pages WHERE slug = ? AND fetched_at <= ? ORDER BY fetched_at DESC LIMIT 1",
+                (slug, before if before is not None else float("inf"))).fetchone()
+        return self.get_by_hash(row[0]) if row else None
+
+    def iter_latest(self, since: float = None):
+        """
+        Обходит последние версии всех страниц архива, не загружая их все в память.
+
+        :param since: Только страницы, загруженные после этого времени.
+        :return: Генератор кортежей (slug, url, fetched_at, hash).
+        """
+        query = ("SELECT slug, url, MAX(fetched_at), hash FROM pages WHERE fetched_at > ? "
+                 "GROUP BY slug ORDER BY slug")
+        with self._lock:
+            rows = self._connection.execute(query, (since or 0,)).fetchall()
+        yield from rows
+
+    def import_directory(self, directory: str, base_url: str = "https://ozon.by/product/") -> int:
+        """
+        Переносит в архив разрозненные .html-файлы из папки.
+
+        :param directory: Папка с файлами <slug>.html.
+        :param base_url: Префикс URL товара.
+        :return: Количество импортированных файлов.
+        """
+        imported = 0
+        for file_name in sorted(os.listdir(directory)):
+            if not file_name.endswith(".html"):
+                continue
+            file_path = os.path.join(directory, file_name)
+            with open(file_path, "r", encoding="utf-8") as file:
+                html = file.read()
+            slug = file_name[:-len(".html")]
+            self.put(f"{base_url}{slug}/", html, fetched_at=os.path.getmtime(file_path))
+            imported += 1
+        return imported
+
+    def stats(self) -> dict:
+        """
+        Статистика архива: количество загрузок, уникальных страниц и размеры.
+        """
+        with self._lock:
+            pages = self._connection.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+            blobs, raw_size, stored_size = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(raw_size), 0), COALESCE(SUM(LENGTH(data)), 0) FROM blobs").fetchone()
+        return {
+            "pages": pages,
+            "unique_pages": blobs,
+            "raw_size": raw_size,
+            "stored_size": stored_size,
+            "ratio": raw_size / stored_size if stored_size else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
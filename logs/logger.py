@@ -1,25 +1,220 @@
+import atexit
+import json
 import os
+import queue
+import sys
+import threading
 import time
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+LEVELS_BY_NAME = {name: level for level, name in LEVEL_NAMES.items()}
+
+# Общие настройки логирования процесса (меняются через configure)
+_settings = {
+    # LOG_LEVEL=DEBUG включает подробные пошаговые сообщения
+    "level": LEVELS_BY_NAME.get(os.environ.get("LOG_LEVEL", "INFO").upper(), INFO),
+    "console": True,
+    "json": True,
+    "max_bytes": 10 * 1024 * 1024,
+    "backup_count": 5,
+    "flush_interval": 0.5,
+    "batch_size": 500,
+}
+
+
+def configure(level: int = None, console: bool = None, json_format: bool = None, max_bytes: int = None,
+              backup_count: int = None, flush_interval: float = None):
+    """
+    Настройка логирования для всех экземпляров Logger.
+
+    :param level: Минимальный уровень сообщений (DEBUG, INFO, WARNING, ERROR).
+                  DEBUG включает подробные пошаговые сообщения.
+    :param console: Дублировать сообщения в консоль.
+    :param json_format: Писать в файл JSON-записи (по одной на строку) вместо текста.
+    :param max_bytes: Размер файла, после которого он ротируется.
+    :param backup_count: Сколько старых файлов хранить (log.txt.1 ... log.txt.N).
+    :param flush_interval: Как часто (в секундах) поток записи сбрасывает накопленные сообщения.
+    """
+    updates = {"level": level, "console": console, "json": json_format, "max_bytes": max_bytes,
+               "backup_count": backup_count, "flush_interval": flush_interval}
+    _settings.update({key: value for key, value in updates.items() if value is not None})
+
+
+class _LogWriter:
+    def __init__(self, log_file: str):
+        """
+        Единственный поток записи в файл логов: забирает записи из очереди
+        и пишет их пачками, не открывая файл на каждое сообщение.
+        Вывод в консоль идёт через тот же поток, чтобы print не задерживал рабочие потоки.
+
+        :param log_file: Полный путь к файлу логов.
+        """
+        self.log_file = log_file
+        self.queue = queue.SimpleQueue()
+        self._file = None
+        self._thread = threading.Thread(target=self._run, name=f"log-writer-{os.path.basename(log_file)}",
+                                        daemon=True)
+        self._thread.start()
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.log_file) or ".", exist_ok=True)
+        self._file = open(self.log_file, "a", encoding="utf-8")
+
+    def _rotate(self):
+        self._file.close()
+        backup_count = _settings["backup_count"]
+        if backup_count > 0:
+            for index in range(backup_count - 1, 0, -1):
+                source = f"{self.log_file}.{index}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.log_file}.{index + 1}")
+            os.replace(self.log_file, f"{self.log_file}.1")
+        else:
+            os.remove(self.log_file)
+        self._open()
+
+    def _write(self, batch: list):
+        console = "".join(text for line, text in batch if text is not None)
+        if console:
+            sys.stdout.write(console)
+            sys.stdout.flush()
+        if self._file is None:
+            self._open()
+        self._file.write("".join(line for line, text in batch))
+        self._file.flush()
+        if self._file.tell() >= _settings["max_bytes"]:
+            self._rotate()
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            batch = []
+            stop = None
+            deadline = time.monotonic() + _settings["flush_interval"]
+            # Копим записи до конца интервала или до заполнения пачки
+            while True:
+                if isinstance(item, threading.Event):
+                    stop = item
+                    break
+                batch.append(item)
+                if len(batch) >= _settings["batch_size"]:
+                    break
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+
+            if batch:
+                try:
+                    self._write(batch)
+                except OSError as e:
+                    print(f"Ошибка записи в лог {self.log_file}: {e}")
+            if stop is not None:
+                stop.set()
+
+    def flush(self, timeout: float = 5.0):
+        """
+        Дожидается записи всех сообщений, поставленных в очередь до вызова.
+        """
+        done = threading.Event()
+        self.queue.put(done)
+        done.wait(timeout)
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+_writers_pid = os.getpid()
+
+
+def _get_writer(log_file: str) -> _LogWriter:
+    global _writers_pid
+    with _writers_lock:
+        # После fork потоки записи родителя в дочернем процессе не работают
+        if _writers_pid != os.getpid():
+            _writers.clear()
+            _writers_pid = os.getpid()
+        writer = _writers.get(log_file)
+        if writer is None:
+            writer = _writers[log_file] = _LogWriter(log_file)
+        return writer
+
+
+@atexit.register
+def flush_all():
+    """
+    Дожидается записи всех сообщений во все файлы логов.
+    """
+    with _writers_lock:
+        writers = list(_writers.values()) if _writers_pid == os.getpid() else []
+    for writer in writers:
+        writer.flush()
+
+
 class Logger:
-    def __init__(self, log_file: str = "log.txt"):
+    def __init__(self, log_file: str = "log.txt", **context):
         """
         Инициализация класса Logger.
 
         :param log_file: Имя файла для записи логов.
+        :param context: Поля, добавляемые к каждой записи (например, url, stage).
         """
-        # Создаем папку logs, если она не существует
-        self.logs_dir = "logs"
-        os.makedirs(self.logs_dir, exist_ok=True)
-
         # Указываем полный путь к файлу логов
+        self.logs_dir = "logs"
+        self.name = log_file
         self.log_file = os.path.join(self.logs_dir, log_file)
+        self.context = context
 
-    def log(self, message: str):
+    def bind(self, **context) -> "Logger":
         """
-        Запись сообщения в лог-файл.
+        Логгер в тот же файл с дополнительными полями в каждой записи.
+        """
+        return Logger(self.name, **{**self.context, **context})
+
+    def log(self, message: str, level: int = INFO, **fields):
+        """
+        Запись сообщения в лог-файл. Запись выполняется в фоновом потоке,
+        вызывающий поток не ждёт диска.
 
         :param message: Сообщение для записи.
+        :param level: Уровень сообщения.
+        :param fields: Дополнительные поля записи (url, stage и т.д.).
+        """
+        if level < _settings["level"]:
+            return
+
+        timestamp = time.strftime('%Y-%m-%d %H:%M:%S')
+        console = f"[{timestamp}] {message}\n\n" if _settings["console"] else None
+
+        if _settings["json"]:
+            record = {"time": timestamp, "level": LEVEL_NAMES.get(level, str(level)),
+                      "worker": threading.current_thread().name, **self.context, **fields, "message": message}
+            line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        else:
+            line = f"[{timestamp}] {message}\n"
+        _get_writer(self.log_file).queue.put((line, console))
+
+    def debug(self, message: str, **fields):
+        self.log(message, DEBUG, **fields)
+
+    def info(self, message: str, **fields):
+        self.log(message, INFO, **fields)
+
+    def warning(self, message: str, **fields):
+        self.log(message, WARNING, **fields)
+
+    def error(self, message: str, **fields):
+        self.log(message, ERROR, **fields)
+
+    def flush(self):
+        """
+        Дожидается записи всех сообщений этого файла.
         """
-        print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {message}\n")
-        with open(self.log_file, "a", encoding="utf-8") as f:
-            f.write(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {message}\n")
+        _get_writer(self.log_file).flush()
@@ -0,0 +1,227 @@
+import bisect
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Границы корзин гистограммы: от 0.1 мс до ~28 минут с шагом 2^(1/4) (погрешность квантиля до ~19%).
+# Квантили считаются по корзинам, поэтому память не растёт с числом замеров.
+BUCKETS = tuple(0.0001 * 2 ** (index / 4) for index in range(96))
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    def __init__(self):
+        """
+        Гистограмма длительностей этапа (в секундах) с фиксированными корзинами.
+        """
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def merge(self, other: "Histogram"):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float:
+        """
+        Квантиль с линейной интерполяцией внутри корзины (крайние корзины обрезаются по min и max).
+        """
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = max(BUCKETS[index - 1] if index > 0 else 0.0, self.min)
+                upper = min(BUCKETS[index] if index < len(BUCKETS) else self.max, self.max)
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.max
+
+
+class StageMetrics:
+    def __init__(self):
+        """
+        Реестр гистограмм по этапам конвейера (driver_start, get, wait, scroll, parse.title и т.д.).
+        """
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, stage: str):
+        """
+        Замеряет длительность блока with и добавляет её в гистограмму этапа.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def timed(self, stage: str):
+        """
+        Декоратор: замеряет каждый вызов функции.
+        """
+        def decorator(function):
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.timer(stage):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def drain(self) -> dict:
+        """
+        Забирает накопленные гистограммы и очищает реестр. Используется в дочерних
+        процессах, чтобы передать замеры в основной процесс (см. merge).
+        """
+        with self._lock:
+            histograms, self._histograms = self._histograms, {}
+        return histograms
+
+    def merge(self, histograms: dict):
+        with self._lock:
+            for stage, other in histograms.items():
+                histogram = self._histograms.get(stage)
+                if histogram is None:
+                    self._histograms[stage] = other
+                else:
+                    histogram.merge(other)
+
+    def summary(self) -> dict:
+        """
+        Сводка по этапам: количество, суммарное и среднее время, p50/p95/p99 и максимум (в секундах).
+        """
+        with self._lock:
+            stages = {
+                stage: {
+                    "count": histogram.count,
+                    "total": histogram.sum,
+                    "mean": histogram.sum / histogram.count,
+                    **{f"p{round(q * 100)}": histogram.quantile(q) for q in QUANTILES},
+                    "max": histogram.max,
+                }
+                for stage, histogram in self._histograms.items() if histogram.count
+            }
+        return dict(sorted(stages.items(), key=lambda item: item[1]["total"], reverse=True))
+
+    def report(self) -> str:
+        """
+        Текстовая таблица сводки, этапы отсортированы по суммарному времени.
+        """
+        lines = [f"{'Этап':<28}{'Кол-во':>8}{'Всего, с':>11}{'p50, мс':>10}{'p95, мс':>10}{'p99, мс':>10}"]
+        for stage, stats in self.summary().items():
+            lines.append(f"{stage:<28}{stats['count']:>8}{stats['total']:>11.2f}{stats['p50'] * 1000:>10.1f}"
+                         f"{stats['p95'] * 1000:>10.1f}{stats['p99'] * 1000:>10.1f}")
+        return "\n".join(lines)
+
+    def write_summary(self, path: str):
+        """
+        Атомарно записывает сводку в JSON-файл.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump({"time": time.strftime('%Y-%m-%d %H:%M:%S'), "stages": self.summary()}, file, indent=4)
+        os.replace(temp_path, path)
+
+    def start_summary_writer(self, path: str, interval: float = 30.0) -> threading.Event:
+        """
+        Периодически перезаписывает файл сводки в фоновом потоке.
+
+        :return: Событие, установка которого останавливает поток (с финальной записью).
+        """
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                self.write_summary(path)
+            self.write_summary(path)
+
+        threading.Thread(target=run, name="metrics-summary", daemon=True).start()
+        return stop
+
+    def prometheus_text(self) -> str:
+        """
+        Метрики в текстовом формате Prometheus: гистограмма scraper_stage_seconds
+        и квантили scraper_stage_seconds_quantile.
+        """
+        with self._lock:
+            histograms = dict(self._histograms)
+            lines = ["# TYPE scraper_stage_seconds histogram"]
+            for stage, histogram in sorted(histograms.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(BUCKETS, histogram.counts):
+                    cumulative += bucket_count
+                    lines.append(f'scraper_stage_seconds_bucket{{stage="{stage}",le="{bound:.6g}"}} {cumulative}')
+                lines.append(f'scraper_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+                lines.append(f'scraper_stage_seconds_sum{{stage="{stage}"}} {histogram.sum:.6f}')
+                lines.append(f'scraper_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+            lines.append("# TYPE scraper_stage_seconds_quantile gauge")
+            for stage, histogram in sorted(histograms.items()):
+                for q in QUANTILES:
+                    lines.append(f'scraper_stage_seconds_quantile{{stage="{stage}",quantile="{q}"}} '
+                                 f'{histogram.quantile(q):.6f}')
+        return "\n".join(lines) + "\n"
+
+    def start_http_server(self, port: int = 9100, host: str = "127.0.0.1"):
+        """
+        Запускает HTTP-сервер, отдающий метрики в формате Prometheus по адресу /metrics.
+        """
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        return self._server
+
+    def stop_http_server(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+# Общий реестр процесса
+metrics = StageMetrics()
@@ -0,0 +1,19 @@
+import argparse
+from htmlParser.batchReparser import BatchReparser
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description="Повторный парсинг сохранённых страниц без загрузки")
+    argument_parser.add_argument("source", nargs="?", default="htmldata",
+                                 help="Папка с HTML-файлами или архив страниц (.sqlite)")
+    argument_parser.add_argument("--output", default="jsondata", help="Папка для результатов")
+    argument_parser.add_argument("--sink", default="json", choices=["json", "jsonl", "records", "parquet", "sqlite"],
+                                 help="Формат результата")
+    argument_parser.add_argument("--backend", default="lxml", choices=["bs4", "lxml", "stream"])
+    argument_parser.add_argument("--workers", type=int, default=None, help="Количество процессов")
+    argument_parser.add_argument("--full", action="store_true", help="Перепарсить все страницы, без пропусков")
+    args = argument_parser.parse_args()
+
+    reparser = BatchReparser(args.source, args.output, args.backend, args.workers, incremental=not args.full,
+                             sink=args.sink)
+    stats = reparser.run()
+    print(f"Готово: обработано {stats['parsed']}, пропущено {stats['skipped']}, ошибок {stats['failed']}")
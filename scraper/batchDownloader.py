@@ -1,41 +1,174 @@
 import os
-from scraper.pageDownloader import PageDownloader
-from htmlParser.htmlProductParser import HTMLProductParser
-from JSONConverter.jsonProductConverter import JSONProductConverter  # Предположим, что у вас есть класс JSONConverter
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from scraper.pageDownloader import PageDownloader, DEFAULT_BLOCKED_RESOURCES
+from scraper.productUrl import product_id_from_url, product_name_from_url
+from scraper.httpFetcher import HTTPPageFetcher, TieredPageFetcher
+from htmlStorage.rawPageStore import RawPageStore
+from scraper.driverPool import DriverPool
+from scraper.crawlLedger import CrawlLedger
+from scraper.discoveryCrawler import DiscoveryCrawler
+from scraper.dedupIndex import ProductDedupIndex
+from scraper.rateLimiter import RateLimiter
+from scraper.recrawlScheduler import RecrawlScheduler, product_fingerprint, review_count_from_html
+from scraper.selectorDriftGuard import SelectorDriftGuard, DEFAULT_TEMPLATE_FILE, RUNTIME_CONFIG_FILE, runtime_config_file
+from scraper.throughputController import BLOCKED, EMPTY, ERROR, OK, RetryQueue, ThroughputController
+from htmlParser.htmlProductParser import HTMLProductParser, parse_product_html
+from JSONConverter.productSinks import create_sink
+from logs.logger import flush_all
+from logs.metrics import metrics
+
+
+def _parse_with_metrics(html_code: str, product_name: str, backend: str, config_file: str):
+    """
+    Парсинг в дочернем процессе вместе с замерами этапов парсера,
+    которые иначе остались бы в реестре дочернего процесса.
+    """
+    # Замеры, унаследованные от родителя при fork, уже учтены в основном процессе
+    metrics.drain()
+    try:
+        # ProductRecord вместо словаря: товары в очереди результатов и буферах приёмника занимают меньше памяти
+        product = parse_product_html(html_code, product_name, backend, config_file, as_record=True)
+        return product, metrics.drain()
+    finally:
+        # atexit в процессах ProcessPoolExecutor не вызывается — без сброса последние записи лога теряются
+        flush_all()
+
 
 class BatchDownloader:
-    def __init__(self, links_file: str, download_path: str, used_links_file: str = "used_links.txt"):
+    def __init__(self, links_file: str, download_path: str, used_links_file: str = "used_links.txt",
+                 use_driver_pool: bool = True, pages_per_driver: int = 50, workers: int = 1,
+                 per_host_delay: float = 0.0, max_requests_per_minute: float = None, parse_workers: int = None,
+                 parser_backend: str = "lxml", selector_config_file: str = None,
+                 load_mode: str = "adaptive", jitter_budget: float = 2.0, lean_fetch: bool = False,
+                 blocked_resources: tuple = DEFAULT_BLOCKED_RESOURCES, skip_image_decoding: bool = False,
+                 http_first: bool = False,
+                 browser_fallback: bool = True, archive_path: str = None, archive_level: int = None, sink: str = "json",
+                 sink_path: str = None, ledger_path: str = "crawl_ledger.sqlite", max_attempts: int = 3,
+                 metrics_file: str = "logs/metrics.json", metrics_interval: float = 30.0, metrics_port: int = None,
+                 drift_guard: bool = True, drift_template_file: str = DEFAULT_TEMPLATE_FILE, drift_window: int = 50,
+                 drift_min_hit_rate: float = 0.5, recrawl: bool = False, recrawl_limit: int = None,
+                 discovery_seeds: list = None, discovery_depth: int = 1, discovery_max_pages: int = 20,
+                 discovery_workers: int = 2, adaptive_throttle: bool = True, retry_base_delay: float = 5.0,
+                 retry_max_delay: float = 300.0, breaker_cooldown: float = 60.0):
         """
         Инициализация BatchDownloader.
 
         :param links_file: Путь к файлу с ссылками на товары.
         :param download_path: Папка для сохранения HTML-файлов.
-        :param used_links_file: Файл для хранения использованных ссылок.
+        :param used_links_file: Старый файл использованных ссылок; при запуске переносится в журнал обхода.
+        :param use_driver_pool: Переиспользовать один браузер для всех ссылок вместо запуска нового на каждую.
+        :param pages_per_driver: Через сколько страниц браузер из пула перезапускается.
+        :param workers: Количество одновременно работающих браузеров.
+        :param per_host_delay: Минимальная пауза (в секундах) между запросами к одному хосту.
+        :param max_requests_per_minute: Общий бюджет запросов в минуту. None — без ограничения.
+        :param parse_workers: Количество процессов для парсинга. None — по числу ядер.
+        :param parser_backend: Реализация парсера страниц: "bs4", "lxml" или "stream".
+        :param selector_config_file: Конфиг селекторов для парсера. None — htmlParser/configUpdater/config.json,
+                                     а с drift_guard — его рабочая копия selector_config.json рядом с журналом обхода.
+        :param load_mode: Режим ожидания загрузки страницы: "adaptive" (по событиям) или "human" (фиксированные паузы).
+        :param jitter_budget: Бюджет случайных пауз на страницу в режиме "adaptive", в секундах.
+        :param lean_fetch: Блокировать в браузере картинки, шрифты, видео и трекеры.
+        :param blocked_resources: Какие типы ресурсов блокировать при lean_fetch.
+        :param skip_image_decoding: Не декодировать и не отрисовывать картинки в браузере (независимо от
+                                    блокировки их загрузки через lean_fetch).
+        :param http_first: Сначала пробовать загрузить страницу обычным HTTP-запросом без браузера.
+        :param browser_fallback: Загружать через браузер страницы, которые не удалось получить по HTTP.
+        :param archive_path: Путь к архиву сырых страниц (RawPageStore). Если задан, каждая скачанная
+                             страница сохраняется в сжатом виде для повторного парсинга без сети.
+        :param archive_level: Уровень сжатия архива. None — умеренный уровень по умолчанию для кодека.
+        :param sink: Куда записывать товары: "json" (файл на товар), "jsonl", "records" (типизированные записи), "parquet" или "sqlite".
+        :param sink_path: Путь к файлу (для "json" — к папке, для "parquet" — к папке набора). None — путь по умолчанию в jsondata.
+        :param ledger_path: Путь к журналу обхода (CrawlLedger).
+        :param max_attempts: Сколько раз пробовать скачать товар, прежде чем отказаться от него.
+        :param metrics_file: Файл сводки времени по этапам (p50/p95/p99), обновляется каждые metrics_interval секунд.
+                             None — не записывать.
+        :param metrics_interval: Период обновления файла сводки в секундах.
+        :param metrics_port: Порт HTTP-сервера с метриками в формате Prometheus (/metrics). None — не запускать.
+        :param drift_guard: Следить за долей найденных полей и при её падении обновлять конфиг селекторов
+                            на лету (SelectorDriftGuard), заново обрабатывая затронутые ссылки.
+        :param drift_template_file: Страница, на которой конфиг селекторов работает.
+        :param drift_window: Сколько последних страниц учитывается в доле найденных полей.
+        :param drift_min_hit_rate: Порог доли найденных значений поля, ниже которого конфиг проверяется.
+        :param recrawl: Добавить к ссылкам из файла товары, время повторного визита которых наступило
+                        (RecrawlScheduler). Такие страницы сначала загружаются по HTTP, браузер — только
+                        если HTTP не сработал; если цена и количество отзывов не изменились, товар не перезаписывается.
+        :param recrawl_limit: Максимальное количество повторных визитов за запуск. None — без ограничения.
+        :param discovery_seeds: Стартовые страницы каталога или поиска. Если заданы, одновременно со скачиванием
+                                работает DiscoveryCrawler, и найденные товары сразу попадают в очередь скачивания.
+        :param discovery_depth: Глубина переходов по вложенным разделам от стартовых страниц.
+        :param discovery_max_pages: Сколько страниц пагинации обходить в одном разделе.
+        :param discovery_workers: Количество потоков обхода страниц списков.
+        :param adaptive_throttle: Подстраивать число одновременных загрузок (не больше workers) и паузу между
+                                  ними по задержке ответов, блокировкам и пустым страницам (ThroughputController).
+        :param retry_base_delay: Пауза перед первым повтором неудачной загрузки в том же запуске, в секундах;
+                                 следующие повторы — с экспоненциально растущей паузой (до max_attempts попыток).
+        :param retry_max_delay: Максимальная пауза перед повтором, в секундах.
+        :param breaker_cooldown: Пауза после срабатывания предохранителя при массовых блокировках, в секундах.
         """
         self.links_file = links_file
         self.download_path = download_path
         self.used_links_file = used_links_file
+        self.use_driver_pool = use_driver_pool
+        self.pages_per_driver = pages_per_driver
+        self.workers = max(1, workers)
+        self.rate_limiter = RateLimiter(per_host_delay, max_requests_per_minute)
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+        self.parser_backend = parser_backend
+        self.selector_config_file = selector_config_file
+        self.load_mode = load_mode
+        self.jitter_budget = jitter_budget
+        self.lean_fetch = lean_fetch
+        self.blocked_resources = blocked_resources
+        self.skip_image_decoding = skip_image_decoding
+        self.http_first = http_first
+        self.browser_fallback = browser_fallback
+        self.archive_path = archive_path
+        self.archive_level = archive_level
+        self.sink = sink
+        self.sink_path = sink_path
+        self.ledger_path = ledger_path
+        self.max_attempts = max_attempts
+        self.metrics_file = metrics_file
+        self.metrics_interval = metrics_interval
+        self.metrics_port = metrics_port
+        self.drift_guard = drift_guard
+        self.drift_template_file = drift_template_file
+        self.drift_window = drift_window
+        self.drift_min_hit_rate = drift_min_hit_rate
+        self.recrawl = recrawl
+        self.recrawl_limit = recrawl_limit
+        self.discovery_seeds = discovery_seeds or []
+        self.discovery_depth = discovery_depth
+        self.discovery_max_pages = discovery_max_pages
+        self.discovery_workers = discovery_workers
+        self.adaptive_throttle = adaptive_throttle
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.breaker_cooldown = breaker_cooldown
 
-    def _load_used_links(self) -> set:
-        """
-        Загружает использованные ссылки из файла.
+        self._progress_lock = threading.Lock()
+        self._completed = 0
+        self._total_links = 0
+        self._unchanged = 0
 
-        :return: Множество использованных ссылок.
-        """
-        if not os.path.exists(self.used_links_file):
-            return set()
-
-        with open(self.used_links_file, "r", encoding="utf-8") as file:
-            return set(file.read().splitlines())
-
-    def _save_used_link(self, url: str):
-        """
-        Сохраняет использованную ссылку в файл.
-
-        :param url: Ссылка для сохранения.
-        """
-        with open(self.used_links_file, "a", encoding="utf-8") as file:
-            file.write(url + "\n")
+        # Объекты текущего запуска download_all, общие для всех потоков
+        self._driver_pool = None
+        self._executor = None
+        self._results = None
+        self._fetcher = None
+        self._archive = None
+        self._sink = None
+        self._ledger = None
+        self._drift_guard = None
+        self._requeued = []
+        self._scheduler = None
+        self._revisits = set()
+        self._controller = None
+        self._retries = None
 
     def parse_product_page(self, file_name: str) -> dict:
         """
@@ -54,59 +187,368 @@ class BatchDownloader:
 
     def download_all(self):
         """
-        Скачивает все страницы товаров из файла с ссылками.
+        Скачивает все страницы товаров из файла с ссылками (и найденные при обходе каталога, если заданы discovery_seeds).
         """
-        # Чтение всех ссылок из файла
-        with open(self.links_file, "r", encoding="utf-8") as file:
-            links = file.read().splitlines()
+        # Чтение всех ссылок из файла (при обходе каталога файла может не быть)
+        links = []
+        if not self.discovery_seeds or os.path.exists(self.links_file):
+            with open(self.links_file, "r", encoding="utf-8") as file:
+                links = file.read().splitlines()
+
+        # Расписание повторного обхода хранится в том же файле, что и журнал
+        self._scheduler = RecrawlScheduler(self.ledger_path)
+        due = self._scheduler.due(self.recrawl_limit) if self.recrawl else []
+
+        # По одной ссылке на артикул: ссылки на один товар с разными параметрами не скачиваются дважды.
+        # Тот же индекс использует обход каталога, чтобы не выдавать товары из файла повторно
+        dedup_index = ProductDedupIndex()
+        links = dedup_index.filter(link for link in links + due if link.strip())
 
         total_links = len(links)
-        if total_links == 0:
+        if total_links == 0 and not self.discovery_seeds:
             print("Файл с ссылками пуст.")
+            self._scheduler.close()
             return
 
         print(f"Найдено {total_links} ссылок для скачивания.")
+        if due:
+            print(f"Из них повторных визитов по расписанию: {len(due)}")
 
-        # Загрузка использованных ссылок
-        used_links = self._load_used_links()
+        # Журнал обхода: скачанные товары пропускаются, прерванные и неудачные берутся повторно
+        self._ledger = CrawlLedger(self.ledger_path, max_attempts=self.max_attempts)
+        self._ledger.import_used_links(self.used_links_file)
+        self._ledger.add(links)
+        self._ledger.reopen(due)
+        self._revisits = {product_id_from_url(url) for url in due}
+        self._unchanged = 0
 
-        # Скачивание каждой страницы
-        for index, url in enumerate(links, start=1):
-            try:
-                # Пропускаем ссылку, если она уже использовалась
-                if url in used_links:
-                    print(f"Ссылка уже использовалась: {url}")
-                    continue
+        self._controller = ThroughputController(self.workers, breaker_cooldown=self.breaker_cooldown) \
+            if self.adaptive_throttle else None
+        # Обход каталога делит со скачиванием бюджет запросов, регулятор скорости и предохранитель
+        crawler = DiscoveryCrawler(self.discovery_seeds, workers=self.discovery_workers,
+                                   max_depth=self.discovery_depth, max_pages_per_listing=self.discovery_max_pages,
+                                   dedup_index=dedup_index, rate_limiter=self.rate_limiter,
+                                   controller=self._controller) \
+            if self.discovery_seeds else None
+
+        # Исправления селекторов пишутся в рабочую копию, а не в config.json из репозитория;
+        # парсер, HTTP-клиент и браузер читают ту же копию
+        if self.drift_guard and self.selector_config_file is None:
+            self.selector_config_file = runtime_config_file(
+                os.path.join(os.path.dirname(self.ledger_path), RUNTIME_CONFIG_FILE))
 
-                print(f"Скачивание [{index}/{total_links}] {url}")
-                with PageDownloader(url, self.download_path) as downloader:
-                    file_path = downloader.save_html_to_file()
+        self._driver_pool = None
+        if self.use_driver_pool:
+            driver_factory = partial(PageDownloader.create_driver, self.lean_fetch, self.blocked_resources,
+                                     self.skip_image_decoding)
+            self._driver_pool = DriverPool(driver_factory, size=self.workers,
+                                           max_pages_per_driver=self.pages_per_driver)
 
-                    # Извлекаем имя файла из пути
-                    file_name = os.path.basename(file_path)
+        # HTTP-клиент нужен и без http_first: повторные визиты сначала пробуются по HTTP
+        http_fetcher = HTTPPageFetcher(pool_size=self.workers, config_file=self.selector_config_file) \
+            if self.http_first or due else None
+        self._fetcher = TieredPageFetcher(http_fetcher, browser_fallback=self.browser_fallback)
+        self._archive = RawPageStore(self.archive_path, level=self.archive_level) if self.archive_path else None
+        self._sink = create_sink(self.sink, self.sink_path)
+        self._drift_guard = SelectorDriftGuard(self.selector_config_file, self.drift_template_file,
+                                               window=self.drift_window, min_hit_rate=self.drift_min_hit_rate) \
+            if self.drift_guard else None
+        self._requeued = []
+        self._retries = RetryQueue(self.retry_base_delay, self.retry_max_delay)
 
-                    # Парсинг HTML-файла
-                    product_data = self.parse_product_page(file_name)
-                    if product_data:
-                        print("Данные о товаре:", product_data)
+        stop_summary = metrics.start_summary_writer(self.metrics_file, self.metrics_interval) \
+            if self.metrics_file else None
+        if self.metrics_port:
+            metrics.start_http_server(self.metrics_port)
 
-                      # Преобразование в JSON и сохранение
-                        json_converter = JSONProductConverter(product_data)
-                        json_converter.to_json_file()
+        # Скачанные страницы парсятся в отдельных процессах, а результаты
+        # записывает один поток, чтобы браузеры не простаивали между страницами
+        self._results = queue.Queue(maxsize=self.parse_workers * 2)
+        writer = threading.Thread(target=self._writer, args=(self._results,), name="writer", daemon=True)
 
-                        # Удаление HTML-файла
-                        os.remove(file_path)
-                        print(f"HTML-файл удален: {file_path}")
+        try:
+            with ProcessPoolExecutor(max_workers=self.parse_workers) as self._executor:
+                writer.start()
+                try:
+                    while links or crawler:
+                        self._download_links(links, crawler)
+                        crawler = None
+                        # Ждём записи всех результатов: после обновления конфига часть ссылок
+                        # возвращается на повторную обработку
+                        self._results.join()
+                        links, self._requeued = self._requeued, []
+                        if links:
+                            print(f"Повторная обработка {len(links)} ссылок после обновления селекторов.")
+                finally:
+                    self._results.put(None)
+                    writer.join()
+        finally:
+            if self._driver_pool:
+                self._driver_pool.close()
+            if http_fetcher:
+                http_fetcher.close()
+            if self._archive:
+                self._archive.close()
+            self._sink.close()
+            self._ledger.close()
+            self._scheduler.close()
+            if stop_summary:
+                stop_summary.set()
+            metrics.stop_http_server()
 
-                        # Сохранение использованной ссылки
-                        self._save_used_link(url)
-                        used_links.add(url)
+        print("Скачивание завершено.")
+        print(f"Источники страниц: {self._fetcher.report()}")
+        if self._controller:
+            print(f"Регулятор скорости: {self._controller.report()}")
+        if due:
+            print(f"Не изменились при повторном визите: {self._unchanged} из {len(due)}")
+        print(f"Время по этапам:\n{metrics.report()}")
 
-                # Вычисление и вывод прогресса
-                progress = (index / total_links) * 100
-                print(f"Прогресс: {progress:.2f}% завершено\n")
+    def _download_links(self, links: list, crawler: DiscoveryCrawler = None):
+        """
+        Раздаёт ссылки из общей очереди нескольким потокам.
 
+        :param links: Список ссылок на товары.
+        :param crawler: Обход каталога, который дополняет очередь во время скачивания. None — только links.
+        """
+        link_queue = queue.Queue()
+        # Установлено, когда новых ссылок в очереди больше не появится
+        producers_done = threading.Event()
+        with self._progress_lock:
+            self._completed = 0
+            self._total_links = 0
+        for url in links:
+            self._enqueue(link_queue, url)
+
+        if crawler:
+            threading.Thread(target=self._discover, args=(crawler, link_queue, producers_done),
+                             name="discovery", daemon=True).start()
+        else:
+            producers_done.set()
+
+        threads = [
+            threading.Thread(target=self._worker, args=(worker_id, link_queue, producers_done),
+                             name=f"worker-{worker_id}", daemon=True)
+            for worker_id in range(1, self.workers + 1)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def _enqueue(self, link_queue: queue.Queue, url: str):
+        with self._progress_lock:
+            self._total_links += 1
+            index = self._total_links
+        link_queue.put(((index, url), 1))
+
+    def _discover(self, crawler: DiscoveryCrawler, link_queue: queue.Queue, producers_done: threading.Event):
+        """
+        Поток обхода каталога: каждая найденная ссылка сразу попадает в журнал и в очередь скачивания.
+        """
+        def on_product(url: str):
+            self._ledger.add([url])
+            if not self._ledger.is_done(url):
+                self._enqueue(link_queue, url)
+
+        try:
+            stats = crawler.run(on_product)
+            print(f"Обход каталога завершён: страниц {stats['listings']}, новых товаров {stats['products']}, "
+                  f"ошибок {stats['failed']}")
+        except Exception as e:
+            print(f"Ошибка при обходе каталога: {e}")
+        finally:
+            producers_done.set()
+
+    def _worker(self, worker_id: int, link_queue: queue.Queue, producers_done: threading.Event):
+        """
+        Цикл одного потока: берёт ссылки из очереди, пока она не опустеет и не закончится обход каталога.
+
+        :param worker_id: Номер потока.
+        :param link_queue: Очередь пар ((номер, ссылка), номер попытки).
+        :param producers_done: Событие: новых ссылок в очереди больше не будет.
+        """
+        while True:
+            # Сначала повторы, время которых наступило, затем новые ссылки
+            item = self._retries.pop_ready()
+            if item is None:
+                try:
+                    item = link_queue.get(timeout=self._retries.wait_time(0.5))
+                except queue.Empty:
+                    # Сначала проверяются результаты парсинга: поток записи откладывает повтор до task_done,
+                    # поэтому при пустой очереди результатов все повторы уже в self._retries
+                    if producers_done.is_set() and link_queue.empty() and not self._results.unfinished_tasks \
+                            and not len(self._retries):
+                        return
+                    continue
+            (index, url), attempt = item
+
+            # Пока обновляется конфиг селекторов, новые страницы не скачиваются
+            if self._drift_guard:
+                self._drift_guard.wait_until_resumed()
+
+            # Пропускаем товар, если он уже скачан или его взял другой поток
+            if not self._ledger.claim(url):
+                print(f"Ссылка уже использовалась: {url}")
+                with self._progress_lock:
+                    self._completed += 1
+                continue
+
+            retrying = False
+            try:
+                print(f"[worker-{worker_id}] Скачивание [{index}/{self._total_links}] {url}")
+                with metrics.timer("rate_limit_wait"):
+                    self.rate_limiter.wait(url)
+                use_http = self.http_first or product_id_from_url(url) in self._revisits
+                html = self._fetch(url, use_http)
+
+                # Парсинг уходит в пул процессов, поток сразу берёт следующую ссылку
+                if html:
+                    if self._archive:
+                        with metrics.timer("archive_write"):
+                            self._archive.put(url, html)
+                    product_name = product_name_from_url(url)
+                    generation = self._drift_guard.generation if self._drift_guard else 0
+                    future = self._executor.submit(_parse_with_metrics, html, product_name,
+                                                   self.parser_backend, self.selector_config_file)
+                    self._results.put((index, url, attempt, html, generation, future))
+                else:
+                    self._ledger.mark_failed(url, "Страница не загружена")
+                    retrying = self._retry(index, url, attempt)
             except Exception as e:
                 print(f"Ошибка при скачивании {url}: {e}")
+                self._ledger.mark_failed(url, str(e))
+                retrying = self._retry(index, url, attempt)
+
+            if retrying:
+                continue
+            # Вычисление и вывод прогресса
+            with self._progress_lock:
+                self._completed += 1
+                progress = (self._completed / self._total_links) * 100
+            print(f"Прогресс: {progress:.2f}% скачано\n")
+
+    def _fetch(self, url: str, use_http: bool):
+        """
+        Загрузка страницы с разрешения регулятора скорости, которому передаётся исход запроса.
+
+        :return: HTML-код страницы или None.
+        """
+        if not self._controller:
+            return self._fetcher.fetch(url, partial(self._fetch_with_browser, url), use_http)
+
+        self._controller.acquire()
+        outcome, latency, source = ERROR, None, None
+        start_time = time.monotonic()
+        try:
+            html, source, blocked = self._fetcher.fetch_page(url, partial(self._fetch_with_browser, url), use_http)
+            latency = time.monotonic() - start_time
+            # Блокировка HTTP-запроса — сигнал замедлиться, даже если браузер страницу получил
+            outcome = BLOCKED if blocked else OK if html else ERROR
+            return html
+        finally:
+            self._controller.release(outcome, latency, source)
+
+    def _retry(self, index: int, url: str, attempt: int) -> bool:
+        """
+        Откладывает неудачную ссылку на повтор в этом же запуске, если попытки не исчерпаны.
+
+        :return: True, если ссылка будет повторена.
+        """
+        if attempt >= self.max_attempts:
+            return False
+        delay = self._retries.push((index, url), attempt + 1)
+        print(f"Повтор {url} через {delay:.1f} с (попытка {attempt + 1} из {self.max_attempts})")
+        return True
+
+    def _fetch_with_browser(self, url: str):
+        """
+        Загрузка страницы через браузер (из пула, если он включён).
+
+        :param url: Ссылка на товар.
+        :return: HTML-код страницы или None.
+        """
+        with PageDownloader(url, self.download_path, driver_pool=self._driver_pool,
+                            load_mode=self.load_mode, jitter_budget=self.jitter_budget,
+                            lean_fetch=self.lean_fetch, blocked_resources=self.blocked_resources,
+                            skip_image_decoding=self.skip_image_decoding,
+                            selector_config_file=self.selector_config_file) as downloader:
+            return downloader.download_html()
+
+    def _writer(self, results: queue.Queue):
+        """
+        Поток записи: дожидается результатов парсинга, передаёт товар в приёмник и отмечает его в журнале.
+
+        :param results: Очередь кортежей (номер, ссылка, номер попытки, HTML-код, версия конфига, future).
+                        None завершает поток.
+        """
+        while True:
+            item = results.get()
+            if item is None:
+                results.task_done()
+                return
+
+            index, url, attempt, html, generation, future = item
+            try:
+                product, parse_metrics = future.result()
+                metrics.merge(parse_metrics)
+                if product and self._drift_guard \
+                        and not self._drift_guard.record(url, product, html, generation):
+                    # Селекторы не нашли обязательные поля: заглушки вместо данных не записываются
+                    self._ledger.mark_failed(url, "Не найдены обязательные поля")
+                    if self._controller:
+                        self._controller.record(EMPTY)
+                    # Страницу, разобранную до обновления конфига, вернёт на обработку drift_guard.check;
+                    # иначе это может быть недогруженная страница — она скачивается повторно
+                    if generation == self._drift_guard.generation:
+                        self._retry_parsed(index, url, attempt)
+                elif product:
+                    fingerprint = product_fingerprint(product.price_text, review_count_from_html(html))
+                    changed = self._scheduler.observe(url, fingerprint)
+                    if changed or product_id_from_url(url) not in self._revisits:
+                        print("Данные о товаре:", product)
+
+                        # Запись товара (приёмник сам накапливает записи и пишет пачками)
+                        with metrics.timer("sink_write"):
+                            self._sink.write(product)
+                    else:
+                        # Цена и количество отзывов те же: запись прошлого визита актуальна
+                        print(f"Товар не изменился: {url}")
+                        self._unchanged += 1
+
+                    self._ledger.mark_done(url)
+                else:
+                    self._ledger.mark_failed(url, "Пустой результат парсинга")
+                    if self._controller:
+                        self._controller.record(EMPTY)
+                    self._retry_parsed(index, url, attempt)
+            except Exception as e:
+                print(f"Ошибка при обработке {url}: {e}")
+                self._ledger.mark_failed(url, str(e))
+                self._retry_parsed(index, url, attempt)
 
-        print("Скачивание завершено.")
\ No newline at end of file
+            # task_done после проверки: download_all ждёт, пока ссылки на повторную обработку будут добавлены
+            try:
+                if self._drift_guard:
+                    self._requeue(self._drift_guard.check())
+            except Exception as e:
+                print(f"Ошибка при проверке селекторов: {e}")
+            finally:
+                results.task_done()
+
+    def _retry_parsed(self, index: int, url: str, attempt: int):
+        """
+        Откладывает на повтор ссылку, страница которой скачалась, но не разобралась.
+        Скачивание такой ссылки уже учтено в прогрессе, повтор учтёт его снова.
+        """
+        if self._retry(index, url, attempt):
+            with self._progress_lock:
+                self._completed -= 1
+
+    def _requeue(self, urls: list):
+        """
+        Возвращает ссылки в журнал со статусом pending и в список следующего прохода download_all.
+        """
+        for url in urls:
+            self._ledger.requeue(url)
+            self._requeued.append(url)
@@ -0,0 +1,209 @@
+import os
+import sqlite3
+import threading
+import time
+from logs.metrics import metrics
+from scraper.productUrl import product_id_from_url
+
+PENDING = "pending"
+IN_FLIGHT = "in_flight"
+DONE = "done"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS links (
+    product_id TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS links_status ON links (status, updated_at);
+CREATE TABLE IF NOT EXISTS imports (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL
+);
+"""
+
+
+class CrawlLedger:
+    def __init__(self, db_path: str = "crawl_ledger.sqlite", max_attempts: int = 3,
+                 in_flight_timeout: float = 600.0):
+        """
+        Журнал обхода товаров в SQLite. Ключ — артикул товара из URL, поэтому ссылки
+        на один товар с разными параметрами запроса считаются одной записью.
+        Для каждой записи хранятся статус (pending, in_flight, done, failed),
+        число попыток и время изменения. Проверка и захват ссылки идут по индексу,
+        без загрузки журнала в память, поэтому запуск не зависит от его размера.
+
+        :param db_path: Путь к файлу базы.
+        :param max_attempts: После стольких неудачных попыток ссылка больше не выдаётся.
+        :param in_flight_timeout: Через сколько секунд незавершённая ссылка (например, после
+                                  падения процесса) снова может быть захвачена.
+        """
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self.in_flight_timeout = in_flight_timeout
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # WAL позволяет писать в журнал из нескольких процессов, busy_timeout — ждать блокировку, а не падать
+        self._connection = sqlite3.connect(db_path, timeout=30.0, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def add(self, urls) -> int:
+        """
+        Добавляет ссылки со статусом pending. Уже известные товары не меняются.
+
+        :param urls: Ссылки на товары.
+        :return: Количество новых записей.
+        """
+        now = time.time()
+        rows = [(product_id_from_url(url), url, PENDING, now, now) for url in urls]
+        with self._lock, self._connection:
+            before = self._connection.total_changes
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO links (product_id, url, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                rows)
+            return self._connection.total_changes - before
+
+    def claim(self, url: str) -> bool:
+        """
+        Атомарно закрепляет товар за вызывающим потоком (или процессом).
+
+        :param url: Ссылка на товар.
+        :return: True, если товар можно скачивать; False, если он уже скачан,
+                 скачивается другим потоком или исчерпал попытки.
+        """
+        product_id = product_id_from_url(url)
+        now = time.time()
+        with metrics.timer("ledger.claim"), self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR IGNORE INTO links (product_id, url, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (product_id, url, PENDING, now, now))
+            cursor = self._connection.execute(
+                """
+                UPDATE links SET status = ?, attempts = attempts + 1, updated_at = ?, url = ?
+                WHERE product_id = ? AND attempts < ?
+                  AND (status IN (?, ?) OR (status = ? AND updated_at < ?))
+                """,
+                (IN_FLIGHT, now, url, product_id, self.max_attempts,
+                 PENDING, FAILED, IN_FLIGHT, now - self.in_flight_timeout))
+            return cursor.rowcount == 1
+
+    def _set_status(self, url: str, status: str, error: str = None):
+        with metrics.timer("ledger.update"), self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE links SET status = ?, updated_at = ?, error = ? WHERE product_id = ?",
+                (status, time.time(), error, product_id_from_url(url)))
+
+    def mark_done(self, url: str):
+        self._set_status(url, DONE)
+
+    def mark_failed(self, url: str, error: str = None):
+        self._set_status(url, FAILED, error)
+
+    def requeue(self, url: str):
+        """
+        Возвращает товар в pending без учёта последней попытки (например, если страница
+        была разобрана устаревшими селекторами и её нужно обработать заново).
+        """
+        with metrics.timer("ledger.update"), self._lock, self._connection:
+            self._connection.execute(
+                """
+                UPDATE links SET status = ?, attempts = MAX(attempts - 1, 0), updated_at = ?, error = NULL
+                WHERE product_id = ?
+                """,
+                (PENDING, time.time(), product_id_from_url(url)))
+
+    def reopen(self, urls) -> int:
+        """
+        Снова выдаёт скачанные товары (для повторного обхода по расписанию RecrawlScheduler).
+
+        :param urls: Ссылки на товары.
+        :return: Количество переоткрытых записей.
+        """
+        now = time.time()
+        rows = [(PENDING, now, product_id_from_url(url), DONE) for url in urls]
+        with metrics.timer("ledger.update"), self._lock, self._connection:
+            before = self._connection.total_changes
+            self._connection.executemany(
+                "UPDATE links SET status = ?, attempts = 0, updated_at = ?, error = NULL "
+                "WHERE product_id = ? AND status = ?",
+                rows)
+            return self._connection.total_changes - before
+
+    def status(self, url: str):
+        """
+        Статус товара или None, если его нет в журнале.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT status FROM links WHERE product_id = ?", (product_id_from_url(url),)).fetchone()
+        return row[0] if row else None
+
+    def is_done(self, url: str) -> bool:
+        return self.status(url) == DONE
+
+    def counts(self) -> dict:
+        """
+        Количество записей по статусам.
+        """
+        with self._lock:
+            rows = self._connection.execute("SELECT status, COUNT(*) FROM links GROUP BY status").fetchall()
+        counts = {PENDING: 0, IN_FLIGHT: 0, DONE: 0, FAILED: 0}
+        counts.update(rows)
+        return counts
+
+    def import_used_links(self, used_links_file: str) -> int:
+        """
+        Переносит ссылки из старого used_links.txt со статусом done.
+        Файл импортируется повторно, только если он изменился с прошлого импорта.
+
+        :param used_links_file: Путь к файлу использованных ссылок.
+        :return: Количество новых записей.
+        """
+        if not os.path.exists(used_links_file):
+            return 0
+
+        path = os.path.abspath(used_links_file)
+        stat = os.stat(path)
+        with self._lock:
+            row = self._connection.execute("SELECT size, mtime FROM imports WHERE path = ?", (path,)).fetchone()
+        if row == (stat.st_size, stat.st_mtime):
+            return 0
+
+        now = time.time()
+        with open(path, "r", encoding="utf-8") as file:
+            rows = [(product_id_from_url(url), url, DONE, now, now) for url in file.read().splitlines() if url]
+        with self._lock, self._connection:
+            before = self._connection.total_changes
+            self._connection.executemany(
+                """
+                INSERT INTO links (product_id, url, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(product_id) DO UPDATE SET status = excluded.status, updated_at = excluded.updated_at
+                WHERE links.status != excluded.status
+                """,
+                rows)
+            imported = self._connection.total_changes - before
+            self._connection.execute(
+                "INSERT OR REPLACE INTO imports (path, size, mtime) VALUES (?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime))
+        return imported
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
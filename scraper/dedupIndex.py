@@ -0,0 +1,73 @@
+import hashlib
+import math
+import threading
+from scraper.productUrl import product_id_from_url
+
+
+class BloomFilter:
+    def __init__(self, expected_items: int, false_positive_rate: float = 0.001):
+        """
+        Фильтр Блума: компактное множество с вероятностью ложного «уже есть»
+        не выше false_positive_rate и без ложных «нет».
+
+        :param expected_items: Ожидаемое количество элементов.
+        :param false_positive_rate: Допустимая доля ложных срабатываний.
+        """
+        expected_items = max(1, expected_items)
+        self.size = max(8, int(-expected_items * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / expected_items * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        # Двойное хеширование: k позиций из двух половин одного 128-битного хеша
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class ProductDedupIndex:
+    def __init__(self, expected_items: int = None, false_positive_rate: float = 0.001):
+        """
+        Индекс уже встреченных товаров по артикулу. Ссылки на один товар
+        с разными параметрами запроса считаются одним товаром.
+
+        :param expected_items: Если задано — вместо множества используется фильтр Блума
+                               на это количество элементов (для очень больших обходов;
+                               изредка новый товар может быть принят за уже встреченный).
+        :param false_positive_rate: Доля ложных срабатываний фильтра Блума.
+        """
+        self._seen = BloomFilter(expected_items, false_positive_rate) if expected_items else set()
+        self._lock = threading.Lock()
+
+    def add(self, url: str) -> bool:
+        """
+        Отмечает товар встреченным.
+
+        :param url: Ссылка на товар.
+        :return: True, если товар встречен впервые.
+        """
+        key = product_id_from_url(url)
+        with self._lock:
+            if key in self._seen:
+                return False
+            self._seen.add(key)
+            return True
+
+    def __contains__(self, url: str) -> bool:
+        key = product_id_from_url(url)
+        with self._lock:
+            return key in self._seen
+
+    def filter(self, urls) -> list:
+        """
+        Оставляет по одной ссылке на каждый ещё не встреченный товар, сохраняя порядок.
+        """
+        return [url for url in urls if self.add(url)]
@@ -0,0 +1,208 @@
+import heapq
+import itertools
+import threading
+import time
+from htmlParser.listingPageParser import ListingPageParser, listing_key, page_number
+from logs.logger import Logger
+from logs.metrics import metrics
+from scraper.dedupIndex import ProductDedupIndex
+from scraper.httpFetcher import HTTPPageFetcher, is_block_page
+from scraper.rateLimiter import RateLimiter
+from scraper.throughputController import BLOCKED, ERROR, OK, ThroughputController
+
+
+class DiscoveryFrontier:
+    def __init__(self, max_depth: int = 1, max_pages_per_listing: int = 20, max_listings: int = 1000):
+        """
+        Очередь страниц списков с приоритетом и без повторов. Раньше выдаются страницы
+        меньшей глубины и с меньшим номером: сначала первые страницы стартовых разделов,
+        потом их продолжения и вложенные разделы.
+
+        :param max_depth: Глубина переходов по ссылкам на разделы от стартовых страниц (0 — только стартовые).
+        :param max_pages_per_listing: Сколько страниц пагинации обходить в одном разделе.
+        :param max_listings: Сколько всего страниц списков можно обойти.
+        """
+        self.max_depth = max_depth
+        self.max_pages_per_listing = max_pages_per_listing
+        self.max_listings = max_listings
+        self._heap = []
+        self._seen = set()
+        self._counter = itertools.count()
+        self._in_progress = 0
+        self._condition = threading.Condition()
+
+    def push(self, url: str, depth: int = 0) -> bool:
+        """
+        Добавляет страницу списка, если она ещё не встречалась и не превышены ограничения.
+
+        :return: True, если страница добавлена.
+        """
+        page = page_number(url)
+        if depth > self.max_depth or page > self.max_pages_per_listing:
+            return False
+        key = listing_key(url) or url
+        with self._condition:
+            if key in self._seen or len(self._seen) >= self.max_listings:
+                return False
+            self._seen.add(key)
+            heapq.heappush(self._heap, (depth, page, next(self._counter), url))
+            self._condition.notify()
+            return True
+
+    def pop(self):
+        """
+        Берёт следующую страницу. Ждёт, пока очередь пуста, но другие потоки ещё
+        обрабатывают страницы (они могут добавить новые).
+
+        :return: Пара (ссылка, глубина) или None, если обход закончен.
+        """
+        with self._condition:
+            while not self._heap:
+                if self._in_progress == 0:
+                    return None
+                self._condition.wait()
+            depth, _, _, url = heapq.heappop(self._heap)
+            self._in_progress += 1
+            return url, depth
+
+    def task_done(self):
+        with self._condition:
+            self._in_progress -= 1
+            self._condition.notify_all()
+
+
+class DiscoveryCrawler:
+    def __init__(self, seeds: list, workers: int = 2, max_depth: int = 1, max_pages_per_listing: int = 20,
+                 max_listings: int = 1000, per_host_delay: float = 1.0, max_requests_per_minute: float = None,
+                 fetch_page=None, dedup_index: ProductDedupIndex = None, rate_limiter: RateLimiter = None,
+                 controller: ThroughputController = None, log_file: str = "log.txt"):
+        """
+        Поиск товаров по страницам каталога и поиска: обходит стартовые разделы, их пагинацию
+        (включая токены бесконечной прокрутки) и вложенные разделы, и сразу передаёт каждую
+        новую ссылку на товар в обработчик — например, в очередь скачивания BatchDownloader.
+
+        :param seeds: Стартовые страницы (категории, поиск, главная).
+        :param workers: Количество потоков загрузки страниц списков.
+        :param max_depth: Глубина переходов по ссылкам на разделы.
+        :param max_pages_per_listing: Сколько страниц пагинации обходить в одном разделе.
+        :param max_listings: Сколько всего страниц списков можно обойти.
+        :param per_host_delay: Минимальная пауза (в секундах) между запросами к одному хосту.
+        :param max_requests_per_minute: Общий бюджет запросов в минуту. None — без ограничения.
+        :param fetch_page: Функция url -> HTML-код или None. None — загрузка по HTTP (HTTPPageFetcher).
+        :param dedup_index: Индекс уже известных товаров (например, заполненный ссылками из файла).
+        :param rate_limiter: Общий ограничитель частоты (например, ограничитель BatchDownloader, чтобы
+                             обход и скачивание делили один бюджет запросов). None — свой, из
+                             per_host_delay и max_requests_per_minute.
+        :param controller: Регулятор скорости, общий со скачиванием: запросы страниц списков ждут его
+                           разрешения (и замкнутого предохранителя) и сообщают ему свой исход.
+        :param log_file: Имя файла для записи логов.
+        """
+        self.seeds = list(seeds)
+        self.workers = max(1, workers)
+        self.frontier = DiscoveryFrontier(max_depth, max_pages_per_listing, max_listings)
+        self.rate_limiter = rate_limiter or RateLimiter(per_host_delay, max_requests_per_minute)
+        self.controller = controller
+        self.dedup_index = dedup_index if dedup_index is not None else ProductDedupIndex()
+        self.logger = Logger(log_file)
+        self.stats = {"listings": 0, "failed": 0, "products": 0}
+
+        self._http_fetcher = HTTPPageFetcher(pool_size=self.workers) if fetch_page is None else None
+        self.fetch_page = fetch_page
+        self._lock = threading.Lock()
+
+    def _fetch(self, url: str) -> tuple:
+        """
+        :return: Пара (HTML-код или None, исход запроса для регулятора скорости).
+        """
+        if self._http_fetcher:
+            status, html = self._http_fetcher.fetch(url, check_complete=False)
+            if status == "ok":
+                return html, OK
+            return None, BLOCKED if status == "blocked" else ERROR
+        html = self.fetch_page(url)
+        if html and is_block_page(html):
+            return None, BLOCKED
+        return html, OK if html else ERROR
+
+    def _fetch_with_controller(self, url: str):
+        if not self.controller:
+            return self._fetch(url)[0]
+
+        self.controller.acquire()
+        outcome, latency = ERROR, None
+        start_time = time.monotonic()
+        try:
+            html, outcome = self._fetch(url)
+            latency = time.monotonic() - start_time
+            return html
+        finally:
+            # Страницы списков тяжелее страниц товаров, поэтому их задержка учитывается отдельно
+            self.controller.release(outcome, latency, "listing")
+
+    def _count(self, key: str, value: int = 1):
+        with self._lock:
+            self.stats[key] += value
+
+    def _worker(self, on_product):
+        while True:
+            item = self.frontier.pop()
+            if item is None:
+                return
+            url, depth = item
+            try:
+                self._visit(url, depth, on_product)
+            except Exception as e:
+                self._count("failed")
+                self.logger.error(f"Ошибка при обходе страницы списка: {e}", url=url, stage="discovery")
+            finally:
+                self.frontier.task_done()
+
+    def _visit(self, url: str, depth: int, on_product):
+        with metrics.timer("rate_limit_wait"):
+            self.rate_limiter.wait(url)
+        with metrics.timer("discovery.fetch"):
+            html = self._fetch_with_controller(url)
+        if not html:
+            self._count("failed")
+            self.logger.warning("Страница списка не загружена", url=url, stage="discovery")
+            return
+
+        with metrics.timer("discovery.extract"):
+            parser = ListingPageParser(html, url)
+            products = self.dedup_index.filter(parser.get_product_links())
+            next_page = parser.get_next_page()
+            listings = parser.get_listing_links() if depth < self.frontier.max_depth else []
+
+        self._count("listings")
+        self._count("products", len(products))
+        self.logger.debug(f"Найдено новых товаров: {len(products)}", url=url, stage="discovery",
+                          depth=depth, products=len(products))
+
+        # Продолжение раздела — на той же глубине, вложенные разделы — на следующей
+        if next_page:
+            self.frontier.push(next_page, depth)
+        for listing in listings:
+            self.frontier.push(listing, depth + 1)
+        for product_url in products:
+            on_product(product_url)
+
+    def run(self, on_product) -> dict:
+        """
+        Обходит страницы списков до исчерпания очереди.
+
+        :param on_product: Функция, вызываемая для каждой новой ссылки на товар (из потоков обхода).
+        :return: Статистика: обработано страниц списков, ошибок, найдено товаров.
+        """
+        for seed in self.seeds:
+            self.frontier.push(seed, 0)
+
+        threads = [threading.Thread(target=self._worker, args=(on_product,), name=f"discovery-{index}", daemon=True)
+                   for index in range(1, self.workers + 1)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if self._http_fetcher:
+            self._http_fetcher.close()
+        return dict(self.stats)
@@ -0,0 +1,144 @@
+import threading
+import time
+from logs.logger import Logger
+
+
+class DriverPool:
+    def __init__(self, driver_factory, size: int = 1, max_pages_per_driver: int = 50, log_file: str = "log.txt"):
+        """
+        Пул долгоживущих драйверов, которые PageDownloader берёт во временное пользование.
+
+        :param driver_factory: Функция без аргументов, создающая новый драйвер.
+        :param size: Максимальное количество одновременно запущенных драйверов.
+        :param max_pages_per_driver: Через сколько страниц драйвер перезапускается.
+        :param log_file: Имя файла для записи логов.
+        """
+        self.driver_factory = driver_factory
+        self.size = size
+        self.max_pages_per_driver = max_pages_per_driver
+        self.logger = Logger(log_file)
+
+        self._idle = []          # Свободные драйверы
+        self._pages = {}         # id(driver) -> количество обработанных страниц
+        self._created = 0        # Сколько драйверов сейчас живо (свободных и занятых)
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _start_driver(self):
+        """
+        Запуск нового драйвера с замером времени старта.
+        """
+        start_time = time.time()
+        driver = self.driver_factory()
+        self._pages[id(driver)] = 0
+        self.logger.info(f"Запущен новый драйвер за {time.time() - start_time:.2f} секунд")
+        return driver
+
+    def _quit_driver(self, driver):
+        """
+        Закрытие драйвера без выброса исключений.
+        """
+        self._pages.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception as e:
+            self.logger.warning(f"Ошибка при закрытии драйвера: {e}")
+
+    @staticmethod
+    def is_healthy(driver) -> bool:
+        """
+        Проверяет, что браузер отвечает на команды.
+
+        :param driver: Драйвер для проверки.
+        :return: True, если драйвер жив.
+        """
+        try:
+            driver.execute_script("return document.readyState")
+            return True
+        except Exception:
+            return False
+
+    def acquire(self):
+        """
+        Выдаёт драйвер из пула. Если свободных нет, запускает новый
+        или ждёт, пока другой пользователь вернёт свой.
+
+        :return: Готовый к работе драйвер.
+        """
+        while True:
+            with self._condition:
+                if self._closed:
+                    raise RuntimeError("Пул драйверов закрыт")
+
+                if self._idle:
+                    driver = self._idle.pop()
+                elif self._created < self.size:
+                    self._created += 1
+                    driver = None
+                else:
+                    self._condition.wait()
+                    continue
+
+            if driver is None:
+                try:
+                    return self._start_driver()
+                except Exception:
+                    with self._condition:
+                        self._created -= 1
+                        self._condition.notify()
+                    raise
+
+            # Проверка состояния между использованиями
+            if self.is_healthy(driver):
+                return driver
+
+            self.logger.warning("Драйвер не отвечает, перезапуск")
+            self._quit_driver(driver)
+            with self._condition:
+                self._created -= 1
+                self._condition.notify()
+
+    def release(self, driver, failed: bool = False):
+        """
+        Возвращает драйвер в пул. Драйвер закрывается, если при работе с ним
+        произошла ошибка или он отработал лимит страниц.
+
+        :param driver: Драйвер, полученный через acquire().
+        :param failed: True, если страница завершилась с ошибкой.
+        """
+        pages = self._pages.get(id(driver), 0) + 1
+        self._pages[id(driver)] = pages
+
+        recycle = failed or pages >= self.max_pages_per_driver or self._closed
+        if recycle:
+            reason = "ошибка" if failed else f"обработано {pages} страниц"
+            self.logger.info(f"Перезапуск драйвера ({reason})")
+            self._quit_driver(driver)
+
+        with self._condition:
+            if recycle:
+                self._created -= 1
+            else:
+                self._idle.append(driver)
+            self._condition.notify()
+
+    def close(self):
+        """
+        Закрывает все свободные драйверы. Занятые закроются при возврате.
+        """
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+            self._condition.notify_all()
+
+        for driver in idle:
+            self._quit_driver(driver)
+        if idle:
+            self.logger.info(f"Пул драйверов закрыт, остановлено драйверов: {len(idle)}")
@@ -0,0 +1,194 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from htmlParser.selectorConfig import DEFAULT_CONFIG_FILE, load_selector_config
+from logs.logger import Logger
+from logs.metrics import metrics
+
+try:
+    # HTTP/2 доступен, только если установлен httpx с поддержкой h2
+    import httpx
+    import h2  # noqa: F401
+except ImportError:
+    httpx = None
+
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+                  "Chrome/124.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "ru-RU,ru;q=0.9,en;q=0.8",
+    "Accept-Encoding": ACCEPT_ENCODING,
+    "Connection": "keep-alive",
+}
+
+# Признаки страницы антибота вместо страницы товара
+BLOCK_MARKERS = ("Antibot Challenge", "Доступ ограничен", "captcha-container", "/abt/result")
+BLOCK_STATUS_CODES = (403, 429, 503)
+
+
+def is_block_page(html: str) -> bool:
+    """
+    Проверяет, не страница ли это антибота (по маркерам в начале документа).
+    """
+    head = html[:20000]
+    return any(marker in head for marker in BLOCK_MARKERS)
+
+
+class HTTPPageFetcher:
+    def __init__(self, timeout: float = 15.0, pool_size: int = 10, http2: bool = True,
+                 required_sections: tuple = ("title", "price"), config_file: str = None, log_file: str = "log.txt"):
+        """
+        Загрузка страниц товара обычным HTTP-клиентом с пулом keep-alive соединений,
+        без запуска браузера.
+
+        :param timeout: Таймаут запроса в секундах.
+        :param pool_size: Максимальное количество соединений к одному хосту.
+        :param http2: Использовать HTTP/2, если установлен httpx[http2].
+        :param required_sections: Селекторы из config.json, которые должны быть в ответе,
+                                  чтобы страница считалась полной.
+        :param config_file: Конфиг селекторов. None — htmlParser/configUpdater/config.json.
+        :param log_file: Имя файла для записи логов.
+        """
+        self.timeout = timeout
+        self.required_sections = required_sections
+        self.config_file = config_file or DEFAULT_CONFIG_FILE
+        self.logger = Logger(log_file)
+
+        if http2 and httpx is not None:
+            self.client = httpx.Client(http2=True, headers=DEFAULT_HEADERS, timeout=timeout, follow_redirects=True,
+                                       limits=httpx.Limits(max_connections=pool_size,
+                                                           max_keepalive_connections=pool_size))
+        else:
+            self.client = requests.Session()
+            self.client.headers.update(DEFAULT_HEADERS)
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+            self.client.mount("https://", adapter)
+            self.client.mount("http://", adapter)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def is_blocked(self, status_code: int, html: str) -> bool:
+        """
+        Проверяет, не вернул ли сайт страницу блокировки.
+        """
+        return status_code in BLOCK_STATUS_CODES or is_block_page(html)
+
+    def is_complete(self, html: str) -> bool:
+        """
+        Проверяет, что в ответе есть разметка нужных секций (по классам из config.json).
+        """
+        # Конфиг перечитывается только после изменения файла, поэтому обновление селекторов подхватывается сразу
+        selectors = load_selector_config(self.config_file)
+        for name in self.required_sections:
+            class_value = getattr(selectors, name).class_value
+            if class_value and f'class="{class_value}"' not in html:
+                return False
+        return True
+
+    def fetch(self, url: str, check_complete: bool = True):
+        """
+        Загружает страницу и проверяет её содержимое.
+
+        :param url: URL страницы товара.
+        :param check_complete: Проверять ли наличие секций товара (не нужно, например, для страниц отзывов).
+        :return: Пара (статус, HTML). Статус: "ok", "blocked", "incomplete" или "error".
+        """
+        try:
+            with metrics.timer("http_fetch"):
+                response = self.client.get(url, timeout=self.timeout)
+                html = response.text
+        except Exception as e:
+            self.logger.warning(f"HTTP-ошибка для {url}: {e}", url=url, stage="http")
+            return "error", None
+
+        if self.is_blocked(response.status_code, html):
+            return "blocked", None
+        if response.status_code != 200 or (check_complete and not self.is_complete(html)):
+            return "incomplete", None
+        return "ok", html
+
+    def close(self):
+        self.client.close()
+
+
+class TieredPageFetcher:
+    def __init__(self, http_fetcher: HTTPPageFetcher = None, browser_fallback: bool = True):
+        """
+        Многоуровневая загрузка: сначала быстрый HTTP-запрос, браузер — только если
+        HTTP-ответ заблокирован или неполный. Ведёт статистику по уровням.
+
+        :param http_fetcher: HTTP-клиент. None — HTTP-уровень отключён.
+        :param browser_fallback: Переходить ли к браузеру при неудаче HTTP.
+        """
+        self.http_fetcher = http_fetcher
+        self.browser_fallback = browser_fallback
+        self.stats = {"http": 0, "browser": 0, "failed": 0, "blocked": 0, "incomplete": 0, "error": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, *keys):
+        with self._lock:
+            for key in keys:
+                self.stats[key] += 1
+
+    def fetch(self, url: str, browser_fetch, use_http: bool = True):
+        """
+        Загружает страницу товара.
+
+        :param url: URL страницы товара.
+        :param browser_fetch: Функция без аргументов, загружающая страницу через браузер.
+        :param use_http: Пробовать ли HTTP-уровень для этой страницы.
+        :return: HTML-код страницы или None.
+        """
+        return self.fetch_page(url, browser_fetch, use_http)[0]
+
+    def fetch_page(self, url: str, browser_fetch, use_http: bool = True):
+        """
+        Загружает страницу товара и сообщает, как она получена (для ThroughputController).
+
+        :return: Тройка (HTML-код или None, "http"/"browser"/None, была ли блокировка на каком-либо уровне).
+        """
+        blocked = False
+        if self.http_fetcher and use_http:
+            status, html = self.http_fetcher.fetch(url)
+            if status == "ok":
+                self._count("http")
+                return html, "http", False
+            self._count(status)
+            blocked = status == "blocked"
+
+        if not self.browser_fallback:
+            self._count("failed")
+            return None, None, blocked
+
+        html = browser_fetch()
+        if html and is_block_page(html):
+            # Браузер тоже получил страницу антибота: парсить нечего
+            self._count("blocked")
+            html, blocked = None, True
+        self._count("browser" if html else "failed")
+        return html, "browser" if html else None, blocked
+
+    def report(self) -> str:
+        """
+        Итоговая статистика запуска: сколько страниц получено по HTTP, сколько через браузер.
+        """
+        with self._lock:
+            stats = dict(self.stats)
+        total = stats["http"] + stats["browser"] + stats["failed"]
+        if total == 0:
+            return "Страницы не загружались."
+        return (f"HTTP: {stats['http']} ({stats['http'] / total:.0%}), "
+                f"браузер: {stats['browser']} ({stats['browser'] / total:.0%}), "
+                f"ошибки: {stats['failed']}. "
+                f"Причины перехода на браузер: блокировка {stats['blocked']}, "
+                f"неполная страница {stats['incomplete']}, ошибка запроса {stats['error']}")
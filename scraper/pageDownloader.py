@@ -1,24 +1,62 @@
 import time
 import random
 import os
-import speedtest
 import undetected_chromedriver as uc
 from selenium.webdriver import ActionChains
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+from htmlParser.selectorConfig import DEFAULT_CONFIG_FILE, load_selector_config
+from scraper.productUrl import product_name_from_url
 from logs.logger import Logger
+from logs.metrics import metrics
+
+# Шаблоны URL для блокировки через DevTools (Network.setBlockedURLs) по типам ресурсов
+RESOURCE_BLOCK_PATTERNS = {
+    "image": ["*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico"],
+    "font": ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"],
+    "media": ["*.mp4", "*.webm", "*.m3u8", "*.ts", "*.mp3"],
+    "tracker": [
+        "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+        "*mc.yandex.ru*", "*top-fwz1.mail.ru*", "*vk.com/rtrg*", "*facebook.net*",
+    ],
+}
+DEFAULT_BLOCKED_RESOURCES = ("image", "font", "media", "tracker")
+
+
 class PageDownloader:
-    def __init__(self, url: str, download_path: str, log_file: str = "log.txt"):
+    def __init__(self, url: str, download_path: str, log_file: str = "log.txt", driver_pool=None,
+                 load_mode: str = "adaptive", jitter_budget: float = 2.0, ready_timeout: float = 20.0,
+                 lean_fetch: bool = False, blocked_resources: tuple = DEFAULT_BLOCKED_RESOURCES,
+                 skip_image_decoding: bool = False, selector_config_file: str = None):
         """
         Инициализация класса PageDownloader.
 
         :param url: URL страницы для загрузки.
+        :param driver_pool: Пул драйверов (DriverPool). Если не задан, драйвер запускается заново.
+        :param load_mode: "adaptive" — ждать готовности страницы по событиям,
+                          "human" — фиксированная эмуляция поведения пользователя с паузами.
+        :param jitter_budget: Суммарный бюджет случайных пауз (в секундах) в режиме "adaptive". 0 — без пауз.
+        :param ready_timeout: Максимальное время ожидания одного сигнала готовности.
+        :param lean_fetch: Не загружать тяжёлые ресурсы (используется, если драйвер запускается без пула).
+        :param blocked_resources: Типы блокируемых ресурсов: "image", "font", "media", "tracker".
+        :param skip_image_decoding: Не декодировать и не отрисовывать картинки (отдельно от блокировки их загрузки).
+        :param selector_config_file: Конфиг селекторов для ожидания готовности. None — htmlParser/configUpdater/config.json.
         """
         self.download_path = download_path
         self.url = url
-        self.logger = Logger(log_file)
+        self.logger = Logger(log_file, url=url)
+        self.driver_pool = driver_pool
+        self.load_mode = load_mode
+        self.jitter_budget = jitter_budget
+        self.ready_timeout = ready_timeout
+        self.lean_fetch = lean_fetch
+        self.blocked_resources = blocked_resources
+        self.skip_image_decoding = skip_image_decoding
+        self.selector_config_file = selector_config_file or DEFAULT_CONFIG_FILE
         self.driver = None
+        self.failed = False
 
     def __enter__(self):
         """
@@ -33,9 +71,20 @@ class PageDownloader:
         """
         self.close_driver()
 
-    def setup_driver(self):
+    @staticmethod
+    @metrics.timed("driver_start")
+    def create_driver(lean_fetch: bool = False, blocked_resources: tuple = DEFAULT_BLOCKED_RESOURCES,
+                      skip_image_decoding: bool = False):
         """
-        Настройка undetected_chromedriver для обхода блокировок.
+        Создание undetected_chromedriver для обхода блокировок.
+
+        :param lean_fetch: Блокировать тяжёлые ресурсы: нам нужен только page_source,
+                           поэтому картинки, шрифты, видео и аналитика не загружаются.
+        :param blocked_resources: Типы блокируемых ресурсов (ключи RESOURCE_BLOCK_PATTERNS).
+        :param skip_image_decoding: Отключить картинки в движке страницы (blink-settings): они не
+                                    декодируются и не отрисовываются. Настраивается отдельно от
+                                    блокировки загрузки "image", чтобы выбирать одно, другое или оба.
+        :return: Новый экземпляр uc.Chrome.
         """
         options = uc.ChromeOptions()
 
@@ -50,11 +99,51 @@ class PageDownloader:
         # Запуск браузера в фоновом режиме (headless)
         options.headless = False  # Браузер не будет открываться визуально
 
+        if lean_fetch:
+            PageDownloader._add_lean_options(options, blocked_resources)
+        if skip_image_decoding:
+            options.add_argument("--blink-settings=imagesEnabled=false")
+
         # Инициализация undetected_chromedriver
-        self.driver = uc.Chrome(options=options)
+        driver = uc.Chrome(options=options)
+
+        if lean_fetch:
+            patterns = [pattern for resource in blocked_resources for pattern in RESOURCE_BLOCK_PATTERNS[resource]]
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+        return driver
+
+    @staticmethod
+    def _add_lean_options(options, blocked_resources: tuple):
+        """
+        Настройки Chrome, отключающие загрузку тяжёлых ресурсов. Видео и аудио блокируются
+        шаблонами URL через DevTools (у Chrome нет настройки профиля, запрещающей их загрузку),
+        здесь только отключается автовоспроизведение.
+        """
+        prefs = {}
+        if "image" in blocked_resources:
+            prefs["profile.managed_default_content_settings.images"] = 2
+        if "font" in blocked_resources:
+            options.add_argument("--disable-remote-fonts")
+        if "media" in blocked_resources:
+            options.add_argument("--autoplay-policy=user-gesture-required")
+            options.add_argument("--mute-audio")
+        if prefs:
+            options.add_experimental_option("prefs", prefs)
+
+    def setup_driver(self):
+        """
+        Получение драйвера: из пула, если он задан, иначе запуск нового.
+        """
+        if self.driver_pool:
+            # Включает ожидание свободного драйвера и запуск нового
+            with metrics.timer("driver_acquire"):
+                self.driver = self.driver_pool.acquire()
+        else:
+            self.driver = self.create_driver(self.lean_fetch, self.blocked_resources, self.skip_image_decoding)
 
     def _smooth_scroll(self):
-        self.logger.log("Начало прокрутки страницы")
+        self.logger.debug("Начало прокрутки страницы", stage="scroll")
         """Плавная прокрутка с общей продолжительностью ~n секунд"""
 
         start_time = time.time()
@@ -108,7 +197,7 @@ class PageDownloader:
         time.sleep(random.uniform(1, 1.5))
         self.driver.execute_script("window.scrollTo({top: 0, behavior: 'smooth'})")
         time.sleep(random.uniform(1, 2))
-        self.logger.log("Окончание прокрутки страницы")
+        self.logger.debug("Окончание прокрутки страницы", stage="scroll")
 
     def emulate_human_behavior(self):
         """Обновленный метод с учетом времени"""
@@ -127,6 +216,90 @@ class PageDownloader:
         # Финальная пауза перед сохранением
         time.sleep(random.uniform(2, 3))
 
+    def _jitter(self, share: float):
+        """
+        Случайная пауза, занимающая долю share от бюджета jitter_budget.
+        """
+        if self.jitter_budget > 0:
+            time.sleep(random.uniform(0, self.jitter_budget * share))
+
+    def _wait_for(self, condition, timeout: float = None) -> bool:
+        """
+        Ожидание условия WebDriverWait без выброса исключения по таймауту.
+
+        :return: True, если условие выполнилось.
+        """
+        try:
+            WebDriverWait(self.driver, timeout or self.ready_timeout, poll_frequency=0.2).until(condition)
+            return True
+        except TimeoutException:
+            return False
+
+    def _wait_stable(self, script: str, stable_for: float = 0.5, timeout: float = None) -> bool:
+        """
+        Ждёт, пока значение JS-выражения перестанет меняться в течение stable_for секунд.
+
+        :param script: JS-код, возвращающий число или строку.
+        :return: True, если значение стабилизировалось до таймаута.
+        """
+        deadline = time.time() + (timeout or self.ready_timeout)
+        last_value = self.driver.execute_script(script)
+        stable_since = time.time()
+        while time.time() < deadline:
+            time.sleep(0.1)
+            value = self.driver.execute_script(script)
+            if value != last_value:
+                last_value = value
+                stable_since = time.time()
+            elif time.time() - stable_since >= stable_for:
+                return True
+        return False
+
+    def wait_until_ready(self):
+        """
+        Ожидание полной загрузки страницы по конкретным сигналам вместо фиксированных пауз:
+        загружен документ и заголовок товара, подгружены характеристики и отзывы
+        (для этого страница прокручивается вниз), высота страницы и число сетевых
+        запросов перестали меняться.
+        """
+        # Конфиг перечитывается после изменения файла, поэтому селекторы, исправленные
+        # SelectorDriftGuard во время загрузки, подхватываются со следующей страницы
+        selectors = load_selector_config(self.selector_config_file)
+
+        with metrics.timer("wait.ready"):
+            self._wait_for(lambda driver: driver.execute_script("return document.readyState") == "complete")
+            if not self._wait_for(EC.presence_of_element_located((By.CSS_SELECTOR, selectors.title.css))):
+                self.logger.warning("Заголовок товара не появился, страница может быть заблокирована", stage="wait")
+        with metrics.timer("jitter"):
+            self._jitter(0.3)
+
+        # Отзывы и характеристики подгружаются при прокрутке: листаем вниз,
+        # пока не появится список отзывов или пока высота страницы не перестанет расти
+        self.logger.debug("Начало прокрутки страницы", stage="scroll")
+        reviews_css = selectors.reviews_container.css
+        last_height = 0
+        unchanged_steps = 0
+        deadline = time.time() + self.ready_timeout
+        with metrics.timer("scroll"):
+            while time.time() < deadline and unchanged_steps < 3:
+                height = self.driver.execute_script(
+                    "window.scrollBy(0, window.innerHeight); return document.body.scrollHeight")
+                if self.driver.find_elements(By.CSS_SELECTOR, reviews_css):
+                    break
+                unchanged_steps = unchanged_steps + 1 if height == last_height else 0
+                last_height = height
+                time.sleep(0.15)
+
+        with metrics.timer("wait.settle"):
+            self._wait_for(EC.presence_of_element_located((By.CSS_SELECTOR, selectors.characteristics_container.css)),
+                           timeout=2)
+            self._wait_stable("return document.body.scrollHeight")
+            # Сеть считается свободной, когда количество загруженных ресурсов перестало расти
+            self._wait_stable("return performance.getEntriesByType('resource').length")
+        self.logger.debug("Окончание прокрутки страницы", stage="scroll")
+        with metrics.timer("jitter"):
+            self._jitter(0.7)
+
     def extract_product_name_from_url(self):
         """
         Извлечение названия продукта из URL.
@@ -137,56 +310,75 @@ class PageDownloader:
 
         :return: Название продукта.
         """
-        # Извлекаем часть URL после /product/
-        product_part = self.url.split("/product/")[-1]
-
-        # Удаляем параметры запроса (всё после ?)
-        product_name = product_part.split("?")[0]
-
-        # Удаляем слеши в конце, если они есть
-        product_name = product_name.rstrip("/")
+        return product_name_from_url(self.url)
 
-        return product_name
+    def download_html(self):
+        """
+        Загружает страницу в браузере и возвращает её HTML-код без записи на диск.
 
-    def save_html_to_file(self):
+        :return: HTML-код страницы или None при ошибке.
+        """
         if not self.driver:
             raise RuntimeError("Драйвер не инициализирован")
 
         try:
-            self.logger.log(f"Начало загрузки страницы: {self.url}")
+            self.logger.debug(f"Начало загрузки страницы: {self.url}", stage="get")
             start_time = time.time()  # Засекаем время начала загрузки
-            self.driver.get(self.url)
-
-
+            with metrics.timer("get"):
+                self.driver.get(self.url)
+
+            # Ожидание загрузки страницы
+            if self.load_mode == "human":
+                with metrics.timer("emulate_human"):
+                    self.emulate_human_behavior()
+            else:
+                self.wait_until_ready()
+
+            with metrics.timer("page_source"):
+                html = self.driver.page_source
+            end_time = time.time()  # Засекаем время окончания загрузки
 
+            download_time = end_time - start_time
+            self.logger.info(f"Время загрузки страницы: {download_time:.2f} секунд", stage="get")
+            return html
 
-            # Эмуляция поведения
-            self.emulate_human_behavior()
+        except Exception as e:
+            self.failed = True
+            self.logger.error(f"Критическая ошибка: {str(e)}")
+            return None
 
+    def save_html_to_file(self):
+        html = self.download_html()
+        if html is None:
+            return None
 
+        try:
             # Сохранение
             product_name = self.extract_product_name_from_url()
             os.makedirs(self.download_path, exist_ok=True)
             file_path = os.path.join(self.download_path, f"{product_name}.html")
 
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(self.driver.page_source)
-            end_time = time.time()  # Засекаем время окончания загрузки
+            with metrics.timer("html_write"), open(file_path, "w", encoding="utf-8") as f:
+                f.write(html)
 
-            download_time = end_time - start_time
-            self.logger.log(f"Время загрузки страницы: {download_time:.2f} секунд")
-            self.logger.log(f"Страница успешно сохранена в {file_path}")
+            self.logger.info(f"Страница успешно сохранена в {file_path}", stage="save")
             return file_path
 
         except Exception as e:
-            self.logger.log(f"Критическая ошибка: {str(e)}")
+            self.logger.error(f"Критическая ошибка: {str(e)}")
             return None
 
     def close_driver(self):
         """
-        Закрытие драйвера.
+        Закрытие драйвера или его возврат в пул.
         """
-        if self.driver:
-            self.logger.log("Закрытие драйвера")
+        if not self.driver:
+            return
+
+        if self.driver_pool:
+            self.driver_pool.release(self.driver, failed=self.failed)
+        else:
+            self.logger.debug("Закрытие драйвера")
             self.driver.quit()
+        self.driver = None
 
@@ -0,0 +1,79 @@
+from collections import namedtuple
+from urllib.parse import urljoin, urlparse
+
+BASE_URL = "https://ozon.by"
+
+# Разобранная ссылка на товар: артикул, название продукта и каноническая ссылка без параметров
+ProductURL = namedtuple("ProductURL", ["sku", "slug", "url"])
+
+
+def parse_product_url(url: str, base_url: str = BASE_URL):
+    """
+    Разбирает ссылку на товар. Параметры запроса (__rr, abt_att, at, from_sku, tab и т.д.)
+    и фрагмент отбрасываются, относительные ссылки дополняются base_url.
+
+    Пример:
+    Вход: /product/krossovki-lexsan-1585614406/?__rr=1&abt_att=1&tab=reviews
+    Выход: ProductURL(sku="1585614406", slug="krossovki-lexsan-1585614406",
+                      url="https://ozon.by/product/krossovki-lexsan-1585614406/")
+
+    :param url: Ссылка на товар (абсолютная или относительная).
+    :param base_url: Адрес сайта для относительных ссылок.
+    :return: ProductURL или None, если это не ссылка на товар.
+    """
+    parsed = urlparse(urljoin(base_url, url.strip()))
+    segments = [segment for segment in parsed.path.split("/") if segment]
+    if "product" not in segments:
+        return None
+
+    index = segments.index("product")
+    if index + 1 >= len(segments):
+        return None
+
+    slug = segments[index + 1]
+    sku = slug.rsplit("-", 1)[-1]
+    if not sku.isdigit():
+        sku = slug
+    return ProductURL(sku, slug, f"{parsed.scheme or 'https'}://{parsed.netloc.lower()}/product/{slug}/")
+
+
+def canonical_url(url: str, base_url: str = BASE_URL) -> str:
+    """
+    Каноническая ссылка на товар без параметров запроса. Не-товарные ссылки возвращаются как есть.
+    """
+    product_url = parse_product_url(url, base_url)
+    return product_url.url if product_url else url
+
+
+def product_name_from_url(url: str) -> str:
+    """
+    Извлечение названия продукта из URL.
+
+    Пример:
+    Вход: https://ozon.by/product/krossovki-lexsan-1585614406/?__rr=1&abt_att=1
+    Выход: krossovki-lexsan-1585614406
+
+    :param url: Ссылка на товар.
+    :return: Название продукта.
+    """
+    product_url = parse_product_url(url)
+    if product_url:
+        return product_url.slug
+    # Не ссылка на товар: последний элемент пути
+    return url.split("?")[0].rstrip("/").split("/")[-1]
+
+
+def product_id_from_url(url: str) -> str:
+    """
+    Идентификатор товара из URL: артикул в конце названия продукта.
+    Ссылки на один товар с разными параметрами запроса дают один идентификатор.
+
+    Пример:
+    Вход: https://ozon.by/product/krossovki-lexsan-1585614406/?__rr=1&abt_att=1
+    Выход: 1585614406
+
+    :param url: Ссылка на товар.
+    :return: Артикул или название продукта, если артикула в URL нет.
+    """
+    product_url = parse_product_url(url)
+    return product_url.sku if product_url else product_name_from_url(url)
@@ -0,0 +1,43 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class RateLimiter:
+    def __init__(self, per_host_delay: float = 0.0, max_requests_per_minute: float = None):
+        """
+        Ограничитель частоты запросов, общий для всех потоков.
+
+        :param per_host_delay: Минимальная пауза (в секундах) между запросами к одному хосту.
+        :param max_requests_per_minute: Общий бюджет запросов в минуту на все хосты. None — без ограничения.
+        """
+        self.per_host_delay = per_host_delay
+        self.global_interval = 60.0 / max_requests_per_minute if max_requests_per_minute else 0.0
+        self._next_host_slot = {}   # хост -> время, раньше которого нельзя делать запрос
+        self._next_global_slot = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, url: str) -> float:
+        """
+        Резервирует ближайший свободный слот для запроса.
+
+        :param url: URL, к которому будет сделан запрос.
+        :return: Сколько секунд нужно подождать до запроса.
+        """
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_host_slot.get(host, 0.0), self._next_global_slot)
+            self._next_host_slot[host] = slot + self.per_host_delay
+            self._next_global_slot = slot + self.global_interval
+        return slot - now
+
+    def wait(self, url: str):
+        """
+        Блокирует поток до момента, когда запрос к URL разрешён.
+
+        :param url: URL, к которому будет сделан запрос.
+        """
+        delay = self.reserve(url)
+        if delay > 0:
+            time.sleep(delay)
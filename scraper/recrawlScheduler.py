@@ -0,0 +1,157 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from logs.metrics import metrics
+from scraper.productUrl import product_id_from_url
+
+# Количество отзывов в шапке товара: "4.5 • 269 отзывов". Число ищется только перед словом "отзыв",
+# поэтому регулярное выражение не прогоняется по всей странице
+REVIEW_COUNT_PATTERN = re.compile(r"(\d[\d\u00a0\u2009 ]*)(?:&nbsp;|\s)*$")
+REVIEW_WORD = "отзыв"
+
+HOUR = 3600.0
+DAY = 24 * HOUR
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS revisits (
+    product_id TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    interval REAL NOT NULL,
+    next_visit_at REAL NOT NULL,
+    last_visit_at REAL NOT NULL,
+    last_change_at REAL NOT NULL,
+    visits INTEGER NOT NULL DEFAULT 1,
+    changes INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS revisits_due ON revisits (next_visit_at);
+"""
+
+
+def review_count_from_html(html_code: str):
+    """
+    Количество отзывов из шапки страницы товара или None, если его нет.
+    """
+    position = html_code.find(REVIEW_WORD)
+    while position != -1:
+        match = REVIEW_COUNT_PATTERN.search(html_code, max(0, position - 40), position)
+        if match:
+            return int(re.sub(r"\D", "", match.group(1)))
+        position = html_code.find(REVIEW_WORD, position + len(REVIEW_WORD))
+    return None
+
+
+def product_fingerprint(price: str, review_count) -> str:
+    """
+    Короткий отпечаток полей, изменение которых требует повторного сбора товара.
+    """
+    return hashlib.blake2b(f"{price}|{review_count}".encode("utf-8"), digest_size=8).hexdigest()
+
+
+class RecrawlScheduler:
+    def __init__(self, db_path: str = "crawl_ledger.sqlite", initial_interval: float = DAY,
+                 min_interval: float = 6 * HOUR, max_interval: float = 30 * DAY,
+                 slowdown: float = 1.5, speedup: float = 0.5):
+        """
+        Расписание повторного обхода скачанных товаров. Для каждого товара хранится отпечаток
+        цены и количества отзывов с прошлого сбора и интервал до следующего визита:
+        если при визите отпечаток изменился, интервал умножается на speedup, если нет — на slowdown.
+        Так часто меняющиеся товары посещаются чаще, а неизменные — всё реже.
+
+        :param db_path: Путь к базе (по умолчанию — общий файл с журналом обхода).
+        :param initial_interval: Интервал после первого сбора, в секундах.
+        :param min_interval: Минимальный интервал, в секундах.
+        :param max_interval: Максимальный интервал, в секундах.
+        :param slowdown: Множитель интервала, если товар не изменился.
+        :param speedup: Множитель интервала, если товар изменился.
+        """
+        self.db_path = db_path
+        self.initial_interval = initial_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.slowdown = slowdown
+        self.speedup = speedup
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, timeout=30.0, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def observe(self, url: str, fingerprint: str, now: float = None) -> bool:
+        """
+        Учитывает результат визита и назначает следующий.
+
+        :param url: Ссылка на товар.
+        :param fingerprint: Отпечаток, полученный при визите (product_fingerprint).
+        :param now: Время визита. None — текущее.
+        :return: True, если товар новый или изменился с прошлого визита.
+        """
+        product_id = product_id_from_url(url)
+        now = time.time() if now is None else now
+        with metrics.timer("recrawl.observe"), self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT fingerprint, interval FROM revisits WHERE product_id = ?", (product_id,)).fetchone()
+            if row is None:
+                self._connection.execute(
+                    """
+                    INSERT INTO revisits (product_id, url, fingerprint, interval, next_visit_at, last_visit_at,
+                                          last_change_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (product_id, url, fingerprint, self.initial_interval, now + self.initial_interval, now, now))
+                return True
+
+            previous_fingerprint, interval = row
+            changed = fingerprint != previous_fingerprint
+            interval = min(self.max_interval, max(self.min_interval,
+                                                  interval * (self.speedup if changed else self.slowdown)))
+            self._connection.execute(
+                """
+                UPDATE revisits SET url = ?, fingerprint = ?, interval = ?, next_visit_at = ?, last_visit_at = ?,
+                    last_change_at = CASE WHEN ? THEN ? ELSE last_change_at END,
+                    visits = visits + 1, changes = changes + ?
+                WHERE product_id = ?
+                """,
+                (url, fingerprint, interval, now + interval, now, changed, now, int(changed), product_id))
+            return changed
+
+    def due(self, limit: int = None, now: float = None) -> list:
+        """
+        Товары, время повторного визита которых наступило, начиная с самых просроченных.
+
+        :param limit: Максимальное количество ссылок. None — все.
+        :param now: Текущее время. None — time.time().
+        :return: Список ссылок.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT url FROM revisits WHERE next_visit_at <= ? ORDER BY next_visit_at LIMIT ?",
+                (now, -1 if limit is None else limit)).fetchall()
+        return [url for url, in rows]
+
+    def stats(self) -> dict:
+        """
+        Сводка расписания: сколько товаров отслеживается, сколько ждут визита, средний интервал в часах.
+        """
+        with self._lock:
+            tracked, due, interval = self._connection.execute(
+                "SELECT COUNT(*), SUM(next_visit_at <= ?), AVG(interval) FROM revisits", (time.time(),)).fetchone()
+        return {"tracked": tracked, "due": due or 0, "mean_interval_hours": (interval or 0.0) / HOUR}
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
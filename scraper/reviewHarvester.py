@@ -0,0 +1,184 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+from htmlParser.htmlProductParser import PARSER_BACKENDS
+from htmlParser.selectorConfig import DEFAULT_CONFIG_FILE, load_selector_config
+from logs.logger import Logger
+from logs.metrics import metrics
+from scraper.httpFetcher import HTTPPageFetcher
+from scraper.productUrl import canonical_url, product_id_from_url, product_name_from_url
+from scraper.rateLimiter import RateLimiter
+
+# Сначала новые отзывы: обход товара останавливается на первом уже собранном отзыве
+NEWEST_FIRST = "published_at_desc"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS seen_reviews (
+    product_id TEXT NOT NULL,
+    review_key TEXT NOT NULL,
+    harvested_at REAL NOT NULL,
+    PRIMARY KEY (product_id, review_key)
+) WITHOUT ROWID;
+"""
+
+
+def review_key(review: dict) -> str:
+    """
+    Ключ отзыва: у отзывов на странице нет идентификатора, поэтому ключ строится из автора, даты и текста.
+    """
+    source = "\x1f".join(str(review.get(field, "")) for field in ("reviewer", "date", "comment"))
+    return hashlib.blake2b(source.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def reviews_url(product_url: str, page: int, sort: str = NEWEST_FIRST) -> str:
+    """
+    Ссылка на страницу отзывов товара: https://ozon.by/product/<slug>/reviews/?page=2&sort=...
+    """
+    query = {"page": page}
+    if sort:
+        query["sort"] = sort
+    return f"{canonical_url(product_url)}reviews/?{urlencode(query)}"
+
+
+class ReviewHarvester:
+    def __init__(self, sink, db_path: str = "crawl_ledger.sqlite", workers: int = 4, max_pages: int = 100,
+                 per_host_delay: float = 0.0, max_requests_per_minute: float = None, parser_backend: str = "lxml",
+                 selector_config_file: str = None, sort: str = NEWEST_FIRST, log_file: str = "log.txt"):
+        """
+        Сбор всех отзывов товара по страницам отзывов, без браузера и прокрутки.
+        Страницы запрашиваются по HTTP через общий пул соединений, новые отзывы сразу
+        передаются в приёмник (ProductSink.write_reviews). Ключи собранных отзывов хранятся
+        в базе, поэтому повторный сбор останавливается на первой странице с уже известным
+        отзывом и загружает только новые.
+
+        :param sink: Приёмник товаров (JSONConverter.productSinks).
+        :param db_path: База с ключами собранных отзывов (по умолчанию — общий файл с журналом обхода).
+        :param workers: Сколько товаров обрабатывать одновременно.
+        :param max_pages: Максимум страниц отзывов на товар.
+        :param per_host_delay: Минимальная пауза (в секундах) между запросами к одному хосту.
+        :param max_requests_per_minute: Общий бюджет запросов в минуту. None — без ограничения.
+        :param parser_backend: Реализация парсера: "bs4", "lxml" или "stream".
+        :param selector_config_file: Конфиг селекторов. None — htmlParser/configUpdater/config.json.
+        :param sort: Сортировка отзывов в запросе. Ранняя остановка корректна только для сортировки от новых к старым.
+        :param log_file: Имя файла для записи логов.
+        """
+        self.sink = sink
+        self.workers = max(1, workers)
+        self.max_pages = max_pages
+        self.parser_class = PARSER_BACKENDS[parser_backend]
+        self.selector_config_file = selector_config_file or DEFAULT_CONFIG_FILE
+        self.sort = sort
+        self.rate_limiter = RateLimiter(per_host_delay, max_requests_per_minute)
+        self.fetcher = HTTPPageFetcher(pool_size=self.workers, config_file=self.selector_config_file)
+        self.logger = Logger(log_file)
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, timeout=30.0, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _is_seen(self, product_id: str, key: str) -> bool:
+        with self._lock:
+            return self._connection.execute(
+                "SELECT 1 FROM seen_reviews WHERE product_id = ? AND review_key = ?", (product_id, key)
+            ).fetchone() is not None
+
+    def _mark_seen(self, product_id: str, keys: set):
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO seen_reviews (product_id, review_key, harvested_at) VALUES (?, ?, ?)",
+                [(product_id, key, now) for key in keys])
+
+    def _fetch_page(self, url: str):
+        self.rate_limiter.wait(url)
+        with metrics.timer("reviews.fetch"):
+            return self.fetcher.fetch(url, check_complete=False)
+
+    def harvest(self, product_url: str) -> int:
+        """
+        Собирает новые отзывы одного товара.
+
+        :param product_url: Ссылка на товар.
+        :return: Количество новых отзывов.
+        """
+        product_id = product_id_from_url(product_url)
+        product_name = product_name_from_url(product_url)
+        logger = self.logger.bind(url=product_url, stage="reviews")
+        harvested_keys = set()
+        complete = True
+
+        for page in range(1, self.max_pages + 1):
+            status, html = self._fetch_page(reviews_url(product_url, page, self.sort))
+            if status != "ok":
+                logger.warning(f"Страница отзывов {page} не загружена: {status}")
+                complete = False
+                break
+
+            with metrics.timer("reviews.parse"):
+                selectors = load_selector_config(self.selector_config_file)
+                reviews = self.parser_class(html, product_name, selectors).get_reviews()
+
+            new_reviews = []
+            reached_seen = False
+            for review in reviews:
+                key = review_key(review)
+                if key in harvested_keys:
+                    continue
+                if self._is_seen(product_id, key):
+                    reached_seen = True
+                    break
+                new_reviews.append({"key": key, **review})
+                harvested_keys.add(key)
+
+            if new_reviews:
+                with metrics.timer("reviews.sink_write"):
+                    self.sink.write_reviews(product_url, new_reviews)
+            # Пустая страница или страница без новых отзывов — конец списка
+            if reached_seen or not new_reviews:
+                break
+
+        # Ключи сохраняются, только если обход товара дошёл до конца (известный отзыв, пустая
+        # страница или max_pages). Если страница не загрузилась, при следующем запуске товар будет
+        # пройден заново, а не остановлен на отзывах с первой страницы до незагруженных
+        if complete and harvested_keys:
+            self._mark_seen(product_id, harvested_keys)
+        logger.info(f"Новых отзывов: {len(harvested_keys)}", new_reviews=len(harvested_keys))
+        return len(harvested_keys)
+
+    def harvest_all(self, product_urls) -> dict:
+        """
+        Собирает отзывы нескольких товаров параллельно.
+
+        :param product_urls: Ссылки на товары.
+        :return: Словарь {ссылка: количество новых отзывов}; для товаров с ошибкой — None.
+        """
+        def run(url):
+            try:
+                return self.harvest(url)
+            except Exception as e:
+                self.logger.error(f"Ошибка при сборе отзывов: {e}", url=url, stage="reviews")
+                return None
+
+        urls = list(product_urls)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="reviews") as executor:
+            return dict(zip(urls, executor.map(run, urls)))
+
+    def close(self):
+        self.fetcher.close()
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,213 @@
+import json
+import os
+import shutil
+import threading
+from collections import deque
+from htmlParser.configUpdater.classDriftDetector import ClassDriftDetector
+from htmlParser.configUpdater.htmlConfigUpdater import apply_class_changes, write_config
+from htmlParser.productRecord import ProductRecord
+from htmlParser.selectorConfig import DEFAULT_CONFIG_FILE
+from logs.logger import Logger
+from logs.metrics import metrics
+
+# Рабочая копия конфига, которую обновляет SelectorDriftGuard (config.json репозитория не меняется)
+RUNTIME_CONFIG_FILE = "selector_config.json"
+# Страница, на которой работает config.json из репозитория
+DEFAULT_TEMPLATE_FILE = os.path.join(os.path.dirname(DEFAULT_CONFIG_FILE), "htmldata",
+                                     "krossovki-lexsan-1585614406.html")
+
+# Поле товара -> функция, проверяющая, что селектор нашёл значение (парсер подставляет заглушки)
+FIELD_CHECKS = {
+    "Название": lambda value: value != "Нет заголовка",
+    "Цена": lambda value: value != "Цена не найдена",
+    "Описание": lambda value: value != "Описание отсутствует",
+    "Характеристики": bool,
+    "Оценка": lambda value: "error" not in value,
+}
+# То же для ProductRecord: ненайденные значения в записи — None (нераспознанный текст цены
+# или оценки хранится в raw_price/raw_rating, но селектор его нашёл)
+RECORD_FIELD_CHECKS = {
+    "Название": lambda record: record.title is not None,
+    "Цена": lambda record: record.price is not None or record.raw_price is not None,
+    "Описание": lambda record: record.description is not None,
+    "Характеристики": lambda record: bool(record.characteristics),
+    "Оценка": lambda record: record.rating is not None or record.raw_rating is not None,
+}
+# Без этих полей товар не записывается
+REQUIRED_FIELDS = ("Название", "Цена")
+
+
+def runtime_config_file(path: str = RUNTIME_CONFIG_FILE, source: str = DEFAULT_CONFIG_FILE) -> str:
+    """
+    Готовит рабочую копию конфига селекторов. Копия создаётся из source, если её нет
+    или source новее (конфиг в репозитории обновили); иначе остаются исправления прошлых запусков.
+
+    :param path: Путь к рабочей копии.
+    :param source: Исходный конфиг.
+    :return: path.
+    """
+    if not os.path.exists(path) or os.path.getmtime(source) > os.path.getmtime(path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = path + ".tmp"
+        shutil.copyfile(source, temp_path)
+        os.replace(temp_path, path)
+    return path
+
+
+def field_hits(product_data) -> dict:
+    """
+    :param product_data: Результат парсинга: словарь get_product_data или ProductRecord.
+    :return: Словарь {поле: найдено ли значение} для отслеживаемых полей.
+    """
+    if isinstance(product_data, ProductRecord):
+        return {field: check(product_data) for field, check in RECORD_FIELD_CHECKS.items()}
+    return {field: bool(check(product_data.get(field))) for field, check in FIELD_CHECKS.items()}
+
+
+class SelectorDriftGuard:
+    def __init__(self, config_file: str = None, template_file: str = DEFAULT_TEMPLATE_FILE, window: int = 50,
+                 min_samples: int = 20, min_hit_rate: float = 0.5, max_repairs: int = 3,
+                 max_affected: int = 10000, log_file: str = "log.txt"):
+        """
+        Следит за долей найденных полей в скользящем окне последних страниц. Когда доля
+        какого-либо поля падает ниже порога (сайт поменял классы), скачивание приостанавливается,
+        ClassDriftDetector сравнивает последнюю проблемную страницу с шаблоном, а обновлённый
+        конфиг атомарно записывается на место старого. Парсеры во всех процессах подхватывают
+        его через load_selector_config, браузеры при этом не перезапускаются.
+
+        :param config_file: Конфиг селекторов, который обновляется при исправлении. None — рабочая копия
+                            selector_config.json в текущей папке, созданная из htmlParser/configUpdater/config.json.
+        :param template_file: Страница, на которой конфиг работает (эталон для сравнения).
+        :param window: Сколько последних страниц учитывается в доле найденных полей.
+        :param min_samples: Минимум страниц в окне, прежде чем делать выводы.
+        :param min_hit_rate: Порог доли найденных значений поля.
+        :param max_repairs: Сколько раз за запуск можно обновлять конфиг.
+        :param max_affected: Сколько ссылок со страницами без части полей хранить для повторной обработки.
+        :param log_file: Имя файла для записи логов.
+        """
+        self.config_file = config_file or runtime_config_file()
+        self.template_file = template_file
+        self.min_samples = min(min_samples, window)
+        self.min_hit_rate = min_hit_rate
+        self.max_repairs = max_repairs
+        self.logger = Logger(log_file)
+
+        # Номер версии конфига; растёт при каждом обновлении
+        self.generation = 0
+        self.repairs = 0
+
+        self._windows = {field: deque(maxlen=window) for field in FIELD_CHECKS}
+        self._affected = deque(maxlen=max_affected)  # Ссылки страниц с ненайденными полями
+        self._stale = []                            # Такие же страницы, разобранные до обновления конфига
+        self._sample_html = None                    # Последняя страница с ненайденными полями
+        self._template_html = None
+        self._lock = threading.Lock()
+        self._resumed = threading.Event()
+        self._resumed.set()
+
+    def wait_until_resumed(self):
+        """
+        Блокирует поток скачивания, пока идёт обновление конфига.
+        """
+        self._resumed.wait()
+
+    def hit_rates(self) -> dict:
+        """
+        Доля найденных значений по полям в текущем окне.
+        """
+        with self._lock:
+            return {field: sum(window) / len(window) for field, window in self._windows.items() if window}
+
+    def record(self, url: str, product_data, html_code: str, generation: int) -> bool:
+        """
+        Учитывает результат парсинга страницы.
+
+        :param url: Ссылка на товар.
+        :param product_data: Результат парсинга: словарь get_product_data или ProductRecord.
+        :param html_code: HTML-код страницы (нужен для сравнения с шаблоном).
+        :param generation: Версия конфига (generation) на момент отправки страницы в парсинг.
+        :return: True, если товар можно записывать; False, если не найдены обязательные поля
+                 или страница разобрана устаревшим конфигом.
+        """
+        hits = field_hits(product_data)
+        missed = not all(hits.values())
+        with self._lock:
+            if generation < self.generation:
+                # Страница разобрана до обновления конфига: результат не учитывается в окне
+                if missed:
+                    self._stale.append(url)
+                    return False
+                return True
+
+            for field, hit in hits.items():
+                self._windows[field].append(hit)
+            if missed:
+                self._affected.append(url)
+                self._sample_html = html_code
+        return all(hits[field] for field in REQUIRED_FIELDS)
+
+    def _drifted_fields(self) -> list:
+        return [field for field, window in self._windows.items()
+                if len(window) >= self.min_samples and sum(window) / len(window) < self.min_hit_rate]
+
+    def check(self) -> list:
+        """
+        Вызывается после record. Если доля какого-либо поля упала ниже порога, обновляет конфиг.
+
+        :return: Ссылки, которые нужно обработать заново (страницы с ненайденными полями,
+                 разобранные до обновления конфига).
+        """
+        with self._lock:
+            requeue, self._stale = self._stale, []
+            fields = self._drifted_fields() if self.repairs < self.max_repairs else []
+        if fields:
+            requeue.extend(self.repair(fields))
+        return requeue
+
+    def repair(self, fields: list = ()) -> list:
+        """
+        Приостанавливает скачивание, ищет изменившиеся классы и атомарно заменяет конфиг.
+
+        :param fields: Поля, доля которых упала (для лога).
+        :return: Ссылки страниц из окна с ненайденными полями, если конфиг обновлён, иначе пустой список.
+        """
+        self._resumed.clear()
+        try:
+            with self._lock:
+                sample_html, affected = self._sample_html, list(self._affected)
+                self.repairs += 1
+            self.logger.warning(f"Доля найденных полей упала ({', '.join(fields)}), проверка селекторов",
+                                stage="drift", hit_rates=self.hit_rates())
+
+            with metrics.timer("drift_repair"):
+                with open(self.config_file, "r", encoding="utf-8") as f:
+                    config = json.load(f)
+                if self._template_html is None:
+                    with open(self.template_file, "r", encoding="utf-8") as f:
+                        self._template_html = f.read()
+                changes = ClassDriftDetector(self._template_html, config).detect(sample_html) if sample_html else {}
+                updated = apply_class_changes(config, changes)
+                if updated:
+                    write_config(config, self.config_file)
+                    # Эталоном для следующих проверок становится страница, под которую обновлён конфиг
+                    self._template_html = sample_html
+
+            with self._lock:
+                for window in self._windows.values():
+                    window.clear()
+                self._affected.clear()
+                self._sample_html = None
+                if updated:
+                    self.generation += 1
+
+            if not updated:
+                self.logger.warning("Изменённые классы не найдены, конфиг не изменён", stage="drift")
+                return []
+            self.logger.info(f"Конфиг {self.config_file} обновлён: "
+                             + ", ".join(f"{old} → {new}" for old, new in updated),
+                             stage="drift", requeued=len(affected))
+            return affected
+        finally:
+            self._resumed.set()
@@ -0,0 +1,298 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+from collections import deque
+from logs.logger import Logger
+from logs.metrics import metrics
+
+# Исходы запроса, о которых сообщают потоки загрузки и запись
+OK = "ok"
+BLOCKED = "blocked"  # страница антибота, 403/429/503
+ERROR = "error"      # сетевая ошибка, неполная страница
+EMPTY = "empty"      # страница загружена, но парсер не нашёл обязательные поля
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class ThroughputController:
+    def __init__(self, max_workers: int, initial_workers: int = None, min_delay: float = 0.0,
+                 max_delay: float = 30.0, delay_step: float = 0.25, latency_factor: float = 2.0,
+                 breaker_window: int = 20, breaker_threshold: float = 0.5, breaker_min_samples: int = 10,
+                 breaker_cooldown: float = 60.0, max_breaker_cooldown: float = 900.0, log_file: str = "log.txt"):
+        """
+        Регулятор скорости загрузки по принципу AIMD: после каждого «окна» успешных запросов
+        (столько успехов, сколько сейчас разрешено потоков) число одновременных запросов
+        растёт на один, а пауза между запросами уменьшается вдвое; при блокировке,
+        ошибке, пустой странице или росте задержки ответа число запросов делится пополам
+        (не чаще раза за окно), а при блокировке и росте задержки ещё и удваивается пауза.
+        Если в последних breaker_window запросах доля блокировок достигает breaker_threshold,
+        размыкается предохранитель: запросы
+        не выдаются breaker_cooldown секунд (при повторных срабатываниях — вдвое дольше),
+        затем проходит один пробный запрос, и по его результату загрузка возобновляется с
+        одного потока или предохранитель снова размыкается.
+
+        :param max_workers: Максимум одновременных запросов (количество потоков загрузки).
+        :param initial_workers: Сколько запросов разрешено в начале. None — max_workers.
+        :param min_delay: Минимальная пауза между началами запросов, в секундах.
+        :param max_delay: Максимальная пауза между началами запросов, в секундах.
+        :param delay_step: Пауза после первого замедления; пауза короче неё после ускорения сбрасывается до min_delay.
+        :param latency_factor: Во сколько раз средняя задержка ответа должна превысить лучшую, чтобы считаться перегрузкой.
+        :param breaker_window: Сколько последних запросов учитывается в доле блокировок.
+        :param breaker_threshold: Доля блокировок, при которой размыкается предохранитель.
+        :param breaker_min_samples: Минимум запросов в окне для срабатывания предохранителя.
+        :param breaker_cooldown: Пауза после первого срабатывания предохранителя, в секундах.
+        :param max_breaker_cooldown: Максимальная пауза предохранителя, в секундах.
+        :param log_file: Имя файла для записи логов.
+        """
+        self.max_workers = max(1, max_workers)
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.delay_step = delay_step
+        self.latency_factor = latency_factor
+        self.breaker_threshold = breaker_threshold
+        self.breaker_min_samples = min(breaker_min_samples, breaker_window)
+        self.breaker_cooldown = breaker_cooldown
+        self.max_breaker_cooldown = max_breaker_cooldown
+        self.logger = Logger(log_file).bind(stage="throttle")
+
+        self.allowed_workers = min(self.max_workers, initial_workers or self.max_workers)
+        self.delay = min_delay
+        self.state = CLOSED
+        self.stats = {"increases": 0, "decreases": 0, "breaker_opens": 0, "blocked": 0, "errors": 0, "empty": 0}
+
+        self._condition = threading.Condition()
+        self._active = 0
+        self._next_slot = 0.0
+        self._blocks = deque(maxlen=breaker_window)
+        self._successes = 0
+        self._since_decrease = self.allowed_workers
+        self._opens_in_row = 0
+        self._open_until = 0.0
+        self._probe_in_flight = False
+        # Средняя (EWMA) и лучшая средняя задержка отдельно для HTTP и браузера: их задержки несравнимы
+        self._latency = {}
+        self._best_latency = {}
+        self._latency_samples = {}
+
+    def acquire(self):
+        """
+        Ждёт разрешения на запрос: свободного места среди разрешённых одновременных запросов,
+        замкнутого предохранителя и паузы после предыдущего запроса.
+        """
+        with metrics.timer("throttle_wait"):
+            with self._condition:
+                while True:
+                    now = time.monotonic()
+                    if self.state == OPEN:
+                        if now < self._open_until:
+                            self._condition.wait(self._open_until - now)
+                            continue
+                        self.state = HALF_OPEN
+                        self.logger.info("Предохранитель: пробный запрос")
+                    if self.state == HALF_OPEN:
+                        if self._probe_in_flight:
+                            self._condition.wait()
+                            continue
+                        self._probe_in_flight = True
+                        break
+                    if self._active < self.allowed_workers:
+                        break
+                    self._condition.wait()
+
+                self._active += 1
+                slot = max(now, self._next_slot)
+                self._next_slot = slot + self.delay
+            if slot > now:
+                time.sleep(slot - now)
+
+    def release(self, outcome: str, latency: float = None, source: str = None):
+        """
+        Освобождает место после запроса и учитывает его исход.
+
+        :param outcome: OK, BLOCKED, ERROR или EMPTY.
+        :param latency: Время запроса в секундах (учитывается только для успешных).
+        :param source: Откуда получена страница ("http" или "browser"); задержки учитываются отдельно.
+        """
+        with self._condition:
+            self._active -= 1
+            self._observe(outcome, latency, source)
+            self._condition.notify_all()
+
+    def record(self, outcome: str):
+        """
+        Учитывает исход, известный уже после освобождения места (например, пустой результат парсинга).
+        """
+        with self._condition:
+            self._observe(outcome, None, None, from_request=False)
+            self._condition.notify_all()
+
+    def _observe(self, outcome: str, latency, source, from_request: bool = True):
+        if outcome == BLOCKED:
+            self.stats["blocked"] += 1
+        elif outcome == ERROR:
+            self.stats["errors"] += 1
+        elif outcome == EMPTY:
+            self.stats["empty"] += 1
+
+        if from_request:
+            self._blocks.append(outcome == BLOCKED)
+            if self.state == HALF_OPEN and self._probe_in_flight:
+                self._probe_in_flight = False
+                if outcome == BLOCKED:
+                    self._open()
+                else:
+                    self._close()
+                return
+        if self.state != CLOSED:
+            return
+
+        blocked = sum(self._blocks)
+        if len(self._blocks) >= self.breaker_min_samples and blocked / len(self._blocks) >= self.breaker_threshold:
+            self._open()
+            return
+
+        self._since_decrease += 1
+        congested = self._congested(latency, source)
+        if outcome != OK or congested:
+            # Ошибки и пустые страницы — повод уменьшить параллельность; блокировки и медленные ответы —
+            # признак того, что сайт нас ограничивает, поэтому растёт и пауза
+            self._decrease("slow" if congested else outcome, slow_down=congested or outcome == BLOCKED)
+            return
+
+        self._successes += 1
+        if self._successes >= self.allowed_workers:
+            self._increase()
+            if not blocked and len(self._blocks) == self._blocks.maxlen:
+                # Целое окно без блокировок: следующее срабатывание предохранителя снова с короткой паузой
+                self._opens_in_row = 0
+
+    def _congested(self, latency, source) -> bool:
+        if latency is None:
+            return False
+        # EWMA сглаживает единичные медленные ответы; перегрузка — когда среднее вдвое хуже лучшего среднего
+        average = self._latency.get(source)
+        average = latency if average is None else 0.8 * average + 0.2 * latency
+        self._latency[source] = average
+        samples = self._latency_samples[source] = self._latency_samples.get(source, 0) + 1
+        if samples < 5:
+            return False
+        best = self._best_latency[source] = min(self._best_latency.get(source, average), average)
+        return average > best * self.latency_factor
+
+    def _increase(self):
+        self._successes = 0
+        if self.allowed_workers >= self.max_workers and self.delay <= self.min_delay:
+            return
+        self.allowed_workers = min(self.max_workers, self.allowed_workers + 1)
+        # Пауза сокращается быстрее, чем растёт число потоков: иначе после короткой волны блокировок
+        # загрузка минутами идёт с паузой в несколько секунд
+        self.delay = self.delay / 2 if self.delay / 2 >= self.delay_step else 0.0
+        self.delay = max(self.min_delay, self.delay)
+        self.stats["increases"] += 1
+        self.logger.debug(f"Ускорение: потоков {self.allowed_workers}, пауза {self.delay:.2f} с",
+                          workers=self.allowed_workers, delay=self.delay)
+
+    def _decrease(self, outcome: str, slow_down: bool):
+        self._successes = 0
+        # Не чаще раза за окно: исходы запросов, начатых до замедления, его уже не усиливают
+        if self._since_decrease < self.allowed_workers:
+            return
+        self._since_decrease = 0
+        self.allowed_workers = max(1, self.allowed_workers // 2)
+        if slow_down:
+            self.delay = min(self.max_delay, max(self.delay * 2, self.delay_step, self.min_delay))
+        self.stats["decreases"] += 1
+        self.logger.info(f"Замедление ({outcome}): потоков {self.allowed_workers}, пауза {self.delay:.2f} с",
+                         outcome=outcome, workers=self.allowed_workers, delay=self.delay)
+
+    def _open(self):
+        cooldown = min(self.max_breaker_cooldown, self.breaker_cooldown * 2 ** self._opens_in_row)
+        self._opens_in_row += 1
+        self.state = OPEN
+        self._open_until = time.monotonic() + cooldown
+        self._blocks.clear()
+        self.allowed_workers = 1
+        self.delay = min(self.max_delay, max(self.delay * 2, self.delay_step, self.min_delay))
+        self.stats["breaker_opens"] += 1
+        self.logger.warning(f"Предохранитель разомкнут: много блокировок, пауза {cooldown:.0f} с", cooldown=cooldown)
+
+    def _close(self):
+        self.state = CLOSED
+        self._blocks.clear()
+        self._successes = 0
+        self._since_decrease = 0
+        self.logger.info("Предохранитель замкнут: загрузка продолжается с одного потока")
+
+    def report(self) -> str:
+        """
+        Итоговое состояние регулятора.
+        """
+        with self._condition:
+            return (f"потоков {self.allowed_workers}/{self.max_workers}, пауза {self.delay:.2f} с, "
+                    f"ускорений {self.stats['increases']}, замедлений {self.stats['decreases']}, "
+                    f"срабатываний предохранителя {self.stats['breaker_opens']}, блокировок {self.stats['blocked']}, "
+                    f"ошибок {self.stats['errors']}, пустых страниц {self.stats['empty']}")
+
+
+class RetryQueue:
+    def __init__(self, base_delay: float = 5.0, max_delay: float = 300.0):
+        """
+        Очередь повторных попыток с отложенной выдачей: перед попыткой n элемент ждёт
+        экспоненциально растущую паузу base_delay * 2^(n-2) (не больше max_delay),
+        половина которой случайна, чтобы повторы не приходили пачкой.
+
+        :param base_delay: Пауза перед первым повтором (второй попыткой), в секундах.
+        :param max_delay: Максимальная пауза, в секундах.
+        """
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._heap = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._heap)
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Пауза перед попыткой с номером attempt (2 — первый повтор).
+        """
+        ceiling = min(self.max_delay, self.base_delay * 2 ** max(0, attempt - 2))
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+    def push(self, item, attempt: int) -> float:
+        """
+        Откладывает элемент до следующей попытки.
+
+        :param item: Элемент очереди (например, пара (номер, ссылка)).
+        :param attempt: Номер следующей попытки.
+        :return: Через сколько секунд элемент будет выдан.
+        """
+        delay = self.backoff(attempt)
+        with self._lock:
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._counter), item, attempt))
+        return delay
+
+    def pop_ready(self):
+        """
+        :return: Пара (элемент, номер попытки), время которой наступило, или None.
+        """
+        with self._lock:
+            if self._heap and self._heap[0][0] <= time.monotonic():
+                _, _, item, attempt = heapq.heappop(self._heap)
+                return item, attempt
+        return None
+
+    def wait_time(self, default: float) -> float:
+        """
+        Сколько ждать до ближайшей попытки, но не дольше default.
+        """
+        with self._lock:
+            if not self._heap:
+                return default
+            return min(default, max(0.01, self._heap[0][0] - time.monotonic()))
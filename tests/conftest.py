@@ -0,0 +1,35 @@
+import glob
+import os
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+from htmlParser.selectorConfig import DEFAULT_CONFIG_FILE
+from logs import logger
+
+# Сохранённые страницы товаров: htmldata/*.html и страница, на которой работает config.json
+SAMPLE_PAGES = sorted(glob.glob(os.path.join(PROJECT_ROOT, "htmldata", "*.html"))) + [
+    os.path.join(os.path.dirname(DEFAULT_CONFIG_FILE), "htmldata", "krossovki-lexsan-1585614406.html"),
+]
+
+
+def read_page(path: str) -> str:
+    with open(path, "r", encoding="utf-8") as file:
+        return file.read()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def work_dir(tmp_path_factory):
+    """
+    Тесты работают во временной папке: логи (logs/log.txt) не попадают в репозиторий.
+    Папка общая на все тесты, потому что потоки записи логов открывают файл при первой записи.
+    """
+    logger.configure(console=False)
+    previous = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("work"))
+    yield
+    logger.flush_all()
+    os.chdir(previous)
@@ -0,0 +1,48 @@
+import functools
+import os
+
+import pytest
+
+from benchmarks.parserBenchmark import CAROUSEL_TAIL_PAGE
+from conftest import SAMPLE_PAGES, read_page
+from htmlParser.htmlProductParser import PARSER_BACKENDS, parse_product_html
+
+PAGES = {os.path.basename(path): path for path in SAMPLE_PAGES}
+
+
+@functools.lru_cache(maxsize=None)
+def page_html(name: str) -> str:
+    return CAROUSEL_TAIL_PAGE if name == "carousel_tail" else read_page(PAGES[name])
+
+
+@functools.lru_cache(maxsize=None)
+def product_data(name: str, backend: str) -> dict:
+    return PARSER_BACKENDS[backend](page_html(name), "test").get_product_data()
+
+
+@pytest.mark.parametrize("backend", [backend for backend in PARSER_BACKENDS if backend != "bs4"])
+@pytest.mark.parametrize("name", list(PAGES) + ["carousel_tail"])
+def test_backend_matches_bs4(name, backend):
+    # Результат get_product_data у всех бэкендов должен совпадать с BeautifulSoup
+    assert product_data(name, backend) == product_data(name, "bs4")
+
+
+@pytest.mark.parametrize("name", list(PAGES))
+def test_pages_have_required_fields(name):
+    product = product_data(name, "bs4")
+    assert product["Название"] != "Нет заголовка"
+    assert product["Цена"] != "Цена не найдена"
+
+
+@pytest.mark.parametrize("backend", list(PARSER_BACKENDS))
+def test_text_after_carousel_is_kept(backend):
+    # Карусель рекомендаций удаляется, а текст после неё остаётся в отзыве
+    review = product_data("carousel_tail", backend)["Отзывы"][0]
+    assert review["date"].endswith("2024")
+    assert review["comment"].endswith("и лёгкие")
+    assert "Похожие" not in review["comment"]
+
+
+def test_empty_page():
+    assert parse_product_html("", "test") == {}
+    assert parse_product_html("", "test", as_record=True) is None
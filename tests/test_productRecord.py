@@ -0,0 +1,61 @@
+import os
+import pickle
+
+import pytest
+
+from conftest import SAMPLE_PAGES, read_page
+from htmlParser.htmlProductParser import parse_product_html
+from htmlParser.productRecord import NO_DATA, NO_DATE, NO_PRICE, NO_RATING, NO_REVIEWER, NO_TITLE, \
+    ProductRecord, dumps, loads
+
+
+def product(**fields) -> dict:
+    data = {
+        "Название": "Кроссовки",
+        "Цена": "98,71 BYN",
+        "Описание": "Описание отсутствует",
+        "Характеристики": {"Цвет": "белый"},
+        "Оценка": {"overall_rating": "4.9 / 5"},
+        "Отзывы": [{"reviewer": "Анна", "date": "21 марта 2025", "comment": "Удобные", "rating": 5,
+                    "product_color": "белый", "media": ["https://example.com/1.jpg"]}],
+        "URL товара": "https://ozon.by/product/krossovki-1585614406/",
+    }
+    data.update(fields)
+    return data
+
+
+@pytest.mark.parametrize("path", SAMPLE_PAGES, ids=os.path.basename)
+def test_round_trip_of_sample_pages(path):
+    data = parse_product_html(read_page(path), "test")
+    record = ProductRecord.from_product_data(data)
+    assert record.to_dict() == data
+    assert loads(dumps(record)) == record
+    assert pickle.loads(pickle.dumps(record)) == record
+
+
+@pytest.mark.parametrize("data", [
+    product(),
+    # Заглушки вместо ненайденных значений
+    product(**{"Название": NO_TITLE, "Цена": NO_PRICE, "Оценка": {"error": NO_RATING}, "Характеристики": {},
+               "Отзывы": [{"reviewer": NO_REVIEWER, "date": NO_DATE, "comment": NO_DATA, "rating": 0,
+                           "product_color": NO_DATA, "media": []}]}),
+    # Текст, который не восстанавливается из разобранных значений
+    product(**{"Цена": "от 98,71 BYN", "Оценка": {"overall_rating": "4.90 / 5"}}),
+    product(**{"Цена": "1 299 ₽", "Оценка": {"overall_rating": "нет оценок"}}),
+    product(**{"Отзывы": [{"reviewer": "Анна", "date": "05 марта 2025", "comment": "Удобные", "rating": 5,
+                           "product_color": "белый", "media": []},
+                          {"reviewer": "Иван", "date": "вчера", "comment": "Хорошие", "rating": 4,
+                           "product_color": "чёрный", "media": []}]}),
+], ids=["regular", "sentinels", "unparsed_price_and_rating", "rubles_and_text_rating", "review_dates"])
+def test_to_dict_is_lossless(data):
+    record = ProductRecord.from_product_data(data)
+    assert record.to_dict() == data
+    assert loads(dumps(record)).to_dict() == data
+
+
+def test_typed_fields():
+    record = ProductRecord.from_product_data(product())
+    assert (record.price, record.currency, record.rating) == (9871, "BYN", 4.9)
+    assert record.description is None
+    assert record.reviews[0].date == "2025-03-21"
+    assert record.raw_price is None and record.raw_rating is None and record.reviews[0].raw_date is None
@@ -0,0 +1,108 @@
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from scraper.reviewHarvester import ReviewHarvester
+
+PRODUCT_URL = "https://ozon.by/product/krossovki-lexsan-1585614406/"
+
+
+def review(number: int) -> dict:
+    return {"reviewer": f"Покупатель {number}", "date": "21 марта 2025", "comment": f"Отзыв {number}",
+            "rating": 5, "product_color": "белый", "media": []}
+
+
+class FakeSink:
+    def __init__(self):
+        self.reviews = []
+
+    def write_reviews(self, product_url: str, reviews: list):
+        self.reviews.extend(reviews)
+
+
+class FakeParser:
+    # HTML страницы в тестах — номер страницы, отзывы берутся из pages
+    pages = {}
+
+    def __init__(self, html_code: str, product_name: str, selectors=None):
+        self.page = int(html_code)
+
+    def get_reviews(self) -> list:
+        return list(self.pages.get(self.page, []))
+
+
+@pytest.fixture
+def harvester(tmp_path):
+    sink = FakeSink()
+    harvester = ReviewHarvester(sink, db_path=str(tmp_path / "reviews.sqlite"), workers=1, max_pages=10)
+    harvester.parser_class = FakeParser
+    harvester.fetched = []
+    harvester.failing_pages = set()
+
+    def fetch_page(url):
+        page = int(parse_qs(urlparse(url).query)["page"][0])
+        harvester.fetched.append(page)
+        if page in harvester.failing_pages:
+            return "blocked", None
+        return "ok", str(page)
+
+    harvester._fetch_page = fetch_page
+    yield harvester
+    harvester.close()
+
+
+def set_pages(*pages):
+    FakeParser.pages = {number: [review(index) for index in page] for number, page in enumerate(pages, start=1)}
+
+
+def test_first_run_walks_until_empty_page(harvester):
+    set_pages([5, 4], [3, 2], [1])
+    assert harvester.harvest(PRODUCT_URL) == 5
+    assert harvester.fetched == [1, 2, 3, 4]
+    assert [item["comment"] for item in harvester.sink.reviews] == [f"Отзыв {index}" for index in (5, 4, 3, 2, 1)]
+
+
+def test_second_run_stops_at_first_seen_review(harvester):
+    set_pages([5, 4], [3, 2], [1])
+    harvester.harvest(PRODUCT_URL)
+
+    # Новый отзыв сдвигает остальные: обход останавливается на первом уже собранном
+    set_pages([6, 5], [4, 3], [2, 1])
+    harvester.fetched.clear()
+    assert harvester.harvest(PRODUCT_URL) == 1
+    assert harvester.fetched == [1]
+    assert harvester.sink.reviews[-1]["comment"] == "Отзыв 6"
+
+
+def test_fetch_failure_does_not_mark_reviews_seen(harvester):
+    set_pages([5, 4], [3, 2], [1])
+    harvester.failing_pages = {2}
+    assert harvester.harvest(PRODUCT_URL) == 2
+
+    # Ключи первой страницы не сохранены: следующий запуск доходит до незагруженных страниц
+    harvester.failing_pages = set()
+    harvester.fetched.clear()
+    assert harvester.harvest(PRODUCT_URL) == 5
+    assert harvester.fetched == [1, 2, 3, 4]
+
+    harvester.fetched.clear()
+    assert harvester.harvest(PRODUCT_URL) == 0
+    assert harvester.fetched == [1]
+
+
+def test_max_pages_marks_reviews_seen(harvester):
+    harvester.max_pages = 2
+    set_pages([5, 4], [3, 2], [1])
+    assert harvester.harvest(PRODUCT_URL) == 4
+    assert harvester.fetched == [1, 2]
+
+    harvester.fetched.clear()
+    assert harvester.harvest(PRODUCT_URL) == 0
+    assert harvester.fetched == [1]
+
+
+def test_repeated_review_on_next_page_is_not_duplicated(harvester):
+    # Отзыв, сдвинувшийся на следующую страницу во время обхода, записывается один раз
+    set_pages([3, 2], [2, 1])
+    assert harvester.harvest(PRODUCT_URL) == 3
+    assert len(harvester.sink.reviews) == 3
@@ -0,0 +1,133 @@
+import random
+import time
+
+import pytest
+
+from scraper.throughputController import BLOCKED, CLOSED, EMPTY, ERROR, HALF_OPEN, OK, OPEN, RetryQueue, \
+    ThroughputController
+
+
+def request(controller: ThroughputController, outcome: str, latency: float = 0.1):
+    controller.acquire()
+    controller.release(outcome, latency if outcome == OK else None, "http")
+
+
+@pytest.fixture
+def controller():
+    return ThroughputController(max_workers=8, initial_workers=4, delay_step=0.01, breaker_min_samples=10)
+
+
+def test_clean_window_adds_worker(controller):
+    for _ in range(4):
+        request(controller, OK)
+    assert controller.allowed_workers == 5
+    assert controller.stats["increases"] == 1
+
+
+def test_workers_never_exceed_maximum(controller):
+    for _ in range(100):
+        request(controller, OK)
+    assert controller.allowed_workers == controller.max_workers
+
+
+def test_error_halves_workers_without_slowing_down(controller):
+    request(controller, ERROR)
+    assert controller.allowed_workers == 2
+    assert controller.delay == 0.0
+
+
+def test_decrease_at_most_once_per_window(controller):
+    request(controller, ERROR)
+    controller.record(EMPTY)
+    assert controller.allowed_workers == 2
+    assert controller.stats["decreases"] == 1
+
+
+def test_block_halves_workers_and_doubles_delay(controller):
+    request(controller, BLOCKED)
+    assert (controller.allowed_workers, controller.delay) == (2, controller.delay_step)
+
+    request(controller, BLOCKED)
+    request(controller, BLOCKED)
+    assert (controller.allowed_workers, controller.delay) == (1, 2 * controller.delay_step)
+
+
+def test_recovery_halves_delay(controller):
+    controller.allowed_workers = 1
+    controller.delay = 0.04
+    request(controller, OK)
+    assert (controller.allowed_workers, controller.delay) == (2, 0.02)
+    for _ in range(2):
+        request(controller, OK)
+    assert (controller.allowed_workers, controller.delay) == (3, 0.01)
+    for _ in range(3):
+        request(controller, OK)
+    # Пауза короче delay_step сбрасывается до min_delay
+    assert (controller.allowed_workers, controller.delay) == (4, 0.0)
+
+
+def test_latency_growth_slows_down(controller):
+    for _ in range(6):
+        request(controller, OK, latency=0.1)
+    workers = controller.allowed_workers
+    request(controller, OK, latency=2.0)
+    assert controller.allowed_workers == workers // 2
+    assert controller.delay == controller.delay_step
+
+
+def test_breaker_opens_and_closes_after_probe():
+    controller = ThroughputController(max_workers=4, breaker_window=4, breaker_min_samples=4,
+                                      breaker_threshold=0.5, breaker_cooldown=0.05, delay_step=0.01)
+    for outcome in (OK, OK, BLOCKED, BLOCKED):
+        request(controller, outcome)
+    assert controller.state == OPEN
+    assert controller.stats["breaker_opens"] == 1
+
+    start_time = time.monotonic()
+    controller.acquire()
+    assert time.monotonic() - start_time >= 0.04
+    assert controller.state == HALF_OPEN
+    controller.release(OK, 0.1, "http")
+    assert (controller.state, controller.allowed_workers) == (CLOSED, 1)
+
+
+def test_failed_probe_doubles_cooldown():
+    controller = ThroughputController(max_workers=4, breaker_window=2, breaker_min_samples=2,
+                                      breaker_threshold=0.5, breaker_cooldown=0.05, delay_step=0.01)
+    request(controller, BLOCKED)
+    request(controller, BLOCKED)
+    first_cooldown = controller._open_until - time.monotonic()
+
+    request(controller, BLOCKED)
+    assert controller.state == OPEN
+    assert controller._open_until - time.monotonic() > first_cooldown * 1.5
+
+
+@pytest.mark.parametrize("attempt", range(2, 12))
+def test_retry_backoff_bounds(attempt):
+    random.seed(attempt)
+    retries = RetryQueue(base_delay=1.0, max_delay=60.0)
+    ceiling = min(60.0, 2 ** (attempt - 2))
+    for _ in range(200):
+        assert ceiling / 2 <= retries.backoff(attempt) <= ceiling
+
+
+def test_retry_queue_releases_items_when_due():
+    retries = RetryQueue(base_delay=0.0, max_delay=0.0)
+    assert retries.pop_ready() is None
+    assert retries.wait_time(0.5) == 0.5
+
+    retries.push(("a", 1), 2)
+    retries.push(("b", 2), 3)
+    assert len(retries) == 2
+    assert retries.pop_ready() == (("a", 1), 2)
+    assert retries.pop_ready() == (("b", 2), 3)
+    assert retries.pop_ready() is None
+
+
+def test_retry_queue_holds_items_until_backoff():
+    retries = RetryQueue(base_delay=10.0, max_delay=10.0)
+    delay = retries.push("a", 2)
+    assert 5.0 <= delay <= 10.0
+    assert retries.pop_ready() is None
+    assert 0.0 < retries.wait_time(0.5) <= 0.5